@@ -0,0 +1,126 @@
+"""RCON wire codec microbenchmark: the old BytesIO path against rehlds.codec.
+
+For every hot-path step it prints the time per operation and the peak
+memory one operation allocates on top of what is already live
+(tracemalloc), so the drop in per-command allocations is visible:
+
+- packet assembly for a bare command (status) and for a chat relay command;
+- challenge parsing from the getchallenge reply;
+- receiving a datagram: recv(8192) against recv_into() on a reusable buffer.
+
+Example (from the repository root)::
+
+    python dbot/benchmarks/codec_bench.py --iterations 200000
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from rehlds.codec import RCONCodec, challengePacket, parse_challenge  # noqa: E402
+
+PASSWORD = "secret"
+CHALLENGE = "1234567890"
+CHALLENGE_REPLY = b"\xFF\xFF\xFF\xFFA00000000 1234567890 2 0 1\n\x00"
+CHAT = 'ultrahc_ds_send_msg "Discord User" "hello from discord"'
+
+
+def legacy_command(challenge: str, cmd: str) -> bytes:
+    """Packet assembly as rehlds.rcon did it before the codec."""
+    msg = BytesIO()
+    msg.write(b"\xFF\xFF\xFF\xFF")
+    msg.write(b"rcon ")
+    msg.write(challenge.encode())
+    msg.write(b" ")
+    msg.write(PASSWORD.encode())
+    msg.write(b" ")
+    msg.write(cmd.encode())
+    msg.write(b"\n")
+    return msg.getvalue()
+
+
+def legacy_challenge_request() -> bytes:
+    msg = BytesIO()
+    msg.write(b"\xFF\xFF\xFF\xFF")
+    msg.write(b"getchallenge")
+    msg.write(b"\n")
+    return msg.getvalue()
+
+
+def legacy_parse_challenge(packet: bytes) -> str:
+    return str(BytesIO(packet).getvalue()).split(" ")[1]
+
+
+def measure(func, iterations: int) -> tuple:
+    """Returns (ns per call, peak bytes allocated by one call), measurement overhead included."""
+    for _ in range(1000):
+        func()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(1000):
+        func()
+        current, run_peak = tracemalloc.get_traced_memory()
+        peak = max(peak, run_peak - current)
+        tracemalloc.reset_peak()
+    tracemalloc.stop()
+
+    return elapsed / iterations * 1e9, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    codec = RCONCodec(PASSWORD)
+    reply = CHALLENGE_REPLY
+
+    # Datagram pair: every call sends one reply and receives it back
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def legacy_recv():
+        sender.send(reply)
+        return receiver.recv(8192)
+
+    def codec_recv():
+        sender.send(reply)
+        return parse_challenge(codec.recv_buffer, receiver.recv_into(codec.recv_buffer))
+
+    cases = [
+        ("getchallenge packet", legacy_challenge_request, lambda: challengePacket),
+        ("command packet (status)", lambda: legacy_command(CHALLENGE, "status"),
+         lambda: codec.encode_command(CHALLENGE, "status")),
+        ("command packet (chat)", lambda: legacy_command(CHALLENGE, CHAT),
+         lambda: codec.encode_command(CHALLENGE, CHAT)),
+        ("parse challenge", lambda: legacy_parse_challenge(reply), lambda: parse_challenge(reply)),
+        ("recv + parse challenge", lambda: legacy_parse_challenge(legacy_recv()), codec_recv),
+    ]
+
+    # Cost of the measurement itself (the call, the tracemalloc bookkeeping)
+    base_ns, base_peak = measure(lambda: None, args.iterations)
+
+    print(f"{'operation':<26} {'old ns':>9} {'new ns':>9} {'old bytes':>10} {'new bytes':>10}")
+    for name, old, new in cases:
+        old_ns, old_peak = measure(old, args.iterations)
+        new_ns, new_peak = measure(new, args.iterations)
+        print(f"{name:<26} {old_ns - base_ns:>9.0f} {new_ns - base_ns:>9.0f} "
+              f"{old_peak - base_peak:>10} {new_peak - base_peak:>10}")
+
+    sender.close()
+    receiver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Observer.notify dispatch microbenchmark: the old task-per-subscriber path against the dispatch table.
+
+Measures the cost of one notify() for the subscriber shapes the bot has
+(one async subscriber, like WBH_MESSAGE; three, like WBH_INFO; a plain
+function) and of notify_nowait(). Subscribers do no work, so the numbers
+are pure dispatch overhead.
+
+Example (from the repository root)::
+
+    python dbot/benchmarks/observer_bench.py --events 100000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from observer.observer import Event, Observer  # noqa: E402
+
+
+class LegacyObserver:
+    """Dispatch as observer.Observer did it before the dispatch table."""
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, event):
+        def decorator(callback):
+            self._subscribers.setdefault(event.value, []).append(callback)
+            return callback
+        return decorator
+
+    async def notify(self, event, *args, **kwargs):
+        if event.value in self._subscribers:
+            tasks = []
+            for callback in self._subscribers[event.value]:
+                tasks.append(asyncio.create_task(callback(*args, **kwargs)))
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def handler(data):
+    pass
+
+
+def plain_handler(data):
+    pass
+
+
+def build(observer_class, async_subscribers: int, sync_subscribers: int):
+    observer = observer_class()
+    for _ in range(async_subscribers):
+        observer.subscribe(Event.WBH_MESSAGE)(handler)
+    for _ in range(sync_subscribers):
+        observer.subscribe(Event.WBH_MESSAGE)(plain_handler)
+    return observer
+
+
+async def run_notify(observer, events: int) -> float:
+    data = {"message": "hi"}
+    started = time.perf_counter()
+    for _ in range(events):
+        await observer.notify(Event.WBH_MESSAGE, data)
+    return (time.perf_counter() - started) / events
+
+
+async def run_nowait(observer, events: int) -> float:
+    data = {"message": "hi"}
+    started = time.perf_counter()
+    for _ in range(events):
+        observer.notify_nowait(Event.WBH_MESSAGE, data)
+    # Let the background dispatches finish, they are part of the cost
+    while observer._background:
+        await asyncio.sleep(0)
+    return (time.perf_counter() - started) / events
+
+
+async def main_async(events: int) -> None:
+    shapes = [
+        ("1 async subscriber", 1, 0),
+        ("3 async subscribers", 3, 0),
+        ("1 sync subscriber", 0, 1),
+    ]
+
+    print(f"{'subscribers':<22} {'old us':>8} {'new us':>8} {'speedup':>8}")
+    for name, async_count, sync_count in shapes:
+        # The legacy observer only works with coroutine subscribers
+        legacy = build(LegacyObserver, async_count or 1, 0)
+        current = build(Observer, async_count, sync_count)
+
+        old = await run_notify(legacy, events)
+        new = await run_notify(current, events)
+        print(f"{name:<22} {old * 1e6:>8.2f} {new * 1e6:>8.2f} {old / new:>7.1f}x")
+
+    nowait = await run_nowait(build(Observer, 1, 0), events)
+    print(f"{'notify_nowait, 1 async':<22} {'':>8} {nowait * 1e6:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.events))
+
+
+if __name__ == "__main__":
+    main()
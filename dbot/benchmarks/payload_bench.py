@@ -0,0 +1,94 @@
+"""Webhook payload decoding microbenchmark: request.json() plus dict indexing against webserver.payloads.
+
+For a chat message and for a full 32-player status it prints the time to
+decode one event from the request body:
+
+- legacy: json.loads and the dict lookups the handlers did before the schema layer;
+- json + schema, orjson + schema: body parsing plus decode_payload() into slotted objects;
+- msgpack + schema: the same event sent as application/msgpack.
+
+orjson and msgpack rows are skipped when the module is not installed.
+
+Example (from the repository root)::
+
+    python dbot/benchmarks/payload_bench.py --iterations 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from webserver.payloads import decode_payload  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MESSAGE = {"type": "message", "nick": "Player", "message": "gg wp, one more map?", "team": 1,
+           "channel": "(ALL)", "steam_id": "STEAM_0:1:12345678"}
+INFO = {"type": "info", "map": "de_dust2", "max_players": 32,
+        "current_players": [{"name": f"Player {i}", "steam_id": f"STEAM_0:1:{i}", "stats": [i, 32 - i, i % 2 + 1]}
+                            for i in range(32)]}
+
+
+def legacy_message(body: bytes):
+    """What handle_webhook and handle_message did with the body before webserver.payloads."""
+    data = json.loads(body)
+    return data["type"], data["message"], data["nick"], data["team"], data.get("channel", ""), data.get("steam_id", "")
+
+
+def legacy_info(body: bytes):
+    """What handle_webhook, handle_info and format_info_message did before webserver.payloads."""
+    data = json.loads(body)
+    players = data.get("current_players", [])
+    return data["type"], data.get("map"), data.get("max_players"), \
+        [(player["name"], player["stats"][0], player["stats"][1], player["stats"][2]) for player in players]
+
+
+def measure(decode, body, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(body)
+    return (time.perf_counter() - started) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'payload':<10} {'decoder':<18} {'bytes':>6} {'us/event':>9} {'speedup':>8}")
+    for name, event, legacy in (("message", MESSAGE, legacy_message), ("info", INFO, legacy_info)):
+        json_body = json.dumps(event).encode()
+        decoders = [
+            ("legacy", json_body, legacy),
+            ("json + schema", json_body, lambda body: decode_payload(json.loads(body))),
+        ]
+        if orjson is not None:
+            decoders.append(("orjson + schema", json_body, lambda body: decode_payload(orjson.loads(body))))
+        if msgpack is not None:
+            decoders.append(("msgpack + schema", msgpack.packb(event), lambda body: decode_payload(msgpack.unpackb(body))))
+
+        baseline = None
+        for decoder, body, decode in decoders:
+            cost = measure(decode, body, args.iterations)
+            baseline = baseline or cost
+            print(f"{name:<10} {decoder:<18} {len(body):>6} {cost * 1e6:>9.2f} {baseline / cost:>7.1f}x")
+
+    missing = [module for module, loaded in (("orjson", orjson), ("msgpack", msgpack)) if loaded is None]
+    if missing:
+        print(f"\nnot installed, skipped: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""RCON throughput and tail latency benchmark against the in-process fake HLDS.
+
+Runs on any machine, no game server needed. The fake server runs on the
+same interpreter, so absolute numbers include its cost too; compare runs
+against each other, not against a real HLDS.
+
+Examples (from the repository root)::
+
+    python dbot/benchmarks/rcon_bench.py --client rcon --requests 2000
+    python dbot/benchmarks/rcon_bench.py --client async --concurrency 16 --latency 0.002 --jitter 0.002
+    python dbot/benchmarks/rcon_bench.py --client csrcon --concurrency 32 --loss 0.01 --timeout 0.2
+    python dbot/benchmarks/rcon_bench.py --client csrcon --batch 10 --command "say hi"
+    python dbot/benchmarks/rcon_bench.py --client source --concurrency 16 --latency 0.002
+
+``source`` runs the pipelined Source TCP client against fakes.source
+(``--jitter``, ``--loss`` and ``--split-size`` do not apply there).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, os.path.join(HERE, "..", "tests"))
+
+from rehlds.rcon import RCON, AsyncRCON  # noqa: E402
+from rehlds.source_rcon import SourceRCON  # noqa: E402
+from cs_server.csrcon import CSRCON  # noqa: E402
+
+from fakes.hlds import PASSWORD, ThreadedFakeHLDS, start_server  # noqa: E402
+from fakes.source import start_source_server  # noqa: E402
+
+
+class Result:
+    def __init__(self):
+        self.latencies = []
+        self.failures = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def timed(self, started):
+        self.latencies.append(time.perf_counter() - started)
+
+
+def fake_options(args):
+    return dict(delay=args.latency, jitter=args.jitter, loss=args.loss,
+                split_size=args.split_size, seed=args.seed)
+
+
+def run_blocking(args) -> tuple:
+    """Blocking RCON, one request at a time (as the bot used to work)."""
+    result = Result()
+    with ThreadedFakeHLDS(**fake_options(args)) as fake:
+        rcon = RCON(host="127.0.0.1", port=fake.port, password=PASSWORD)
+        rcon.connect(timeout=args.timeout)
+        result.started = time.perf_counter()
+
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            try:
+                rcon.execute(args.command)
+                result.timed(started)
+            except Exception:
+                result.failures += 1
+                rcon.connect(timeout=args.timeout)
+
+        result.finished = time.perf_counter()
+        rcon.disconnect()
+        return result, rcon.metrics.snapshot()
+
+
+async def run_async(args) -> tuple:
+    """AsyncRCON (or pipelined SourceRCON) shared by `concurrency` tasks."""
+    if args.client == "source":
+        transport, port = await start_source_server(delay=args.latency)
+        rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=args.timeout)
+    else:
+        transport, port = await start_server(**fake_options(args))
+        rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=args.timeout)
+    await rcon.connect()
+
+    result = Result()
+    remaining = iter(range(args.requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                await rcon.execute(args.command)
+                result.timed(started)
+            except Exception:
+                result.failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    result.finished = time.perf_counter()
+
+    rcon.disconnect()
+    transport.close()
+    return result, rcon.metrics.snapshot()
+
+
+async def run_csrcon(args) -> tuple:
+    """CSRCON (priority queue, circuit breaker, metrics) shared by `concurrency` tasks."""
+    transport, port = await start_server(**fake_options(args))
+    server = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=args.timeout,
+                    queue_size=max(64, args.concurrency), failure_threshold=args.requests + 1)
+    await server.connect_to_server()
+
+    result = Result()
+    remaining = iter(range(args.requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                if args.batch > 1:
+                    await server.execute_many([args.command] * args.batch)
+                else:
+                    await server.exec(args.command)
+                result.timed(started)
+            except Exception:
+                result.failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    result.finished = time.perf_counter()
+
+    await server.disconnect()
+    server.queue.close()
+    transport.close()
+    return result, server.stats()["rcon"]
+
+
+def report(args, result: Result, metrics: dict) -> None:
+    elapsed = result.finished - result.started
+    latencies = sorted(result.latencies)
+    commands = len(latencies) * (args.batch if args.client == "csrcon" else 1)
+
+    print(f"client={args.client} requests={args.requests} concurrency={args.concurrency} batch={args.batch} "
+          f"latency={args.latency} jitter={args.jitter} loss={args.loss} split_size={args.split_size}")
+    print(f"  ok={len(latencies)} failed={result.failures} elapsed={elapsed:.3f}s")
+    print(f"  throughput={len(latencies) / elapsed:.0f} req/s ({commands / elapsed:.0f} commands/s)")
+
+    if latencies:
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        print(f"  latency ms: p50={cuts[49] * 1000:.2f} p90={cuts[89] * 1000:.2f} "
+              f"p99={cuts[98] * 1000:.2f} max={latencies[-1] * 1000:.2f}")
+
+    print(f"  wire: packets out/in={metrics['packets_out']}/{metrics['packets_in']} "
+          f"bytes out/in={metrics['bytes_out']}/{metrics['bytes_in']} timeouts={metrics['timeouts']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--client", choices=["rcon", "async", "csrcon", "source"], default="csrcon")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent callers (async clients only)")
+    parser.add_argument("--batch", type=int, default=1, help="commands per execute_many call (csrcon only)")
+    parser.add_argument("--command", default="echo bench")
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server reply delay, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability per direction")
+    parser.add_argument("--split-size", type=int, default=0, help="split replies larger than this")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.client == "rcon":
+        result, metrics = run_blocking(args)
+    elif args.client in ("async", "source"):
+        result, metrics = asyncio.run(run_async(args))
+    else:
+        result, metrics = asyncio.run(run_csrcon(args))
+
+    report(args, result, metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Replay an Observer event recording against the bot with stubbed Discord, Redis, MySQL and CS.
+
+Reads a file written by observer.recorder.EventRecorder (OBSERVER_RECORD_FILE)
+and notifies every event again in recorded order. The bot modules are the
+real ones; the outside world is replaced:
+
+- Discord: the bot object and the objects left out of the recording
+  (interactions, messages) are mocks whose coroutines return at once;
+- Redis: the in-process fakes.redis_server;
+- MySQL: a stub that is always connected, selects nothing and changes one row;
+- CS: fakes.hlds (GoldSrc) or fakes.source (Source) for every configured server.
+
+``--speed 1`` keeps the recorded pacing, ``--speed 10`` plays ten times faster,
+``--speed 0`` plays as fast as the bot can take it. Every event is notified
+from its own task, as webhooks and Discord callbacks are. The report gives
+throughput, notify() latency per event (for events with a queue that is the
+time to enqueue) and the subscribers that took the most time in total.
+
+The bot reads config.py as usual; ``--config DIR`` takes it from DIR instead.
+BE_READY is skipped: it would start the web server and real connections.
+
+Example (from the repository root)::
+
+    python dbot/benchmarks/replay_events.py events.jsonl.gz --speed 0
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, "..", "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(HERE, "..", "tests"))
+
+from rehlds.metrics import Histogram  # noqa: E402
+
+SKIPPED = {"be_ready"}
+
+
+def discord_stub(type_name: str = "Object"):
+    """A Discord object whose awaitable methods return at once."""
+    stub = MagicMock(name=type_name)
+    message = MagicMock(name="Message")
+    message.edit = AsyncMock(return_value=message)
+    message.delete = AsyncMock()
+
+    channel = stub.channel
+    channel.send = AsyncMock(return_value=message)
+    channel.fetch_message = AsyncMock(return_value=message)
+    channel.purge = AsyncMock(return_value=[])
+
+    stub.send = AsyncMock(return_value=message)
+    stub.fetch_message = AsyncMock(return_value=message)
+    stub.purge = AsyncMock(return_value=[])
+    stub.edit = AsyncMock(return_value=message)
+    stub.delete = AsyncMock()
+    stub.response.defer = AsyncMock()
+    stub.response.send_message = AsyncMock()
+    stub.followup.send = AsyncMock(return_value=message)
+    stub.delete_original_response = AsyncMock()
+    stub.edit_original_response = AsyncMock()
+    stub.user.display_name = "replay"
+    stub.get_channel.return_value = stub
+    stub.get_guild.return_value = stub
+    stub.fetch_member = AsyncMock(return_value=None)
+    return stub
+
+
+class StubMySQL:
+    """Always connected; SELECT returns nothing, changes affect one row."""
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self):
+        pass
+
+    async def execute_select(self, query, args=()):
+        return []
+
+    async def execute_change(self, query, args=()):
+        return 1
+
+
+async def install_stubs(modules) -> list:
+    """Point the bot modules at stubs and fakes. Returns the fake servers to close."""
+    from fakes.hlds import PASSWORD, start_server
+    from fakes.redis_server import start_redis_server
+    from fakes.source import start_source_server
+
+    bot_server, redis_server, sql_server, cs_server = modules
+    servers = []
+
+    bot_server.dbot.bot = discord_stub("Bot")
+
+    fake_redis, port = await start_redis_server()
+    servers.append(fake_redis)
+    redis_server.rc.host, redis_server.rc.port = "127.0.0.1", port
+    await redis_server.rc.connect()
+
+    stub = StubMySQL()
+    for name in ("is_connected", "connect", "execute_select", "execute_change"):
+        setattr(sql_server.mysql, name, getattr(stub, name))
+
+    for csrcon in cs_server.cs_pool.servers.values():
+        if csrcon.protocol == "source":
+            fake, port = await start_source_server(password=PASSWORD)
+            servers.append(fake)
+        else:
+            transport, port = await start_server()
+            servers.append(transport)
+        csrcon.cs_server.host, csrcon.cs_server.port = "127.0.0.1", port
+        csrcon.cs_server.password = PASSWORD
+    await cs_server.cs_pool.connect_due()
+    return servers
+
+
+async def replay(path: str, speed: float, limit: int) -> None:
+    import config
+    from observer.observer import Event
+    from observer.observer_client import configure_observer, observer
+    from observer.recorder import read_recording, restore
+
+    import bot.commands  # noqa: F401
+    import bot.events  # noqa: F401
+    import webserver.ws_client  # noqa: F401
+    import bot.bot_server as bot_server
+    import data_server.redis_server as redis_server
+    import data_server.sql_server as sql_server
+    import cs_server.cs_server as cs_server
+
+    # Event queues as app.py sets them up; replays stay in this process and are not recorded again
+    configure_observer(config)
+    observer.recorder = None
+    observer._backends.clear()
+
+    servers = await install_stubs((bot_server, redis_server, sql_server, cs_server))
+
+    records = []
+    for ts, name, args, kwargs in read_recording(path):
+        if name in SKIPPED:
+            continue
+        records.append((ts, Event(name), restore(args, discord_stub), restore(kwargs, discord_stub)))
+        if limit and len(records) >= limit:
+            break
+    if not records:
+        print("no events to replay")
+        return
+
+    latency = {}
+    tasks = []
+
+    async def fire(event, args, kwargs):
+        started = time.perf_counter()
+        await observer.notify(event, *args, **kwargs)
+        latency.setdefault(event.value, Histogram()).observe(time.perf_counter() - started)
+
+    loop = asyncio.get_running_loop()
+    first = records[0][0]
+    started = loop.time()
+    for ts, event, args, kwargs in records:
+        if speed > 0:
+            delay = started + (ts - first) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(event, args, kwargs)))
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    await observer.drain()
+    elapsed = loop.time() - started
+
+    recorded = records[-1][0] - first
+    print(f"replayed {len(records)} events in {elapsed:.2f} s "
+          f"(recorded over {recorded:.2f} s): {len(records) / elapsed:.0f} events/s")
+    print()
+    print(f"{'event':<20} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, histogram in sorted(latency.items(), key=lambda item: -item[1].total):
+        print(f"{name:<20} {histogram.count:>7} {histogram.quantile(0.5) * 1000:>8.1f} "
+              f"{histogram.quantile(0.99) * 1000:>8.1f} {histogram.max * 1000:>8.1f}")
+
+    subscribers = [(event, name, stats) for event, entries in observer.subscriber_stats().items()
+                   for name, stats in entries.items() if stats["calls"]]
+    subscribers.sort(key=lambda item: -item[2]["latency"]["sum"])
+    print()
+    print(f"{'subscriber':<60} {'calls':>7} {'total ms':>9} {'p99 ms':>8} {'errors':>7}")
+    for event, name, stats in subscribers[:10]:
+        print(f"{event + ' ' + name:<60.60} {stats['calls']:>7} {stats['latency']['sum'] * 1000:>9.1f} "
+              f"{stats['latency']['p99'] * 1000:>8.1f} {stats['failures']:>7}")
+
+    observer.close()
+    for server in servers:
+        server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="file written by OBSERVER_RECORD_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = recorded pace, 0 = as fast as possible")
+    parser.add_argument("--limit", type=int, default=0, help="replay at most this many events")
+    parser.add_argument("--config", help="directory with the config.py to use")
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.recording)
+    if args.config:
+        sys.path.insert(0, os.path.abspath(args.config))
+    # The logger writes to logs/ next to the sources, as when the bot runs
+    os.chdir(SRC)
+    asyncio.run(replay(path, args.speed, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import config
 
-from observer.observer_client import logger
+from observer.observer_client import logger, configure_observer
+
+configure_observer(config)
 
 from bot.bot_server import dbot
 
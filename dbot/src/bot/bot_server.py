@@ -88,7 +88,9 @@ async def send_status_message(message: str, channel: discord.TextChannel):
 # !SECTION
 
 # -- (route) get_member
-@nsroute.create_route("/GetMember")
+# Без ttl: discord.Member - живой объект (ник, роли), его нельзя отдавать из кеша.
+# Одновременные запросы одного участника объединяются в один fetch_member.
+@nsroute.create_route("/GetMember", timeout=1.0, coalesce=True)
 async def get_member(discord_id: int) -> discord.Member:
   guild = dbot.bot.get_guild(config.GUILD_ID)
   member: discord.Member 
@@ -8,22 +8,26 @@ async def ev_online_players(data):
   global cache_online_players
   cache_online_players = set(player['name'] for player in data['current_players'])
 
+async def get_online_players(interaction: discord.Interaction) -> set:
+  # Таблица игроков из rcon status; если она недоступна - последние данные вебхука
+  players: list = await nsroute.call_route("/cs/players", getattr(interaction.namespace, 'server', None))
+  return set(cache_online_players) if players is None else set(players)
+
 async def players_online(interaction: discord.Interaction, current: str) -> list[discord.app_commands.Choice[str]]:
-  global cache_online_players
-  filter_players: list = [player_name for player_name in cache_online_players if current.lower() in player_name.lower()][:25]
+  online_players: set = await get_online_players(interaction)
+  filter_players: list = [player_name for player_name in online_players if current.lower() in player_name.lower()][:25]
   return [discord.app_commands.Choice(name=player, value=player) for player in filter_players]
 
 async def ban_online(interaction: discord.Interaction, current: str) -> list[discord.app_commands.Choice[str]]:
-  global cache_online_players
-  filter_players: list = [player_name for player_name in cache_online_players if current.lower() in player_name.lower()][:25] 
+  online_players: set = await get_online_players(interaction)
+  filter_players: list = [player_name for player_name in online_players if current.lower() in player_name.lower()][:25] 
   return [discord.app_commands.Choice(name=player, value=player) for player in filter_players]
 
 async def ban_offline(interaction: discord.Interaction, current: str) -> list[discord.app_commands.Choice[str]]:
-  global cache_online_players
   offline_players: list = await nsroute.call_route("/redis/get_offline_players") or []
 
   offline_set: set = set(offline_players)
-  filtered_offline_players: list = list(offline_set - cache_online_players)
+  filtered_offline_players: list = list(offline_set - await get_online_players(interaction))
   filter_players: list = [player_name for player_name in filtered_offline_players if current.lower() in player_name.lower()][:25] 
   return [discord.app_commands.Choice(name=player, value=player) for player in filter_players]
 
@@ -55,3 +59,8 @@ async def maps_all(interaction: discord.Interaction, current: str) -> list[disco
   filter_maps: list = [map_name for map_name in map_list if current.lower() in map_name.lower()][:25]
   return [discord.app_commands.Choice(name=map, value=map) for map in filter_maps]
 
+async def cs_servers(interaction: discord.Interaction, current: str) -> list[discord.app_commands.Choice[str]]:
+  servers: list = await nsroute.call_route("/cs/servers") or []
+
+  filter_servers: list = [server for server in servers if current.lower() in server.lower()][:25]
+  return [discord.app_commands.Choice(name=server, value=server) for server in filter_servers]
@@ -67,37 +67,45 @@ async def cmd_ping(interaction: discord.Interaction, amount: int=0):
 
 # -- /connect_to_cs
 @bot.tree.command(name="connect_to_cs", description="Подключается к серверу")
+@discord.app_commands.describe(server="Сервер (по умолчанию - все серверы)")
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)  # Проверка прав пользователя
-async def cmd_connect_to_cs(interaction: discord.Interaction):
+async def cmd_connect_to_cs(interaction: discord.Interaction, server: str=None):
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CONNECT_TO_CS, {
     Param.Interaction: interaction,
+    "server": server
   })
 
 # -- /rcon
 @bot.tree.command(name="rcon", description="Отправляет произвольную команду в консоль сервера")
+@discord.app_commands.describe(server="Сервер (по умолчанию - основной)")
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)
-async def cmd_rcon(interaction: discord.Interaction, command: str):     
+async def cmd_rcon(interaction: discord.Interaction, command: str, server: str=None):     
   await interaction.response.defer(thinking=True, ephemeral=True)
   
   await observer.notify(Event.BC_CS_RCON, {
     Param.Interaction: interaction,
-    "command": command
+    "command": command,
+    "server": server
   })
 
 # -- /kick
 @bot.tree.command(name="kick", description="Кикает игрока с сервера")
-@discord.app_commands.describe(target="Ник игрока, можно вставить steam_id", reason="Причина кика")
+@discord.app_commands.describe(target="Ник игрока, можно вставить steam_id", reason="Причина кика", server="Сервер (по умолчанию - основной)")
 @discord.app_commands.autocomplete(target=auto.players_online)
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)
-async def cmd_kick(interaction: discord.Interaction, target: str, reason: str=""):  
+async def cmd_kick(interaction: discord.Interaction, target: str, reason: str="", server: str=None):  
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CS_KICK, {
     Param.Interaction: interaction,
     "target": target,
-    "reason": reason
+    "reason": reason,
+    "server": server
   })
 
 # -- /ban
@@ -105,18 +113,21 @@ async def cmd_kick(interaction: discord.Interaction, target: str, reason: str=""
 @discord.app_commands.describe(
   target="Ник игрока", 
   minutes="Минут бана(0 - перманент)", 
-  reason="Причина бана")
+  reason="Причина бана",
+  server="Сервер (по умолчанию - основной)")
 @discord.app_commands.autocomplete(target=auto.ban_online)
 @discord.app_commands.autocomplete(minutes=auto.ban_minutes)
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)  # Проверка прав пользователя
-async def cmd_ban(interaction: discord.Interaction, target: str, minutes: int, reason: str=""):
+async def cmd_ban(interaction: discord.Interaction, target: str, minutes: int, reason: str="", server: str=None):
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CS_BAN, {
     Param.Interaction: interaction,
     "target": target,
     "minutes": minutes,
-    "reason": reason
+    "reason": reason,
+    "server": server
   })
 
 # -- /ban_offline
@@ -124,55 +135,65 @@ async def cmd_ban(interaction: discord.Interaction, target: str, minutes: int, r
 @discord.app_commands.describe(
   target="steam_id игрока", 
   minutes="Минут бана(0 - перманент)", 
-  reason="Причина бана")
+  reason="Причина бана",
+  server="Сервер (по умолчанию - основной)")
 @discord.app_commands.autocomplete(target=auto.ban_offline)
 @discord.app_commands.autocomplete(minutes=auto.ban_minutes)
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)  # Проверка прав пользователя
-async def cmd_offline_ban(interaction: discord.Interaction, target: str, minutes: int, reason: str=""):
+async def cmd_offline_ban(interaction: discord.Interaction, target: str, minutes: int, reason: str="", server: str=None):
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CS_BAN_OFFLINE, {
     Param.Interaction: interaction,
     "target": target,
     "minutes": minutes,
-    "reason": reason
+    "reason": reason,
+    "server": server
   })
 
 # -- /unban
 @bot.tree.command(name="unban", description="Разбанивает игрока")
-@discord.app_commands.describe(target="steam_id игрока")
+@discord.app_commands.describe(target="steam_id игрока", server="Сервер (по умолчанию - основной)")
 @discord.app_commands.autocomplete(target=auto.unban)
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)  # Проверка прав пользователя
-async def cmd_unban(interaction: discord.Interaction, target: str):
+async def cmd_unban(interaction: discord.Interaction, target: str, server: str=None):
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CS_UNBAN, {
     Param.Interaction: interaction,
     "target": target,
+    "server": server
   })
 
 # -- /sync_maps
 @bot.tree.command(name="sync_maps", 
                   description="Синхронизирует список карт между MySQL, redis и сервером(MySQL главный)")
+@discord.app_commands.describe(server="Сервер (по умолчанию - все серверы)")
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)  
-async def cmd_sync_maps(interaction: discord.Interaction):
+async def cmd_sync_maps(interaction: discord.Interaction, server: str=None):
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CS_SYNC_MAPS, {
     Param.Interaction: interaction,
+    "server": server
   })
 
 # -- /map_change
 @bot.tree.command(name="map_change", description="Меняет карту")
-@discord.app_commands.describe(map="Название карты")
+@discord.app_commands.describe(map="Название карты", server="Сервер (по умолчанию - основной)")
 @discord.app_commands.autocomplete(map=auto.maps_active)
+@discord.app_commands.autocomplete(server=auto.cs_servers)
 @commands.has_permissions(manage_messages=True)
-async def cmd_map_change(interaction: discord.Interaction, map: str):
+async def cmd_map_change(interaction: discord.Interaction, map: str, server: str=None):
   await interaction.response.defer(thinking=True, ephemeral=True)
 
   await observer.notify(Event.BC_CS_MAP_CHANGE, {
     Param.Interaction: interaction,
-    "map": map
+    "map": map,
+    "server": server
   })
 
 # -- /map_add
@@ -34,6 +34,71 @@ CS_RECONNECT_INTERVAL = 10
 CS_HOST = '127.0.0.1'  # Локальный хост
 CS_RCON_PASSWORD = '12345'  # Пароль для удаленного управления
 
+#-------------------------------------------------------------------
+# New in 0.3.2
+# Таймаут одного RCON-запроса в секундах
+CS_RCON_TIMEOUT = 3
+# Максимум ожидающих RCON-команд в каждой приоритетной полосе (админ/статус/чат)
+CS_COMMAND_QUEUE_SIZE = 64
+# Максимальная пауза между попытками подключения к недоступному серверу CS в секундах.
+# Пауза начинается с CS_RECONNECT_INTERVAL и удваивается после каждой неудачи.
+CS_RECONNECT_MAX_INTERVAL = 300
+# Строить сообщение статуса из прямых запросов A2S_INFO/A2S_PLAYER к серверу CS.
+# Плагин (ultrahc_ds_get_info) по-прежнему опрашивается: пока его вебхук приходит,
+# используется его сообщение (с командами и счетом), A2S - когда плагин молчит.
+CS_STATUS_A2S = False
+# WEB_ALLOWED_IPS принимает и сети: ['127.0.0.1', '10.0.0.0/8', '::1', '2001:db8::/32'].
+# Адреса обратных прокси (nginx и т.п.), от которых адрес клиента берется из X-Forwarded-For
+WEB_TRUSTED_PROXIES = []
+# Сколько запросов в секунду веб-сервер принимает с одного IP-адреса (0 - без ограничения);
+# сверх этого - ответ 429. WEB_RATE_BURST - сколько запросов подряд разрешено сверх этой частоты.
+WEB_RATE_LIMIT = 50
+WEB_RATE_BURST = 200
+# Максимум событий в одном запросе к /webhook/batch (JSON-массив или NDJSON)
+WEBHOOK_BATCH_MAX = 500
+# Очередь приема вебхуков: /webhook и /webhook/batch отвечают 202 сразу после проверки события,
+# а обработка (поиск игрока, Discord) идет в фоне. Сообщения одного игрока обрабатываются по порядку.
+# Сколько вебхуков обрабатывается одновременно
+WEBHOOK_INGEST_WORKERS = 4
+# Сколько принятых вебхуков может ждать обработки; сверх этого - ответ 429
+WEBHOOK_INGEST_QUEUE_SIZE = 1000
+# Если самый старый вебхук ждет дольше этого числа секунд - ответ 503 (0 - не ограничивать)
+WEBHOOK_INGEST_MAX_WAIT = 30
+# Канал WebSocket /ws (заголовок Authorization = API_KEY): события в обе стороны по одному соединению.
+# Интервал пингов в секундах; соединение без ответа на пинг закрывается
+WS_CHANNEL_HEARTBEAT = 15
+# Сколько секунд сессия канала ждет переподключения клиента, чтобы дослать неподтвержденные события
+WS_CHANNEL_RESUME_TIMEOUT = 60
+# Сколько неподтвержденных событий для сервера CS хранит сессия
+WS_CHANNEL_BUFFER = 1000
+# Сколько событий чата (из CS и из Discord) может ждать обработки.
+# При всплеске отправитель ждет места в очереди; статус сервера хранит только последний снимок.
+EVENT_QUEUE_SIZE = 256
+# Вызов подписчика события дольше этого числа секунд пишется в лог как медленный (0 - не писать).
+# Время и ошибки всех подписчиков доступны в /observer/subscribers.
+OBSERVER_SLOW_HANDLER = 0.5
+# Передача событий между процессами бота через Redis Streams (REDIS_HOST/REDIS_PORT).
+# Перечисленные события публикуются в Redis, и подписчиков вызывает тот процесс, который их прочитает.
+# Аргументы событий должны сериализоваться в JSON: события команд (bc_*) несут discord.Interaction
+# и обрабатываются на месте. Пример: OBSERVER_STREAM_EVENTS = ['wbh_message', 'wbh_info']
+OBSERVER_STREAM_EVENTS = []
+# Группа потребителей: процессы одной группы делят события между собой, процессы разных групп получают все
+OBSERVER_STREAM_GROUP = 'dbot'
+# Читать события из Redis в этом процессе (False - только публиковать, например в процессе приема вебхуков)
+OBSERVER_STREAM_CONSUME = True
+# Записывать все события Observer в этот файл (gzip, одна JSON-строка на событие) для воспроизведения
+# через benchmarks/replay_events.py. Объекты Discord не записываются. Пусто - не записывать.
+OBSERVER_RECORD_FILE = ''
+# Сколько секунд копить сообщения из Discord перед отправкой на сервер одним пакетом
+CS_CHAT_RELAY_DELAY = 0.1
+# Несколько серверов CS для одного бота. Первый сервер - основной (статус, команды без выбора сервера).
+# Если список пуст, используется один сервер CS_HOST / CS_RCON_PASSWORD.
+# Пример: CS_SERVERS = [{'name': 'public', 'host': '10.0.0.1', 'port': 27015, 'password': '12345'},
+#                       {'name': 'mix', 'host': '10.0.0.2', 'port': 27016, 'password': '12345'}]
+# Для серверов на движке Source добавьте 'protocol': 'source' (RCON по TCP, команды конвейеризуются).
+CS_SERVERS = []
+#-------------------------------------------------------------------
+
 # IMPORTANT: For stable connections with a connection pool,
 # ensure your MySQL server's `wait_timeout` and `interactive_timeout` variables
 # are set to a sufficiently high value (e.g., several hours) to prevent
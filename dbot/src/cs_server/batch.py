@@ -0,0 +1,114 @@
+from typing import List, Optional, Tuple
+import os
+
+# HLDS разбирает rcon-запрос в буфере на 1024 байта вместе с префиксом
+# `rcon <challenge> <пароль> ` и завершающим нулем (см. command_budget())
+rconBufferSize = 1024
+# Challenge - 32-битное число без знака: не больше 10 цифр
+maxChallengeLength = 10
+
+# Размер пакета, когда префикс неизвестен (Source RCON)
+maxBatchSize = 1000
+
+# SECTION Batch utilities
+
+# -- new_marker_prefix()
+def new_marker_prefix() -> str:
+  """Уникальный префикс маркеров для одного пакета команд."""
+  return f"--dbot-{os.urandom(3).hex()}-"
+
+# -- command_budget()
+def command_budget(password: str, challenge: Optional[str] = None) -> int:
+  """
+  Сколько байт текста команды поместится в буфер rcon HLDS.
+
+  rconBufferSize - len("rcon ") - len(challenge) - len(" <пароль> ") - 1 (нуль).
+  Пока challenge не получен, берется самый длинный (maxChallengeLength цифр).
+
+  :param password: Пароль RCON.
+  :param challenge: Текущий challenge или None.
+  """
+  challenge_size = len(challenge) if challenge else maxChallengeLength
+  prefix_size = len("rcon ") + challenge_size + len(password.encode()) + 2
+  return rconBufferSize - prefix_size - 1
+
+# -- marker()
+def marker(marker_prefix: str, index: int) -> str:
+  """Маркер, печатаемый сервером после команды с номером index."""
+  return f"{marker_prefix}{index}-"
+
+# -- pack_commands()
+def pack_commands(commands: List[str],
+                  max_size: int = maxBatchSize,
+                  marker_prefix: Optional[str] = None) -> List[Tuple[str, List[int]]]:
+  """
+  Упаковывает команды в как можно меньшее число строк, разделенных ';'.
+
+  Если указан marker_prefix, после каждой команды добавляется
+  `echo <маркер>` (см. marker()), чтобы потом разрезать общий ответ
+  по командам (см. split_replies()).
+
+  Команда с непарной кавычкой уходит отдельным пакетом: иначе ';'
+  после нее окажется внутри кавычек и склеит ее со следующей.
+
+  :param commands: Команды для выполнения.
+  :param max_size: Максимальный размер одной строки в байтах.
+  :param marker_prefix: Префикс маркеров-разделителей или None.
+  :return: Список пар (строка для отправки, индексы входящих в нее команд).
+  """
+  batches: List[Tuple[str, List[int]]] = []
+  parts: List[str] = []
+  indexes: List[int] = []
+  size = 0
+
+  def flush() -> None:
+    nonlocal parts, indexes, size
+    if parts:
+      batches.append((";".join(parts), indexes))
+    parts, indexes, size = [], [], 0
+
+  for index, command in enumerate(commands):
+    part = command if marker_prefix is None else f"{command};echo {marker(marker_prefix, index)}"
+    part_size = len(part.encode())
+
+    if command.count('"') % 2:
+      flush()
+      batches.append((command, [index]))
+      continue
+
+    if parts and size + 1 + part_size > max_size:
+      flush()
+
+    parts.append(part)
+    indexes.append(index)
+    size += part_size + (1 if size else 0)
+
+  flush()
+  return batches
+
+# -- split_replies()
+def split_replies(response: str, indexes: List[int], marker_prefix: str) -> List[Optional[str]]:
+  """
+  Разрезает общий ответ пакета на ответы отдельных команд.
+
+  :param response: Ответ сервера на строку из pack_commands().
+  :param indexes: Индексы команд в пакете.
+  :param marker_prefix: Префикс маркеров, использованный при упаковке.
+  :return: Ответы в порядке indexes; None для команд, чей маркер не найден.
+  """
+  replies: List[Optional[str]] = []
+  rest = response
+
+  for index in indexes:
+    head, found, tail = rest.partition(marker(marker_prefix, index))
+    if not found:
+      # Команда, ушедшая отдельным пакетом без маркера, получает весь ответ
+      replies.append(rest.rstrip("\n") if len(indexes) == 1 else None)
+      continue
+
+    replies.append(head.rstrip("\n"))
+    rest = tail.lstrip("\n")
+
+  return replies
+
+# !SECTION
@@ -0,0 +1,123 @@
+from enum import Enum
+from typing import Callable
+import random
+import time
+
+# SECTION CircuitState
+class CircuitState(Enum):
+  """Состояние предохранителя."""
+  CLOSED = "closed"
+  OPEN = "open"
+  HALF_OPEN = "half_open"
+
+# !SECTION
+
+# SECTION Class CircuitBreaker
+class CircuitBreaker:
+  """
+  Предохранитель для соединения с сервером.
+
+  - CLOSED: запросы идут как обычно; после failure_threshold ошибок подряд
+    цепь размыкается.
+  - OPEN: запросы отклоняются сразу, без обращения к сети, до истечения
+    паузы. Пауза растет экспоненциально с каждым размыканием подряд
+    (base_delay * 2^n, не больше max_delay) и случайно укорачивается
+    на долю до jitter, чтобы несколько серверов не переподключались в такт.
+  - HALF_OPEN: пауза истекла, пропускается одна пробная попытка.
+    Успех замыкает цепь, ошибка снова размыкает ее с большей паузой.
+  """
+  # -- __init__()
+  def __init__(self,
+               failure_threshold: int = 3,
+               base_delay: float = 10.0,
+               max_delay: float = 300.0,
+               jitter: float = 0.5,
+               clock: Callable[[], float] = time.monotonic) -> None:
+    """
+    :param failure_threshold: Сколько ошибок подряд размыкают замкнутую цепь.
+    :param base_delay: Пауза после первого размыкания в секундах.
+    :param max_delay: Максимальная пауза в секундах.
+    :param jitter: Доля паузы (0..1), на которую она может быть случайно укорочена.
+    :param clock: Источник времени (для тестов).
+    """
+    self.failure_threshold: int = failure_threshold
+    self.base_delay: float = base_delay
+    self.max_delay: float = max_delay
+    self.jitter: float = jitter
+    self._clock: Callable[[], float] = clock
+
+    self._state: CircuitState = CircuitState.CLOSED
+    self.failures: int = 0
+    self.trips: int = 0
+    self.opened_until: float = 0.0
+
+  # -- state
+  @property
+  def state(self) -> CircuitState:
+    """Текущее состояние; разомкнутая цепь с истекшей паузой считается полуоткрытой."""
+    if self._state is CircuitState.OPEN and self._clock() >= self.opened_until:
+      return CircuitState.HALF_OPEN
+    return self._state
+
+  # -- is_open
+  @property
+  def is_open(self) -> bool:
+    """Отклоняются ли сейчас запросы без обращения к сети."""
+    return self._state is CircuitState.OPEN and self._clock() < self.opened_until
+
+  # -- retry_in
+  @property
+  def retry_in(self) -> float:
+    """Сколько секунд осталось до пробной попытки (0, если цепь не разомкнута)."""
+    if self._state is not CircuitState.OPEN:
+      return 0.0
+    return max(0.0, self.opened_until - self._clock())
+
+  # -- allow()
+  def allow(self) -> bool:
+    """
+    Можно ли выполнить запрос.
+
+    После истечения паузы пропускает ровно одну пробную попытку
+    и переводит цепь в HALF_OPEN до ее результата.
+    """
+    if self._state is CircuitState.CLOSED:
+      return True
+
+    if self._state is CircuitState.OPEN and self._clock() >= self.opened_until:
+      self._state = CircuitState.HALF_OPEN
+      return True
+
+    return False
+
+  # -- record_success()
+  def record_success(self) -> None:
+    """Учитывает успешный запрос: цепь замыкается, пауза сбрасывается."""
+    self._state = CircuitState.CLOSED
+    self.failures = 0
+    self.trips = 0
+
+  # -- record_failure()
+  def record_failure(self) -> None:
+    """Учитывает ошибку: размыкает цепь после пробной попытки или failure_threshold ошибок подряд."""
+    self.failures += 1
+    if self._state is CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+      self.trip()
+
+  # -- trip()
+  def trip(self) -> None:
+    """Размыкает цепь сразу (например, если соединение потеряно)."""
+    delay = min(self.max_delay, self.base_delay * 2 ** self.trips)
+    delay *= 1 - self.jitter * random.random()
+
+    self.trips += 1
+    self._state = CircuitState.OPEN
+    self.opened_until = self._clock() + delay
+
+  # -- reset()
+  def reset(self) -> None:
+    """Замыкает цепь без ожидания (ручное переподключение)."""
+    self.record_success()
+    self.opened_until = 0.0
+
+# !SECTION
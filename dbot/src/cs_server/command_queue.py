@@ -0,0 +1,160 @@
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+
+# SECTION Исключения CommandQueue
+# -- QueueFull
+class QueueFull(Exception):
+  """Исключение для переполненной очереди команд."""
+  pass
+
+# !SECTION
+
+# SECTION CommandPriority
+class CommandPriority(IntEnum):
+  """Приоритет команды: чем меньше значение, тем раньше она будет выполнена."""
+  ADMIN = 0
+  NORMAL = 1
+  CHAT = 2
+
+# !SECTION
+
+# SECTION Class CommandQueue
+class CommandQueue:
+  """
+  Очередь RCON-команд с приоритетными полосами.
+
+  GoldSrc не помечает ответы номером запроса, поэтому все обмены с сервером
+  идут строго по одному: единственный обработчик забирает задачи сначала
+  из полосы ADMIN, затем NORMAL, затем CHAT. Каждая полоса ограничена
+  по размеру; при переполнении задача отклоняется с QueueFull.
+
+  Протоколы, которые сопоставляют ответы запросам по id (Source RCON),
+  могут выполнять несколько задач одновременно: concurrency обработчиков
+  забирают задачи в том же порядке приоритетов.
+  """
+  # -- __init__()
+  def __init__(self, max_size: int = 64, concurrency: int = 1) -> None:
+    """
+    :param max_size: Максимальное число ожидающих задач в одной полосе.
+    :param concurrency: Сколько задач выполняется одновременно (по умолчанию 1).
+    """
+    self.max_size: int = max_size
+    self.concurrency: int = max(1, concurrency)
+
+    self._lanes: Dict[CommandPriority, Deque[Tuple[Callable[[], Awaitable[Any]], asyncio.Future]]] = {
+      priority: deque() for priority in CommandPriority
+    }
+    self._ready: Optional[asyncio.Event] = None
+    self._workers: List[asyncio.Task] = []
+
+    self.submitted: Dict[CommandPriority, int] = {priority: 0 for priority in CommandPriority}
+    self.rejected: Dict[CommandPriority, int] = {priority: 0 for priority in CommandPriority}
+
+  # -- depth()
+  def depth(self, priority: Optional[CommandPriority] = None) -> int:
+    """
+    Количество ожидающих задач.
+
+    :param priority: Полоса; если не указана - сумма по всем полосам.
+    """
+    if priority is not None:
+      return len(self._lanes[priority])
+    return sum(len(lane) for lane in self._lanes.values())
+
+  # -- stats()
+  def stats(self) -> Dict[str, Dict[str, int]]:
+    """Снимок метрик очереди по полосам."""
+    return {
+      priority.name.lower(): {
+        "depth": len(self._lanes[priority]),
+        "submitted": self.submitted[priority],
+        "rejected": self.rejected[priority],
+      }
+      for priority in CommandPriority
+    }
+
+  # -- submit()
+  async def submit(self, job: Callable[[], Awaitable[Any]], priority: CommandPriority = CommandPriority.NORMAL) -> Any:
+    """
+    Ставит задачу в очередь и ждет ее результата.
+
+    :param job: Функция без аргументов, возвращающая корутину обмена с сервером.
+    :param priority: Приоритет задачи.
+    :return: Результат задачи.
+    :raises QueueFull: Если полоса заполнена.
+    """
+    lane = self._lanes[priority]
+    if len(lane) >= self.max_size:
+      self.rejected[priority] += 1
+      raise QueueFull(f"Очередь команд ({priority.name}) переполнена: {len(lane)}/{self.max_size}")
+
+    self._ensure_worker()
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    lane.append((job, future))
+    self.submitted[priority] += 1
+    self._ready.set()
+
+    return await future
+
+  # -- close()
+  def close(self) -> None:
+    """Останавливает обработчики и отменяет ожидающие задачи."""
+    for worker in self._workers:
+      worker.cancel()
+    self._workers = []
+
+    for lane in self._lanes.values():
+      while lane:
+        _, future = lane.popleft()
+        future.cancel()
+
+  # -- _ensure_worker()
+  def _ensure_worker(self) -> None:
+    if self._workers and not any(worker.done() for worker in self._workers):
+      return
+
+    for worker in self._workers:
+      worker.cancel()
+
+    self._ready = asyncio.Event()
+    self._workers = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+  # -- _next()
+  def _next(self) -> Optional[Tuple[Callable[[], Awaitable[Any]], asyncio.Future]]:
+    for priority in CommandPriority:
+      lane = self._lanes[priority]
+      if lane:
+        return lane.popleft()
+    return None
+
+  # -- _run()
+  async def _run(self) -> None:
+    while True:
+      await self._ready.wait()
+
+      item = self._next()
+      if item is None:
+        self._ready.clear()
+        continue
+
+      job, future = item
+      # Вызывающий уже перестал ждать (отмена/таймаут) - не тратим обмен с сервером
+      if future.done():
+        continue
+
+      try:
+        result = await job()
+      except asyncio.CancelledError:
+        future.cancel()
+        raise
+      except Exception as e:
+        if not future.done():
+          future.set_exception(e)
+      else:
+        if not future.done():
+          future.set_result(result)
+
+# !SECTION
@@ -1,25 +1,116 @@
-from observer.observer_client import logger, observer, Event, Param, Color, nsroute
-from cs_server.csrcon import CSRCON, ConnectionError as CSConnectionError, CommandExecutionError
+from observer.observer_client import logger, observer, Event, Param, Color, TextStyle, nsroute
+from cs_server.csrcon import CSRCON, BatchError, CircuitOpen, CommandExecutionError
+from rehlds.a2s import A2SError, A2SPlayer, ServerInfo
+from cs_server.command_queue import CommandPriority
+from cs_server.csrcon_pool import CSRCONPool, UnknownServer
 
 import discord
+import asyncio
+import functools
+import time
+from collections import deque
+from datetime import datetime
+from typing import List
 
 import config
 
 # -- init
-cs_server: CSRCON = CSRCON(host=config.CS_HOST,
-                           password=config.CS_RCON_PASSWORD)
+cs_pool: CSRCONPool = CSRCONPool(servers=config.CS_SERVERS or [{'name': 'main',
+                                                                 'host': config.CS_HOST,
+                                                                 'password': config.CS_RCON_PASSWORD}],
+                                 timeout=config.CS_RCON_TIMEOUT,
+                                 queue_size=config.CS_COMMAND_QUEUE_SIZE,
+                                 reconnect_interval=config.CS_RECONNECT_INTERVAL,
+                                 max_reconnect_interval=config.CS_RECONNECT_MAX_INTERVAL)
+
+# Основной сервер: по нему ведется статус и к нему уходят команды без явного сервера
+cs_server: CSRCON = cs_pool.get()
+
+# -- send_over_channel
+async def send_over_channel(name: str, commands: List[str]) -> bool:
+  # Канал WebSocket сервера (webserver.ws_client); без подключенного клиента - False, команды идут по RCON
+  return bool(await nsroute.call_route("/channel/command", name=name, commands=commands))
+
+# -- use_channels
+def use_channels() -> None:
+  """Команды без ответа (чат) уходят серверам через их канал WebSocket, пока он подключен."""
+  for name in cs_pool.names:
+    cs_pool.get(name).channel = functools.partial(send_over_channel, name)
+
+use_channels()
+
+# Перечитать список карт на сервере (команда плагина)
+syncMapsCommand = "ultrahc_ds_reload_map_list"
+
+# Буфер сообщений из Discord: всплеск сообщений уходит на сервер одним-двумя пакетами
+chat_relay_buffer: deque = deque()
+chat_relay_task: asyncio.Task = None
+
+# Когда плагин последний раз прислал статус через вебхук (time.monotonic())
+last_plugin_info: float = None
 
 # SECTION Utlities
 
+# -- get_server
+def get_server(data) -> CSRCON:
+  """Сервер, выбранный в команде (data['server']), или основной."""
+  return cs_pool.get(data.get('server') if data else None)
+
+# -- format_a2s_message
+def format_a2s_message(info: ServerInfo, players: List[A2SPlayer]) -> str:
+  formatted_info = []
+  formatted_info.append(f"Время: {datetime.now().strftime('%H:%M')}")
+  formatted_info.append(f"Название карты: {info.map}")
+  formatted_info.append(f"Количество игроков: {info.players} / {info.max_players}")
+
+  # A2S не сообщает команды и смерти: один общий список по счету
+  if players:
+    formatted_info.append(f"\n{TextStyle.Bold}{Color.White}Игроки:{TextStyle.Default}")
+    formatted_info.append("\n".join(f"\t{player.name} - {player.score}"
+                                    for player in sorted(players, key=lambda player: -player.score)))
+
+  return "\n".join(formatted_info)
+
+# -- plugin_info_is_fresh
+def plugin_info_is_fresh() -> bool:
+  # Плагин отвечает на каждый опрос статуса; два пропуска подряд - считаем, что он молчит
+  return last_plugin_info is not None and time.monotonic() - last_plugin_info < config.STATUS_INTERVAL * 2
+
+# -- log_connect_results
+def log_connect_results(results: dict) -> None:
+  for name, err in results.items():
+    if err is None:
+      logger.info(f"CS Server [{name}]: Успешно подключен")
+    # Пока сервер лежит, пишем в лог только первую неудачу, а не каждую попытку
+    elif cs_pool.health[name].failures == 1:
+      logger.error(f"CS Server [{name}]: {str(err).rstrip('.')}. Повтор через {cs_pool.get(name).breaker.retry_in:.0f} с")
+
 # -- @require_connection
 def require_connection(func) -> callable:
   
+  @functools.wraps(func)
   async def wrapper(*args, **kwargs) -> callable:
-    if cs_server.connected:
+    data = args[0] if args else kwargs.get('data')
+    interaction: discord.Interaction = data.get(Param.Interaction) if data else None
+
+    try:
+      server = get_server(data)
+    except UnknownServer as err:
+      if interaction:
+        await interaction.followup.send(str(err), ephemeral=True)
+      return
+
+    if server.breaker.is_open:
+      # Сервер недавно был недоступен: отвечаем сразу, без сети и без записи в лог
+      if interaction:
+        await interaction.followup.send(f'Сервер недоступен, повтор подключения через {server.breaker.retry_in:.0f} с', ephemeral=True)
+      return
+
+    if server.connected:
       return await func(*args, **kwargs)
 
-    if 'data' in kwargs and kwargs['data']:
-      await kwargs['data'][Param.Interaction].followup.send('Нет подключения к серверу', ephemeral=True)
+    if interaction:
+      await interaction.followup.send('Нет подключения к серверу', ephemeral=True)
     
     logger.error("CS Server: Нет связи с CS")
   
@@ -31,42 +122,115 @@ def require_connection(func) -> callable:
 # -- get_status 
 @observer.subscribe(Event.BT_CS_Status)
 async def get_status():
+  # Остальные серверы пула переподключаются по своему расписанию
+  log_connect_results(await cs_pool.connect_due())
+
+  if config.CS_STATUS_A2S and not plugin_info_is_fresh():
+    await send_a2s_status()
+
   if not cs_server.connected:
     return
   
   try:
     await cs_server.exec("ultrahc_ds_get_info")
   except CommandExecutionError as err:
+    # Единичная потеря пакета - не повод переподключаться: ждем, пока разомкнется цепь
+    if not cs_server.breaker.is_open:
+      return
+
     logger.error(f"CS Server: {err}")
-    await cs_server.disconnect()
+    await cs_pool.disconnect(cs_pool.default)
     await observer.notify(Event.CS_DISCONNECTED)
 
+# -- send_a2s_status
+async def send_a2s_status():
+  try:
+    info, players = await asyncio.gather(cs_server.a2s.info(), cs_server.a2s.players())
+  except A2SError as err:
+    logger.error(f"CS Server: A2S: {err}")
+    return
+
+  await observer.notify(Event.WBH_INFO, {
+    "info_message": format_a2s_message(info, players),
+    "current_players": [{"name": player.name} for player in players],
+    "source": "a2s"
+  })
+
+# -- ev_plugin_info
+@observer.subscribe(Event.WBH_INFO)
+async def ev_plugin_info(data):
+  global last_plugin_info
+
+  if data.get("source") != "a2s":
+    last_plugin_info = time.monotonic()
+
 # -- on_ready connect
 @observer.subscribe(Event.BE_READY)
 @nsroute.create_route("/connect_to_cs")
 async def connect():
-  try:
-    await cs_server.connect_to_server()
-    logger.info(f"CS Server: Успешно подключен")
-    
+  results = await cs_pool.connect_due()
+  log_connect_results(results)
+
+  if cs_pool.default in results and cs_server.connected:
     await observer.notify(Event.CS_CONNECTED)
 
-  except CSConnectionError as err:
+# -- (route) cs_servers
+@nsroute.create_route("/cs/servers")
+async def route_cs_servers() -> list:
+  return cs_pool.names
+
+# -- (route) cs_stats
+@nsroute.create_route("/cs/stats")
+async def route_cs_stats() -> dict:
+  return cs_pool.stats()
+
+# -- (route) cs_players
+@nsroute.create_route("/cs/players")
+async def route_cs_players(server: str = None) -> list:
+  # None - таблицу игроков получить не удалось, пусть автодополнение берет данные из вебхука
+  try:
+    csrcon = cs_pool.get(server)
+    if not csrcon.connected:
+      # Без RCON список игроков можно получить и запросом A2S_PLAYER
+      return [player.name for player in await csrcon.a2s.players()] if config.CS_STATUS_A2S else None
+    return (await csrcon.get_players()).names()
+  except (UnknownServer, CommandExecutionError, A2SError) as err:
     logger.error(f"CS Server: {err}")
+    return None
 
 @observer.subscribe(Event.BE_MESSAGE)
-@require_connection
 async def send_message(data):
+  global chat_relay_task
   message: discord.Message = data[Param.Message]
 
   send_msg = "\"" + message.author.display_name + "\"" + " " + "\"" + message.content + "\""
   command = f"ultrahc_ds_send_msg {send_msg}"
 
-  try:
-    await cs_server.exec(command)
-  except CommandExecutionError as err:
-    logger.error(f"CS Server: {err}")
+  chat_relay_buffer.append(command)
+
+  if chat_relay_task is None or chat_relay_task.done():
+    chat_relay_task = asyncio.create_task(flush_chat_relay())
+
+# -- flush_chat_relay
+async def flush_chat_relay():
+  # Сообщения, пришедшие во время отправки, уходят следующим пакетом той же задачей
+  while chat_relay_buffer:
+    # Даем накопиться всплеску сообщений
+    await asyncio.sleep(config.CS_CHAT_RELAY_DELAY)
+
+    commands = list(chat_relay_buffer)
+    chat_relay_buffer.clear()
 
+    # Чат Discord общий для всех серверов пула
+    results = await cs_pool.fan_out(lambda server: server.execute_many(commands, CommandPriority.CHAT, split=False))
+
+    for name, result in results.items():
+      # Цепь разомкнулась во время отправки: о недоступности сервера сообщит переподключение
+      cause = result.__cause__ if isinstance(result, BatchError) else result
+      if isinstance(cause, CircuitOpen):
+        logger.info(f"CS Server [{name}]: Чат не отправлен: {result}")
+      elif isinstance(result, Exception):
+        logger.error(f"CS Server [{name}]: {result}")
 
 
 # !SECTION
@@ -75,16 +239,27 @@ async def send_message(data):
 # -- connect_to_cs
 @observer.subscribe(Event.BC_CONNECT_TO_CS)
 async def cmd_connect_to_cs(data):
-  await cs_server.disconnect()
   interaction: discord.Interaction = data[Param.Interaction]
+  names: list = [data['server']] if data.get('server') else cs_pool.names
 
-  try:
-    await cs_server.connect_to_server()
-    logger.info(f"CS Server: Успешно подключен")
+  if any(name not in cs_pool.servers for name in names):
+    await interaction.followup.send(content=f"Неизвестный сервер: {data['server']}", ephemeral=True)
+    return
+
+  for name in names:
+    await cs_pool.get(name).disconnect()
+
+  results = dict(zip(names, await asyncio.gather(*(cs_pool.connect(name, force=True) for name in names))))
+  log_connect_results(results)
+
+  if cs_pool.default in results and cs_server.connected:
+    await observer.notify(Event.CS_CONNECTED)
+
+  failed: list = [name for name, err in results.items() if err is not None]
+  if not failed:
     await interaction.followup.send(content="Успешно подключено!", ephemeral=True)
-  except CSConnectionError as err:
-    logger.error(f"CS Server: {err}")
-    await interaction.followup.send(content="Невозможно подключиться!", ephemeral=True)
+  else:
+    await interaction.followup.send(content=f"Невозможно подключиться: {', '.join(failed)}", ephemeral=True)
 
 # -- rcon
 @observer.subscribe(Event.BC_CS_RCON)
@@ -94,7 +269,8 @@ async def cmd_rcon(data):
   command: str = data["command"]
   
   try:
-    await cs_server.exec(command)
+    # Команды чтения отдаются из кеша, записи сбрасывают его
+    await get_server(data).query(command, CommandPriority.ADMIN)
     logger.info(f"CS Server: выполнена команда: {command}")
     await interaction.followup.send(content="Команда выполнена!", ephemeral=True)
   except CommandExecutionError as err:
@@ -110,10 +286,11 @@ async def cmd_kick(data):
   target: str = data['target']
   reason: str = data['reason']
 
-  command = f"ultrahc_ds_kick_player \"{target}\" \"{reason}\""
+  server: CSRCON = get_server(data)
+  command = f"ultrahc_ds_kick_player \"{await server.resolve_target(target)}\" \"{reason}\""
   
   try:
-    await cs_server.exec(command)
+    await server.exec(command, CommandPriority.ADMIN)
     logger.info(f"CS Server: {caller_name} кикнул игрока {target} по причине {reason}")
 
     snd = f"```ansi\n{Color.Blue}{caller_name}{Color.Default} кикнул игрока: {Color.Blue}{target}{Color.Default} по причине: {reason}```"
@@ -133,10 +310,11 @@ async def cmd_ban(data):
   minutes: int = data['minutes']
   reason: str = data['reason']
 
-  command = f"amx_ban \"{target}\" \"{minutes}\" \"{reason}\""
+  server: CSRCON = get_server(data)
+  command = f"amx_ban \"{await server.resolve_target(target)}\" \"{minutes}\" \"{reason}\""
   
   try:
-    await cs_server.exec(command)
+    await server.exec(command, CommandPriority.ADMIN)
     logger.info(f"CS Server: {caller_name} забанил игрока {target} на {minutes} минут по причине {reason}")
 
     snd = f"```ansi\n{Color.Blue}{caller_name}{Color.Default} забанил игрока: {Color.Blue}{target}{Color.Default} на {minutes} минут по причине: {reason}```"
@@ -159,7 +337,7 @@ async def cmd_ban_offline(data):
   command = f"amx_addban \"{target}\" \"{minutes}\" \"{reason}\""
   
   try:
-    await cs_server.exec(command)
+    await get_server(data).exec(command, CommandPriority.ADMIN)
     logger.info(f"CS Server: {caller_name} забанил игрока {target} на {minutes} минут по причине {reason}")
 
     snd = f"```ansi\n{Color.Blue}{caller_name}{Color.Default} забанил игрока: {Color.Blue}{target}{Color.Default} на {minutes} минут по причине: {reason}```"
@@ -180,7 +358,7 @@ async def cmd_unban(data):
   command = f"amx_unban \"{target}\""
   
   try:
-    await cs_server.exec(command)
+    await get_server(data).exec(command, CommandPriority.ADMIN)
     logger.info(f"CS Server: {caller_name} разбанил игрока {target}")
 
     snd = f"```ansi\n{Color.Blue}{caller_name}{Color.Default} разбанил игрока: {Color.Blue}{target}{Color.Default}```"
@@ -192,21 +370,44 @@ async def cmd_unban(data):
 
 # -- sync_maps
 @observer.subscribe(Event.BC_CS_SYNC_MAPS)
-@require_connection
 async def cmd_sync_maps(data):
+  # Проверка подключения - только для явного сервера: пока основной сервер лежит,
+  # синхронизация по всему пулу все равно доходит до остальных
+  if data.get('server'):
+    await sync_maps_on_server(data)
+    return
+
+  results = await cs_pool.broadcast(syncMapsCommand, CommandPriority.ADMIN)
+  await report_sync_maps(data, results, cs_pool.names)
+
+# -- sync_maps_on_server
+@require_connection
+async def sync_maps_on_server(data):
+  try:
+    results = {data['server']: await get_server(data).exec(syncMapsCommand, CommandPriority.ADMIN)}
+  except CommandExecutionError as err:
+    results = {data['server']: err}
+
+  await report_sync_maps(data, results, [data['server']])
+
+# -- report_sync_maps
+async def report_sync_maps(data, results: dict, names: List[str]):
   interaction: discord.Interaction = data[Param.Interaction]
   caller_name: str = interaction.user.display_name
 
-  command = "ultrahc_ds_reload_map_list"
-  
-  try:
-    await cs_server.exec(command)
+  failed: list = []
+  for name in names:
+    # broadcast() пропускает отключенные серверы и серверы с разомкнутой цепью
+    result = results.get(name, CommandExecutionError("Нет подключения к серверу"))
+    if isinstance(result, Exception):
+      logger.error(f"CS Server [{name}]: {result}")
+      failed.append(name)
 
+  if not failed:
     logger.info(f"CS Server: {caller_name} синхронизировал карты")
     await interaction.followup.send(content="Успешно", ephemeral=True)
-  except CommandExecutionError as err:
-    logger.error(f"CS Server: {err}")
-    await interaction.followup.send(content="Не удалось", ephemeral=True)
+  else:
+    await interaction.followup.send(content=f"Не удалось: {', '.join(failed)}", ephemeral=True)
 
 # -- map_change
 @observer.subscribe(Event.BC_CS_MAP_CHANGE)
@@ -219,7 +420,7 @@ async def cmd_map_change(data):
   command = f"ultrahc_ds_change_map {mapname}"
   
   try:
-    await cs_server.exec(command)
+    await get_server(data).exec(command, CommandPriority.ADMIN)
 
     logger.info(f"CS Server: {caller_name} сменил карту на {mapname}")
 
@@ -1,5 +1,15 @@
-from rehlds.rcon import RCON
-from typing import Optional
+from rehlds.rcon import AsyncRCON, RCONError, RequestTimeout
+from rehlds.source_rcon import SourceRCON
+from rehlds.a2s import A2SClient
+from rehlds.metrics import RCONMetrics
+from rehlds.status import PlayerTable, parse_status
+from cs_server.command_queue import CommandQueue, CommandPriority, QueueFull
+from cs_server.circuit_breaker import CircuitBreaker
+from cs_server.query_cache import QueryCache, invalidates, is_read_only, normalize
+from cs_server.batch import command_budget, maxBatchSize, new_marker_prefix, pack_commands, split_replies
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+import asyncio
+import time
 from enum import Enum
 
 # SECTION Исключения CSServer
@@ -29,35 +39,202 @@ class CommandExecutionError(CSServerError):
   """Исключение для ошибок при выполнении команды на сервере."""
   pass
 
+# -- CommandQueueFull
+class CommandQueueFull(CommandExecutionError):
+  """Исключение для случая, когда очередь команд переполнена."""
+  pass
+
+# -- CircuitOpen
+class CircuitOpen(CommandExecutionError):
+  """Исключение для запроса, отклоненного без обращения к сети: сервер недавно был недоступен."""
+  pass
+
+# -- BatchError
+class BatchError(CommandExecutionError):
+  """
+  Исключение для пакета команд, оборвавшегося на середине.
+
+  replies - ответы уже выполненных команд (None для остальных),
+  executed - сколько первых команд выполнено.
+  """
+  def __init__(self, message: str, replies: List[Optional[str]], executed: int) -> None:
+    super().__init__(message)
+    self.replies: List[Optional[str]] = replies
+    self.executed: int = executed
+
 # !SECTION
 
 class DefaultCommands(Enum):
     GET_STATUS = "ultrahc_ds_get_info"
+    PLAYERS = "status"
+
+# Протоколы RCON: GoldSrc (UDP, ReHLDS) и Source (TCP)
+rconProtocols = ("goldsrc", "source")
 
 # SECTION Class CSRCON
 class CSRCON:
   # -- __init__()
-  def __init__(self, host: str, password: str) -> None:
+  def __init__(self,
+               host: str,
+               password: str,
+               port: int = 27015,
+               timeout: float = 3.0,
+               queue_size: int = 64,
+               players_ttl: float = 5.0,
+               query_ttl: float = 1.0,
+               failure_threshold: int = 3,
+               reconnect_interval: float = 10.0,
+               max_reconnect_interval: float = 300.0,
+               protocol: str = "goldsrc",
+               pipeline: int = 8) -> None:
     """
     Инициализирует экземпляр CSServer.
 
     :param host: Адрес сервера.
     :param password: Пароль для подключения к серверу.
+    :param port: Порт сервера (по умолчанию 27015).
+    :param timeout: Таймаут одного RCON-запроса в секундах.
+    :param queue_size: Размер каждой приоритетной полосы очереди команд.
+    :param players_ttl: Сколько секунд таблица игроков из `status` считается свежей.
+    :param query_ttl: Сколько секунд ответ на команду чтения (см. query()) считается свежим.
+    :param failure_threshold: Сколько сетевых ошибок команд подряд размыкают цепь.
+    :param reconnect_interval: Пауза перед первой повторной попыткой в секундах.
+    :param max_reconnect_interval: Максимальная пауза между попытками в секундах.
+    :param protocol: Протокол RCON: "goldsrc" (UDP, по одному обмену) или "source"
+                     (одно TCP-соединение, запросы конвейеризуются).
+    :param pipeline: Сколько команд одновременно отправляется по Source RCON.
+    :raises ValueError: Если протокол неизвестен.
     """
-    self.cs_server: RCON = RCON(host=host, password=password)
+    if protocol not in rconProtocols:
+      raise ValueError(f"Неизвестный протокол RCON: {protocol}")
+
+    self.protocol: str = protocol
+    if protocol == "source":
+      self.cs_server: Union[AsyncRCON, SourceRCON] = SourceRCON(host=host, port=port, password=password, timeout=timeout)
+      self.queue: CommandQueue = CommandQueue(max_size=queue_size, concurrency=pipeline)
+    else:
+      self.cs_server = AsyncRCON(host=host, port=port, password=password, timeout=timeout)
+      self.queue = CommandQueue(max_size=queue_size)
+
+    # Запросы A2S_INFO/A2S_PLAYER на игровой порт: без пароля, плагинов и очереди команд
+    self.a2s: A2SClient = A2SClient(host=host, port=port, timeout=timeout, ttl=query_ttl)
     self.connected: bool = False
 
+    # Сглаженное время одного обмена с сервером (без ожидания в очереди), в секундах
+    self.latency: Optional[float] = None
+    # Метрики команд с точки зрения вызывающего: вместе с ожиданием в очереди
+    self.metrics: RCONMetrics = RCONMetrics()
+
+    # Пока цепь разомкнута, подключение и команды отклоняются сразу
+    self.breaker: CircuitBreaker = CircuitBreaker(failure_threshold=failure_threshold,
+                                                  base_delay=reconnect_interval,
+                                                  max_delay=max_reconnect_interval)
+
+    self.players_ttl: float = players_ttl
+    self.cache: QueryCache = QueryCache(ttl=query_ttl, retention=players_ttl)
+
+    # Отправка команд без ответа в обход RCON (канал WebSocket сервера): True - отправлено
+    self.channel: Optional[Callable[[List[str]], Awaitable[bool]]] = None
+    self.channel_commands: int = 0
+
+  # -- challenge_refreshes
+  @property
+  def challenge_refreshes(self) -> int:
+    """Сколько раз challenge обновлялся после ответа "Bad challenge"."""
+    return self.cs_server.challenge_refreshes
+
+  # -- _timed()
+  async def _timed(self, coro):
+    started = time.monotonic()
+    result = await coro
+    elapsed = time.monotonic() - started
+
+    self.latency = elapsed if self.latency is None else self.latency * 0.8 + elapsed * 0.2
+    return result
+
+  # -- _submit()
+  async def _submit(self, command: str, priority: CommandPriority = CommandPriority.NORMAL) -> str:
+    if not self.breaker.allow():
+      raise CircuitOpen(f"Сервер недоступен, повтор через {self.breaker.retry_in:.0f} с")
+
+    started = time.monotonic()
+    self.metrics.requests += 1
+
+    # Запись сбрасывает кеш и до, и после выполнения: чтения с более высоким
+    # приоритетом могут успеть выполниться раньше нее
+    write = invalidates(command)
+    if write:
+      self.cache.invalidate()
+
+    try:
+      response = await self.queue.submit(lambda: self._timed(self.cs_server.execute(command)), priority)
+    except Exception as e:
+      self._record_error(e)
+      raise
+
+    if write:
+      self.cache.invalidate()
+
+    self.breaker.record_success()
+    self.metrics.observe(command, time.monotonic() - started)
+    return response
+
+  # -- _record_error()
+  def _record_error(self, e: Exception) -> None:
+    self.metrics.errors += 1
+    if isinstance(e, RequestTimeout):
+      self.metrics.timeouts += 1
+    # Переполненная очередь - не признак недоступности сервера
+    if isinstance(e, RCONError):
+      self.breaker.record_failure()
+      # Разомкнутая цепь - сервер потерян: его переподключит CSRCONPool.connect_due()
+      if self.breaker.is_open:
+        self.connected = False
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """
+    Снимок метрик сервера.
+
+    commands - задержки и ошибки с точки зрения вызывающего (вместе с очередью),
+    rcon - отдельные обмены по сети, трафик и подключения.
+    """
+    return {
+      "connected": self.connected,
+      "protocol": self.protocol,
+      "latency": self.latency,
+      "challenge_refreshes": self.challenge_refreshes,
+      "circuit": self.breaker.state.value,
+      "channel_commands": self.channel_commands,
+      "queue": self.queue.stats(),
+      "cache": self.cache.stats(),
+      "a2s": self.a2s.stats(),
+      "commands": self.metrics.snapshot(),
+      "rcon": self.cs_server.metrics.snapshot(),
+    }
+
   # -- connect_to_server()
   async def connect_to_server(self) -> None:
     """
     Подключается к серверу CS и возвращает статус.
+
+    Неудачная попытка размыкает цепь: следующая будет разрешена
+    только через растущую паузу (см. CircuitBreaker).
     
+    :raises CircuitOpen: Если пауза после прошлой неудачи еще не истекла.
     :raises ConnectionError: Если не удалось подключиться к серверу.
     """
+    if not self.breaker.allow():
+      raise CircuitOpen(f"Сервер недоступен, повтор через {self.breaker.retry_in:.0f} с")
+
+    self.metrics.connects += 1
     try:
-      self.cs_server.connect()
+      await self._timed(self.cs_server.connect())
       self.connected = True
+      self.breaker.record_success()
     except Exception as e:
+      self.metrics.connect_failures += 1
+      self.breaker.trip()
       raise ConnectionError(f"Ошибка подключения: {str(e)}")
     
   # -- disconnect()
@@ -67,6 +244,7 @@ class CSRCON:
     """
     self.cs_server.disconnect()
     self.connected = False
+    self.cache.invalidate()
 
   # -- fetch_status()
   async def fetch_status(self) -> None:
@@ -78,21 +256,217 @@ class CSRCON:
     """
 
     try:
-      self.cs_server.execute(DefaultCommands.GET_STATUS.value)
+      await self._submit(DefaultCommands.GET_STATUS.value)
     except Exception as e:
       raise StatusError(f"Ошибка получения статуса: {str(e)}")
 
+  # -- get_players()
+  async def get_players(self, max_age: Optional[float] = None) -> PlayerTable:
+    """
+    Таблица игроков из `status`, закешированная на players_ttl секунд.
+
+    Кеш общий с query(): kick, ban, смена карты и другие записи его сбрасывают.
+
+    :param max_age: Допустимый возраст кеша в секундах; по умолчанию players_ttl.
+    :raises CommandQueueFull: Если очередь команд переполнена.
+    :raises CommandExecutionError: Если не удалось выполнить `status`.
+    """
+    max_age = self.players_ttl if max_age is None else max_age
+    return parse_status(await self.query(DefaultCommands.PLAYERS.value, max_age=max_age))
+
+  # -- resolve_target()
+  async def resolve_target(self, name: str) -> str:
+    """
+    Превращает ник в `#userid`, чтобы сервер не искал игрока по части имени.
+
+    Если игрока нет в таблице или `status` не удался, возвращается исходный ник.
+
+    :param name: Ник игрока.
+    """
+    try:
+      player = (await self.get_players()).find(name)
+    except CommandExecutionError:
+      return name
+
+    return player.target if player else name
+
+  # -- query()
+  async def query(self,
+                  command: str,
+                  priority: CommandPriority = CommandPriority.NORMAL,
+                  max_age: Optional[float] = None) -> str:
+    """
+    Выполняет команду чтения с кешированием ответа.
+
+    Ответы на команды чтения (status, maps, чтение cvar и т.п., см. is_read_only())
+    кешируются на query_ttl секунд, а одновременные одинаковые запросы
+    объединяются в один обмен с сервером. Остальные команды выполняются
+    как через exec().
+
+    :param command: Команда для выполнения.
+    :param priority: Приоритет команды в очереди.
+    :param max_age: Допустимый возраст ответа из кеша в секундах; по умолчанию query_ttl.
+    :raises CircuitOpen: Если цепь разомкнута.
+    :raises CommandQueueFull: Если очередь команд переполнена.
+    :raises CommandExecutionError: Если произошла ошибка при выполнении команды.
+    """
+    if not is_read_only(command):
+      return await self.exec(command, priority)
+
+    return await self.cache.get_or_run(normalize(command), lambda: self.exec(command, priority), max_age)
+
   # -- exec()
-  async def exec(self, command: str) -> str:
+  async def exec(self, command: str, priority: CommandPriority = CommandPriority.NORMAL) -> str:
     """
     Выполняет команду на сервере.
 
+    Команды проходят через общую очередь: одновременные вызовы не делят
+    сокет, а админские команды обгоняют статус и чат.
+
+    :param command: Команда для выполнения.
+    :param priority: Приоритет команды в очереди.
+    :raises CircuitOpen: Если цепь разомкнута.
+    :raises CommandQueueFull: Если очередь команд переполнена.
+    :raises CommandExecutionError: Если произошла ошибка при выполнении команды.
+    """
+    try:
+      return await self._submit(command, priority)
+    except CircuitOpen:
+      raise
+    except QueueFull as e:
+      raise CommandQueueFull(str(e))
+    except Exception as e:
+      raise CommandExecutionError(f"Ошибка выполнения команды: {str(e)}")
+
+  # -- batch_size()
+  def batch_size(self) -> int:
+    """
+    Сколько байт текста команд помещается в один пакет.
+
+    Для GoldSrc это буфер rcon HLDS (1024 байта) за вычетом префикса
+    `rcon <challenge> <пароль> ` (см. command_budget()).
+    """
+    if self.protocol == "goldsrc":
+      return command_budget(self.cs_server.password, self.cs_server.challenge)
+    return maxBatchSize
+
+  # -- execute_many()
+  async def execute_many(self,
+                         commands: List[str],
+                         priority: CommandPriority = CommandPriority.NORMAL,
+                         split: bool = True,
+                         max_size: Optional[int] = None) -> List[Optional[str]]:
+    """
+    Выполняет несколько команд, упаковывая их через ';' в минимум пакетов.
+
+    Пакеты отправляются по очереди, в порядке команд: следующий уходит
+    только после ответа на предыдущий, даже по конвейеру Source RCON.
+    Если пакет не выполнился, следующие не отправляются.
+
+    Команды без split (ответы не нужны) сначала предлагаются каналу
+    (см. channel); если он не подключен, они уходят по RCON.
+
+    :param commands: Команды для выполнения.
+    :param priority: Приоритет пакетов в очереди.
+    :param split: Разрезать ли ответ по командам. Для этого после каждой команды
+                  добавляется `echo <маркер>`; без split ответы не возвращаются.
+    :param max_size: Максимальный размер текста одного пакета в байтах; по умолчанию batch_size().
+    :return: Ответы в порядке команд (None, если ответ не удалось выделить).
+    :raises CircuitOpen: Если цепь разомкнута.
+    :raises CommandQueueFull: Если очередь команд переполнена.
+    :raises BatchError: Если часть пакетов выполнилась, а очередной - нет.
+    :raises CommandExecutionError: Если произошла ошибка при выполнении команд.
+    """
+    if not split and self.channel is not None and await self.channel(commands):
+      self.channel_commands += len(commands)
+      return [None] * len(commands)
+
+    marker_prefix = new_marker_prefix() if split else None
+    batches = pack_commands(commands, max_size or self.batch_size(), marker_prefix)
+
+    replies: List[Optional[str]] = [None] * len(commands)
+    executed = 0
+    for payload, indexes in batches:
+      try:
+        response = await self._submit(payload, priority)
+      except Exception as e:
+        if executed:
+          raise BatchError(f"Выполнено {executed} из {len(commands)} команд: {str(e)}", replies, executed) from e
+        if isinstance(e, CircuitOpen):
+          raise
+        if isinstance(e, QueueFull):
+          raise CommandQueueFull(str(e))
+        raise CommandExecutionError(f"Ошибка выполнения команд: {str(e)}")
+
+      executed += len(indexes)
+      if split:
+        for index, reply in zip(indexes, split_replies(response, indexes, marker_prefix)):
+          replies[index] = reply
+
+    return replies
+
+  # -- exec_iter()
+  async def exec_iter(self, command: str, priority: CommandPriority = CommandPriority.NORMAL) -> AsyncIterator[str]:
+    """
+    Выполняет команду на сервере и отдает ответ кусками по мере прихода пакетов.
+
+    Удобно для больших выводов (status, maps *, cvarlist, amx_banlist).
+    Команда занимает место в общей очереди, как exec(): пока итератор
+    не закрыт, остальные команды ждут. Цепь, метрики и сброс кеша
+    учитываются так же, как для exec().
+
     :param command: Команда для выполнения.
+    :param priority: Приоритет команды в очереди.
+    :raises CircuitOpen: Если цепь разомкнута.
+    :raises CommandQueueFull: Если очередь команд переполнена.
     :raises CommandExecutionError: Если произошла ошибка при выполнении команды.
     """
+    if not self.breaker.allow():
+      raise CircuitOpen(f"Сервер недоступен, повтор через {self.breaker.retry_in:.0f} с")
+
+    started = time.monotonic()
+    self.metrics.requests += 1
+
+    write = invalidates(command)
+    if write:
+      self.cache.invalidate()
+
+    # Задача очереди только держит место, пока вызывающий читает ответ
+    loop = asyncio.get_running_loop()
+    granted: asyncio.Future = loop.create_future()
+    released: asyncio.Future = loop.create_future()
+
+    async def hold() -> None:
+      granted.set_result(None)
+      await released
+
+    slot = asyncio.ensure_future(self.queue.submit(hold, priority))
+    stream = None
     try:
-      return self.cs_server.execute(command)
+      await asyncio.wait((granted, slot), return_when=asyncio.FIRST_COMPLETED)
+      if not granted.done():
+        await slot
+
+      stream = self.cs_server.execute_iter(command)
+      async for chunk in stream:
+        yield chunk
     except Exception as e:
+      self._record_error(e)
+      if isinstance(e, QueueFull):
+        raise CommandQueueFull(str(e))
       raise CommandExecutionError(f"Ошибка выполнения команды: {str(e)}")
+    finally:
+      if stream is not None:
+        await stream.aclose()
+      if not released.done():
+        released.set_result(None)
+      if not granted.done():
+        slot.cancel()
+
+    if write:
+      self.cache.invalidate()
+
+    self.breaker.record_success()
+    self.metrics.observe(command, time.monotonic() - started)
 
 # !SECTION
@@ -0,0 +1,193 @@
+from cs_server.csrcon import CSRCON, CSServerError
+from cs_server.command_queue import CommandPriority
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+# SECTION Исключения CSRCONPool
+# -- UnknownServer
+class UnknownServer(CSServerError):
+  """Исключение для обращения к серверу, которого нет в пуле."""
+  pass
+
+# !SECTION
+
+# SECTION Class ServerHealth
+class ServerHealth:
+  """Ошибки подключения одного сервера пула; расписание переподключения ведет CSRCON.breaker."""
+  # -- __init__()
+  def __init__(self) -> None:
+    self.failures: int = 0
+    self.last_error: Optional[str] = None
+
+# !SECTION
+
+# SECTION Class CSRCONPool
+class CSRCONPool:
+  """
+  Пул подключений к нескольким серверам CS.
+
+  Первый сервер в списке считается основным: он используется, когда
+  сервер не указан явно.
+  """
+  # -- __init__()
+  def __init__(self,
+               servers: List[Dict[str, Any]],
+               timeout: float = 3.0,
+               queue_size: int = 64,
+               reconnect_interval: float = 10.0,
+               max_reconnect_interval: float = 300.0) -> None:
+    """
+    :param servers: Список серверов: словари с ключами name, host, password и необязательными
+                    port и protocol ("goldsrc" или "source", см. CSRCON).
+    :param timeout: Таймаут одного RCON-запроса в секундах.
+    :param queue_size: Размер каждой приоритетной полосы очереди команд.
+    :param reconnect_interval: Пауза перед первым повторным подключением к упавшему серверу, в секундах.
+    :param max_reconnect_interval: Максимальная пауза между попытками подключения, в секундах.
+    :raises CSServerError: Если список серверов пуст или имена повторяются.
+    """
+    if not servers:
+      raise CSServerError("Список серверов CS пуст.")
+
+    self.servers: Dict[str, CSRCON] = {}
+    self.health: Dict[str, ServerHealth] = {}
+
+    for server in servers:
+      name = server['name']
+      if name in self.servers:
+        raise CSServerError(f"Сервер {name} указан дважды.")
+
+      self.servers[name] = CSRCON(host=server['host'],
+                                  password=server['password'],
+                                  port=server.get('port', 27015),
+                                  protocol=server.get('protocol', 'goldsrc'),
+                                  timeout=timeout,
+                                  queue_size=queue_size,
+                                  reconnect_interval=reconnect_interval,
+                                  max_reconnect_interval=max_reconnect_interval)
+      self.health[name] = ServerHealth()
+
+    self.default: str = next(iter(self.servers))
+
+  # -- names
+  @property
+  def names(self) -> List[str]:
+    """Имена серверов в порядке конфигурации."""
+    return list(self.servers)
+
+  # -- get()
+  def get(self, name: Optional[str] = None) -> CSRCON:
+    """
+    Возвращает сервер по имени.
+
+    :param name: Имя сервера; если не указано - основной сервер.
+    :raises UnknownServer: Если сервера нет в пуле.
+    """
+    if not name:
+      return self.servers[self.default]
+
+    if name not in self.servers:
+      raise UnknownServer(f"Неизвестный сервер: {name}")
+
+    return self.servers[name]
+
+  # -- connect()
+  async def connect(self, name: str, force: bool = False) -> Optional[Exception]:
+    """
+    Подключается к одному серверу и обновляет его состояние.
+
+    :param name: Имя сервера.
+    :param force: Не ждать конца паузы после прошлых неудач (ручное переподключение).
+    :return: Ошибка подключения или None при успехе.
+    """
+    server = self.get(name)
+    health = self.health[name]
+
+    if force:
+      server.breaker.reset()
+
+    try:
+      await server.connect_to_server()
+    except CSServerError as err:
+      health.failures += 1
+      health.last_error = str(err)
+      return err
+
+    health.failures = 0
+    health.last_error = None
+    return None
+
+  # -- connect_due()
+  async def connect_due(self) -> Dict[str, Optional[Exception]]:
+    """
+    Параллельно подключается ко всем отключенным серверам, у которых подошло время переподключения.
+
+    Серверы с разомкнутой цепью пропускаются без обращения к сети.
+
+    :return: Результат по каждому серверу, к которому была попытка: ошибка или None.
+    """
+    due = [name for name, server in self.servers.items()
+           if not server.connected and not server.breaker.is_open]
+
+    results = await asyncio.gather(*(self.connect(name) for name in due))
+    return dict(zip(due, results))
+
+  # -- disconnect()
+  async def disconnect(self, name: str) -> None:
+    """
+    Отключается от упавшего сервера и размыкает цепь: следующая попытка подключения - после паузы.
+
+    :param name: Имя сервера.
+    """
+    server = self.get(name)
+    await server.disconnect()
+    if not server.breaker.is_open:
+      server.breaker.trip()
+
+  # -- fan_out()
+  async def fan_out(self, func: Callable[[CSRCON], Awaitable[Any]]) -> Dict[str, Any]:
+    """
+    Параллельно выполняет func для каждого подключенного сервера.
+
+    Серверы с разомкнутой цепью пропускаются без обращения к сети.
+
+    :param func: Функция, принимающая CSRCON и возвращающая корутину.
+    :return: Результат или исключение по каждому серверу.
+    """
+    names = [name for name, server in self.servers.items()
+             if server.connected and not server.breaker.is_open]
+    results = await asyncio.gather(*(func(self.servers[name]) for name in names), return_exceptions=True)
+    return dict(zip(names, results))
+
+  # -- broadcast()
+  async def broadcast(self, command: str, priority: CommandPriority = CommandPriority.NORMAL) -> Dict[str, Any]:
+    """
+    Выполняет команду на всех подключенных серверах одновременно.
+
+    :param command: Команда для выполнения.
+    :param priority: Приоритет команды в очередях серверов.
+    :return: Ответ или исключение по каждому серверу.
+    """
+    return await self.fan_out(lambda server: server.exec(command, priority))
+
+  # -- status()
+  def status(self) -> Dict[str, Dict[str, Any]]:
+    """Снимок состояния серверов: подключение, задержка, ошибки и время до переподключения."""
+    return {
+      name: {
+        "connected": server.connected,
+        "latency": server.latency,
+        "circuit": server.breaker.state.value,
+        "failures": self.health[name].failures,
+        "last_error": self.health[name].last_error,
+        "reconnect_in": None if server.connected else server.breaker.retry_in,
+      }
+      for name, server in self.servers.items()
+    }
+
+  # -- stats()
+  def stats(self) -> Dict[str, Dict[str, Any]]:
+    """Метрики каждого сервера пула (см. CSRCON.stats()) вместе с его состоянием."""
+    status = self.status()
+    return {name: {**status[name], **server.stats()} for name, server in self.servers.items()}
+
+# !SECTION
@@ -0,0 +1,156 @@
+from cachetools import TTLCache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import re
+import time
+
+# Команды, которые только читают состояние сервера
+readOnlyCommands = frozenset({
+  "status", "maps", "users", "version", "stats", "listid", "listip",
+  "cvarlist", "amx_who", "amx_plugins", "amx_modules",
+})
+
+# Команды с подкомандами: чтение - только перечисленные подкоманды (и команда без подкоманды - справка),
+# остальные (amxx pause, meta unload и т.п.) меняют состояние сервера
+readOnlySubcommands = {
+  "amxx": frozenset({"list", "plugins", "modules", "version", "cvars", "cmds"}),
+  "meta": frozenset({"list", "info", "version", "game", "cvars", "cmds", "config"}),
+}
+
+# Имя cvar без значения печатает его текущее значение
+cvarRead = re.compile(r'^(sv|mp)_\w+$')
+
+# Команды, которые ничего не меняют в читаемых данных и не сбрасывают кеш
+neutralCommands = frozenset({
+  "echo", "say", "say_team", "amx_say", "amx_chat", "amx_psay", "amx_tsay", "amx_csay",
+  "ultrahc_ds_send_msg", "ultrahc_ds_get_info",
+})
+
+queryCacheSize = 128
+
+# -- normalize()
+def normalize(command: str) -> str:
+  """Ключ кеша: команда со схлопнутыми пробелами."""
+  return " ".join(command.split())
+
+# -- _head()
+def _head(command: str) -> str:
+  parts = command.split(None, 1)
+  return parts[0].lower() if parts else ""
+
+# -- is_read_only()
+def is_read_only(command: str) -> bool:
+  """Можно ли закешировать ответ на команду: известная команда чтения или чтение cvar."""
+  command = normalize(command)
+  if ';' in command:
+    return False
+
+  head = _head(command)
+  if head in readOnlySubcommands:
+    words = command.split()
+    return len(words) == 1 or words[1].lower() in readOnlySubcommands[head]
+  return head in readOnlyCommands or bool(cvarRead.match(command))
+
+# -- invalidates()
+def invalidates(command: str) -> bool:
+  """
+  Может ли команда изменить данные, которые отдают команды чтения.
+
+  Консервативно: все, что не чтение и не сообщение в чат, считается записью
+  (changelevel, amx_map, kick, запись cvar и т.п.).
+  """
+  return any(not is_read_only(part) and _head(part) not in neutralCommands
+             for part in command.split(';') if part.strip())
+
+# SECTION Class QueryCache
+class QueryCache:
+  """
+  TTL-кеш ответов на команды чтения с объединением одинаковых запросов.
+
+  Одновременные одинаковые запросы ждут один обмен с сервером.
+  invalidate() сбрасывает кеш; ответ, полученный на запрос, начатый
+  до сброса, в кеш уже не попадает, а новые запросы к нему не присоединяются.
+  """
+  # -- __init__()
+  def __init__(self, ttl: float = 1.0, retention: Optional[float] = None, max_size: int = queryCacheSize) -> None:
+    """
+    :param ttl: Сколько секунд ответ считается свежим по умолчанию.
+    :param retention: Сколько секунд хранить ответы (для запросов с большим max_age); по умолчанию ttl.
+    :param max_size: Максимальное число закешированных команд.
+    """
+    self.ttl: float = ttl
+    self._entries: TTLCache = TTLCache(maxsize=max_size, ttl=max(ttl, retention or 0))
+    # Ключ -> (поколение кеша на момент запуска, задача)
+    self._inflight: Dict[str, Tuple[int, asyncio.Task]] = {}
+    self._generation: int = 0
+
+    self.hits: int = 0
+    self.misses: int = 0
+    self.coalesced: int = 0
+    self.invalidations: int = 0
+
+  # -- get_or_run()
+  async def get_or_run(self, key: str, run: Callable[[], Awaitable[Any]], max_age: Optional[float] = None) -> Any:
+    """
+    Возвращает свежий ответ из кеша, ждет уже идущий запрос или выполняет новый.
+
+    :param key: Ключ (см. normalize()).
+    :param run: Функция без аргументов, выполняющая запрос.
+    :param max_age: Допустимый возраст ответа в секундах; по умолчанию ttl.
+    :return: Ответ.
+    """
+    max_age = self.ttl if max_age is None else max_age
+
+    entry: Optional[Tuple[float, Any]] = self._entries.get(key)
+    if entry is not None and time.monotonic() - entry[0] <= max_age:
+      self.hits += 1
+      return entry[1]
+
+    # К запросу, начатому до invalidate(), не присоединяемся: его ответ может быть до записи
+    inflight = self._inflight.get(key)
+    if inflight is not None and inflight[0] == self._generation:
+      self.coalesced += 1
+      task = inflight[1]
+    else:
+      self.misses += 1
+      task = asyncio.ensure_future(self._run(key, run, self._generation))
+      # Ошибку получат ожидающие; если все они отменились, не пишем "exception was never retrieved"
+      task.add_done_callback(lambda done: done.cancelled() or done.exception())
+      self._inflight[key] = (self._generation, task)
+
+    # shield: отмена одного ожидающего не отменяет общий запрос
+    return await asyncio.shield(task)
+
+  # -- _run()
+  async def _run(self, key: str, run: Callable[[], Awaitable[Any]], generation: int) -> Any:
+    try:
+      result = await run()
+    finally:
+      # После invalidate() ключ мог занять запрос нового поколения
+      inflight = self._inflight.get(key)
+      if inflight is not None and inflight[0] == generation:
+        del self._inflight[key]
+
+    if generation == self._generation:
+      self._entries[key] = (time.monotonic(), result)
+    return result
+
+  # -- invalidate()
+  def invalidate(self) -> None:
+    """Сбрасывает все закешированные ответы."""
+    self._generation += 1
+    self._entries.clear()
+    self.invalidations += 1
+
+  # -- stats()
+  def stats(self) -> Dict[str, int]:
+    """Счетчики кеша."""
+    return {
+      "size": len(self._entries),
+      "hits": self.hits,
+      "misses": self.misses,
+      "coalesced": self.coalesced,
+      "invalidations": self.invalidations,
+    }
+
+# !SECTION
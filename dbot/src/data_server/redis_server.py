@@ -2,6 +2,7 @@ from observer.observer_client import observer, Event, logger, nsroute
 from data_server.redis_client import AsyncRedisClient as AsyncRC
 
 import config
+import functools
 from cachetools import TTLCache
 
 from redis import asyncio as aioredis
@@ -27,10 +28,16 @@ rc: AsyncRC = AsyncRC(host=config.REDIS_HOST,
 
 cache_players: TTLCache = TTLCache(maxsize=32, ttl=120)
 
+# Сколько секунд маршруты автодополнения отдают запомненный список, не обращаясь к Redis.
+# Списки карт и банов сбрасываются при изменении, список игроков обновляется с каждым статусом.
+routeListTTL = 2
+routeMapListTTL = 60
+
 # SECTION
 
 def require_connection(func) -> callable:
   
+  @functools.wraps(func)
   async def wrapper(*args, **kwargs) -> callable:
     if not rc.connected:
       return None
@@ -62,6 +69,7 @@ async def ev_add_ban(data):
     Добавляет игрока в список забанненых
   """
   await rc.list_add(RedisTable.BannedPlayers, data['target'])
+  nsroute.invalidate("/redis/get_banned_players")
 
 # -- ev_unban_ban
 @observer.subscribe(Event.BC_CS_UNBAN)
@@ -71,6 +79,7 @@ async def ev_unban_ban(data):
     Убирает игрока из списка забанненых
   """
   await rc.list_delete(RedisTable.BannedPlayers, data['target'])
+  nsroute.invalidate("/redis/get_banned_players")
 
 # -- ev_add_players_to_list
 @observer.subscribe(Event.WBH_INFO)
@@ -102,6 +111,8 @@ async def ev_sync_maps(*args):
   response = (await nsroute.call_route("/get_map_list"))
 
   if response is None:
+    nsroute.invalidate("/redis/get_map_list_all")
+    nsroute.invalidate("/redis/get_map_list_active")
     return
   
   async with aioredis.Redis.from_pool(rc.pool) as conn:
@@ -113,9 +124,12 @@ async def ev_sync_maps(*args):
 
       await pipe.execute()
 
+  nsroute.invalidate("/redis/get_map_list_all")
+  nsroute.invalidate("/redis/get_map_list_active")
+
 
 # -- check_steam
-@nsroute.create_route("/CheckSteam")
+@nsroute.create_route("/CheckSteam", timeout=1.0, coalesce=True)
 async def check_steam(steam_id: str):
   """
     Проверяем, есть ли связь в Редис, если да, то возвращаем
@@ -140,35 +154,36 @@ async def check_steam(steam_id: str):
   return cache_players[steam_id]
 
 # -- route_get_offline_players
-@nsroute.create_route("/redis/get_offline_players")
+@nsroute.create_route("/redis/get_offline_players", ttl=routeListTTL)
 @require_connection
 async def route_get_offline_players() -> list:
   last_players: list = await rc.list_get(RedisTable.LastPlayers, 0)
   return [player.decode('utf-8') for player in last_players]
 
 # -- route_get_banned_players
-@nsroute.create_route("/redis/get_banned_players")
+@nsroute.create_route("/redis/get_banned_players", ttl=routeListTTL)
 @require_connection
 async def route_get_banned_players() -> list:
   banned_players: list = await rc.list_get(RedisTable.BannedPlayers, 0)
   return [player.decode('utf-8') for player in banned_players]
 
 # -- route_get_map_list_active
-@nsroute.create_route("/redis/get_map_list_active")
+@nsroute.create_route("/redis/get_map_list_active", ttl=routeMapListTTL)
 @require_connection
 async def route_get_map_list_active() -> list:
   map_list: list = await rc.list_get(RedisTable.MapListActive, 0)
   return [map.decode('utf-8') for map in map_list]
 
 # -- route_get_map_list_all
-@nsroute.create_route("/redis/get_map_list_all")
+@nsroute.create_route("/redis/get_map_list_all", ttl=routeMapListTTL)
 @require_connection
 async def route_get_map_list_all() -> list:
   map_list: list = await rc.list_get(RedisTable.MapListAll, 0 )
   return [map.decode('utf-8') for map in map_list]
 
 # -- route_update_map_list
-@nsroute.create_route("/redis/update_map_list")
+@nsroute.create_route("/redis/update_map_list",
+                      invalidates=("/redis/get_map_list_active", "/redis/get_map_list_all"))
 @require_connection
 async def route_update_map_list(type, map_name, activated=None):
   if type == "add":
@@ -4,6 +4,7 @@ from data_server.asyncsql import AioMysql, QueryError, ConnectionError as aioCon
 import discord
 import re
 import asyncio
+import functools
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any
 
@@ -34,6 +35,7 @@ CACHE_UPDATE_INTERVAL = 300  # 5 минут
 # -- @require_connection
 def require_connection(func) -> callable:
   
+  @functools.wraps(func)
   async def wrapper(*args, **kwargs) -> callable:
     if mysql.is_connected():
       return await func(*args, **kwargs)
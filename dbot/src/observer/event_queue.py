@@ -0,0 +1,173 @@
+import asyncio
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# SECTION OverflowPolicy
+class OverflowPolicy(Enum):
+  """Что делать с новым событием, когда очередь заполнена."""
+  # Ждать места в очереди (обратное давление на того, кто вызвал notify)
+  BLOCK = "block"
+  # Выбросить самое старое ожидающее событие
+  DROP_OLDEST = "drop_oldest"
+  # Ждет только одно, самое новое событие: прежнее ожидающее заменяется
+  LATEST_WINS = "latest_wins"
+
+# !SECTION
+
+# SECTION Class EventQueue
+class EventQueue:
+  """
+  Очередь событий одного типа с ограниченным числом обработчиков.
+
+  notify() только ставит событие в очередь, а concurrency обработчиков
+  выполняют подписчиков. Очередь ограничена max_size; при переполнении
+  действует OverflowPolicy. При LATEST_WINS ожидает не больше одного
+  события, и max_size не используется.
+  """
+  # -- __init__()
+  def __init__(self,
+               handler: Callable[..., Awaitable[None]],
+               concurrency: int = 1,
+               max_size: int = 256,
+               policy: OverflowPolicy = OverflowPolicy.BLOCK) -> None:
+    """
+    :param handler: Корутина, которая обрабатывает одно событие (получает его аргументы).
+    :param concurrency: Сколько событий обрабатывается одновременно.
+    :param max_size: Сколько событий может ждать обработки.
+    :param policy: Поведение при переполнении.
+    """
+    self.handler: Callable[..., Awaitable[None]] = handler
+    self.concurrency: int = max(1, concurrency)
+    self.policy: OverflowPolicy = policy
+    self.max_size: int = 1 if policy is OverflowPolicy.LATEST_WINS else max(1, max_size)
+
+    self._queue: Optional[asyncio.Queue] = None
+    self._workers: List[asyncio.Task] = []
+
+    self.running: int = 0
+    self.max_depth: int = 0
+    self.enqueued: int = 0
+    self.processed: int = 0
+    self.dropped: int = 0
+    self.coalesced: int = 0
+    self.blocked: int = 0
+
+  # -- depth
+  @property
+  def depth(self) -> int:
+    """Сколько событий ждет обработки."""
+    return self._queue.qsize() if self._queue else 0
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """Снимок метрик очереди."""
+    return {
+      "policy": self.policy.value,
+      "depth": self.depth,
+      "max_depth": self.max_depth,
+      "max_size": self.max_size,
+      "running": self.running,
+      "enqueued": self.enqueued,
+      "processed": self.processed,
+      "dropped": self.dropped,
+      "coalesced": self.coalesced,
+      "blocked": self.blocked,
+    }
+
+  # -- put()
+  async def put(self, args: tuple, kwargs: dict) -> None:
+    """
+    Ставит событие в очередь.
+
+    При BLOCK ждет места в очереди, при остальных политиках не ждет никогда.
+
+    :param args: Позиционные аргументы для подписчиков.
+    :param kwargs: Ключевые аргументы для подписчиков.
+    """
+    queue = self._ensure_workers()
+    item = (args, kwargs)
+
+    if self.policy is OverflowPolicy.BLOCK and queue.full():
+      self.blocked += 1
+      await queue.put(item)
+      self._enqueued()
+      return
+
+    self.put_nowait(args, kwargs)
+
+  # -- put_nowait()
+  def put_nowait(self, args: tuple, kwargs: dict) -> bool:
+    """
+    Ставит событие в очередь без ожидания.
+
+    :return: False, если очередь BLOCK заполнена и событие не принято.
+    """
+    queue = self._ensure_workers()
+    item = (args, kwargs)
+
+    if queue.full():
+      if self.policy is OverflowPolicy.BLOCK:
+        return False
+
+      queue.get_nowait()
+      queue.task_done()
+      if self.policy is OverflowPolicy.LATEST_WINS:
+        self.coalesced += 1
+      else:
+        self.dropped += 1
+
+    queue.put_nowait(item)
+    self._enqueued()
+    return True
+
+  # -- join()
+  async def join(self) -> None:
+    """Ждет, пока все поставленные события будут обработаны."""
+    if self._queue:
+      await self._queue.join()
+
+  # -- close()
+  def close(self) -> None:
+    """Останавливает обработчики; ожидающие события отбрасываются."""
+    for worker in self._workers:
+      worker.cancel()
+    self._workers = []
+    self._queue = None
+
+  # -- _enqueued()
+  def _enqueued(self) -> None:
+    self.enqueued += 1
+    depth = self._queue.qsize()
+    if depth > self.max_depth:
+      self.max_depth = depth
+
+  # -- _ensure_workers()
+  def _ensure_workers(self) -> asyncio.Queue:
+    if self._queue is not None and self._workers and not any(worker.done() for worker in self._workers):
+      return self._queue
+
+    for worker in self._workers:
+      worker.cancel()
+
+    if self._queue is None:
+      self._queue = asyncio.Queue(self.max_size)
+    self._workers = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+    return self._queue
+
+  # -- _run()
+  async def _run(self) -> None:
+    queue = self._queue
+    while True:
+      item: Tuple[tuple, dict] = await queue.get()
+      self.running += 1
+      try:
+        args, kwargs = item
+        await self.handler(*args, **kwargs)
+      except Exception:
+        pass
+      finally:
+        self.running -= 1
+        self.processed += 1
+        queue.task_done()
+
+# !SECTION
@@ -1,6 +1,17 @@
 import asyncio
+import functools
+import inspect
+import time
 from enum import Enum
-from typing import Callable, Dict, List
+from cachetools import TTLCache
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from observer.event_queue import EventQueue, OverflowPolicy
+from rehlds.metrics import Histogram
+
+if TYPE_CHECKING:
+  from observer.recorder import EventRecorder
+  from observer.redis_streams import RedisStreamBackend
 
 class Param(Enum):
   Interaction = "interaction",
@@ -48,14 +59,129 @@ class Event(Enum):
 
 
 # SECTION Observer
+
+class SubscriberStats:
+  """Метрики одного подписчика одного события: время вызовов и ошибки."""
+  __slots__ = ('name', 'latency', 'failures', 'slow', 'last_error')
+
+  def __init__(self, name: str) -> None:
+    self.name: str = name
+    self.latency: Histogram = Histogram()
+    self.failures: int = 0
+    self.slow: int = 0
+    self.last_error: Optional[str] = None
+
+  def snapshot(self) -> Dict[str, Any]:
+    """Снимок метрик для отдачи наружу."""
+    return {
+      "calls": self.latency.count,
+      "failures": self.failures,
+      "slow": self.slow,
+      "last_error": self.last_error,
+      "latency": self.latency.snapshot(),
+    }
+
+def subscriber_name(callback: Callable) -> str:
+  """Имя подписчика для метрик и логов: модуль и имя функции."""
+  name = getattr(callback, '__qualname__', None) or repr(callback)
+  module = getattr(callback, '__module__', None)
+  return f"{module}.{name}" if module else name
+
+Record = Callable[[SubscriberStats, float, Optional[BaseException]], None]
+Entry = Tuple[Callable, SubscriberStats]
+
+async def _timed(callback: Callable, stats: SubscriberStats, record: Record, args: tuple, kwargs: dict) -> None:
+  # Вызов подписчика с замером времени; ошибка подписчика не доходит до notify()
+  started = time.perf_counter()
+  try:
+    result = callback(*args, **kwargs)
+    # Обычная функция могла вернуть корутину (например, обертка-декоратор)
+    if inspect.isawaitable(result):
+      await result
+  except Exception as err:
+    record(stats, time.perf_counter() - started, err)
+  else:
+    record(stats, time.perf_counter() - started, None)
+
+def _make_dispatcher(entries: List[Entry], record: Record) -> Callable[..., Awaitable[None]]:
+  """Готовит функцию рассылки события под конкретный набор подписчиков.
+
+  Обычные функции вызываются сразу, без задач. Первый асинхронный
+  подписчик ожидается напрямую в задаче вызывающего, остальные
+  запускаются задачами и идут параллельно с ним. Каждый вызов
+  замеряется и передается в record() вместе с ошибкой, если она была.
+  """
+  inline = tuple(entry for entry in entries if not asyncio.iscoroutinefunction(entry[0]))
+  coroutines = tuple(entry for entry in entries if asyncio.iscoroutinefunction(entry[0]))
+
+  if not inline and len(coroutines) == 1:
+    callback, stats = coroutines[0]
+
+    async def dispatch_one(*args, **kwargs) -> None:
+      started = time.perf_counter()
+      try:
+        await callback(*args, **kwargs)
+      except Exception as err:
+        record(stats, time.perf_counter() - started, err)
+      else:
+        record(stats, time.perf_counter() - started, None)
+
+    return dispatch_one
+
+  async def dispatch(*args, **kwargs) -> None:
+    for callback, stats in inline:
+      await _timed(callback, stats, record, args, kwargs)
+
+    if not coroutines:
+      return
+
+    loop = asyncio.get_running_loop()
+    tasks = [loop.create_task(_timed(callback, stats, record, args, kwargs)) for callback, stats in coroutines[1:]]
+    try:
+      await _timed(coroutines[0][0], coroutines[0][1], record, args, kwargs)
+      for task in tasks:
+        await task
+    finally:
+      # notify() отменили - как и gather, отменяем подписчиков
+      for task in tasks:
+        if not task.done():
+          task.cancel()
+
+  return dispatch
+
 class Observer:
-  def __init__(self) -> None:
-    """Инициализация наблюдателя с пустым списком подписчиков."""
-    self._subscribers: Dict[str, List[Callable]] = {}
+  def __init__(self, slow_threshold: float = 0.0) -> None:
+    """Инициализация наблюдателя с пустым списком подписчиков.
+
+    Args:
+      slow_threshold (float): Вызов подписчика дольше этого числа секунд
+        считается медленным и передается в on_slow (0 - не отслеживать).
+    """
+    self._subscribers: Dict[Event, List[Callable]] = {}
+    # Метрики по каждой паре (событие, подписчик)
+    self._stats: Dict[Event, Dict[str, SubscriberStats]] = {}
+    self.slow_threshold: float = slow_threshold
+    # Обработчики медленных вызовов и ошибок подписчиков: (event, name, elapsed) и (event, name, err).
+    # on_error вызывается внутри блока except, так что в нем доступна трассировка.
+    self.on_slow: Optional[Callable[[Event, str, float], None]] = None
+    self.on_error: Optional[Callable[[Event, str, BaseException], None]] = None
+    # Таблица рассылки: пересобирается при подписке, а не при каждом notify()
+    self._dispatch: Dict[Event, Callable[..., Awaitable[None]]] = {}
+    # Ссылки на задачи notify_nowait(), чтобы их не собрал сборщик мусора
+    self._background: Set[asyncio.Task] = set()
+    # События, которые обрабатываются через очередь (см. configure())
+    self._queues: Dict[Event, EventQueue] = {}
+    # События, которые передаются через Redis (см. use_backend())
+    self._backends: Dict[Event, "RedisStreamBackend"] = {}
+    # Запись всех событий для воспроизведения (см. observer.recorder)
+    self.recorder: Optional["EventRecorder"] = None
 
   def subscribe(self, event: Event) -> Callable:
     """Декоратор для подписки на событие.
 
+    Подписчиком может быть и корутина, и обычная функция: обычные
+    функции вызываются сразу, без создания задачи.
+
     Args:
       event (Event): Название события, на которое подписывается пользователь.
 
@@ -63,49 +189,403 @@ class Observer:
       Callable: Функция обратного вызова, которая будет зарегистрирована.
     """
     def decorator(callback: Callable) -> Callable:
-      if event.value not in self._subscribers:
-        self._subscribers[event.value] = []
-      self._subscribers[event.value].append(callback)
+      callbacks = self._subscribers.setdefault(event, [])
+      callbacks.append(callback)
+
+      stats = self._stats.setdefault(event, {})
+      owners: Dict[str, Callable] = {}
+      entries = []
+      for subscriber in callbacks:
+        name = base = subscriber_name(subscriber)
+        # Разные функции с одним именем (переопределенные в модуле) считаются отдельно
+        number = 1
+        while owners.setdefault(name, subscriber) is not subscriber:
+          number += 1
+          name = f"{base}#{number}"
+        entries.append((subscriber, stats.setdefault(name, SubscriberStats(name))))
+
+      self._dispatch[event] = _make_dispatcher(entries, functools.partial(self._record, event))
       return callback
     return decorator
 
+  def _record(self, event: Event, stats: SubscriberStats, elapsed: float, err: Optional[BaseException]) -> None:
+    stats.latency.observe(elapsed)
+
+    if err is not None:
+      stats.failures += 1
+      stats.last_error = repr(err)
+      if self.on_error is not None:
+        try:
+          self.on_error(event, stats.name, err)
+        except Exception:
+          pass
+
+    if self.slow_threshold and elapsed >= self.slow_threshold:
+      stats.slow += 1
+      if self.on_slow is not None:
+        try:
+          self.on_slow(event, stats.name, elapsed)
+        except Exception:
+          pass
+
+  def subscriber_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Метрики подписчиков: время вызовов, число ошибок и медленных вызовов.
+
+    Returns:
+      Dict[str, Dict[str, Dict[str, Any]]]: {событие: {подписчик: снимок}},
+      подписчики события отсортированы по суммарному времени, самые долгие первыми.
+    """
+    snapshot = {}
+    for event, stats in self._stats.items():
+      ordered = sorted(stats.values(), key=lambda entry: entry.latency.total, reverse=True)
+      snapshot[event.value] = {entry.name: entry.snapshot() for entry in ordered}
+    return snapshot
+
+  def configure(self,
+                event: Event,
+                concurrency: int = 1,
+                max_size: int = 256,
+                policy: OverflowPolicy = OverflowPolicy.BLOCK) -> EventQueue:
+    """Включает для события очередь с ограниченным числом обработчиков.
+
+    После этого notify() только ставит событие в очередь и не ждет
+    подписчиков (при BLOCK - ждет только места в очереди).
+
+    Args:
+      event (Event): Событие.
+      concurrency (int): Сколько событий обрабатывается одновременно.
+      max_size (int): Сколько событий может ждать обработки.
+      policy (OverflowPolicy): Что делать при переполнении очереди.
+
+    Returns:
+      EventQueue: Очередь события.
+    """
+    queue = self._queues.get(event)
+    if queue is not None:
+      queue.close()
+
+    queue = EventQueue(lambda *args, **kwargs: self._dispatch_now(event, *args, **kwargs),
+                       concurrency=concurrency, max_size=max_size, policy=policy)
+    self._queues[event] = queue
+    return queue
+
+  def use_backend(self, backend: "RedisStreamBackend", events: Iterable[Event]) -> None:
+    """Передает события через Redis Streams вместо вызова подписчиков в этом процессе.
+
+    notify() для этих событий только публикует их; подписчиков вызывает
+    процесс, который читает поток (RedisStreamBackend.start()), - в том
+    числе и этот. Аргументы событий должны сериализоваться в JSON.
+
+    Args:
+      backend (RedisStreamBackend): Подключение к Redis Streams.
+      events (Iterable[Event]): События, которые передаются через Redis.
+    """
+    for event in events:
+      self._backends[event] = backend
+
+  def stats(self) -> Dict[str, Dict[str, Any]]:
+    """Метрики очередей событий.
+
+    Returns:
+      Dict[str, Dict[str, Any]]: Снимок EventQueue.stats() по каждому событию с очередью.
+    """
+    return {event.value: queue.stats() for event, queue in self._queues.items()}
+
+  async def drain(self) -> None:
+    """Ждет, пока все очереди событий опустеют."""
+    for queue in list(self._queues.values()):
+      await queue.join()
+
+  def close(self) -> None:
+    """Останавливает обработчики очередей событий."""
+    for queue in self._queues.values():
+      queue.close()
+
+  def subscribers(self, event: Event) -> List[Callable]:
+    """Подписчики события в порядке подписки.
+
+    Args:
+      event (Event): Событие.
+
+    Returns:
+      List[Callable]: Копия списка подписчиков.
+    """
+    return list(self._subscribers.get(event, ()))
+
   async def notify(self, event: Event, *args, **kwargs) -> None:
     """Уведомление всех подписчиков о событии.
 
+    Ждет, пока все подписчики отработают (для событий с очередью -
+    пока событие не будет поставлено в очередь). Ошибки подписчиков
+    не передаются вызывающему.
+
+    Событие, переданное в use_backend(), публикуется в Redis и обрабатывается
+    тем процессом, который его прочитает; если опубликовать не удалось
+    (аргументы не сериализуются, Redis недоступен) - обрабатывается здесь.
+
     Args:
       event (Event): Название события, о котором нужно уведомить подписчиков.
       *args: Аргументы, которые будут переданы в функции обратного вызова.
       **kwargs: Ключевые аргументы, которые будут переданы в функции обратного вызова.
     """
-    if event.value in self._subscribers:
-      tasks = []
-      for callback in self._subscribers[event.value]:
-        tasks.append(asyncio.create_task(callback(*args, **kwargs)))
-      if tasks:
-        await asyncio.gather(*tasks, return_exceptions=True)
+    if self.recorder is not None:
+      self.recorder.record(event, args, kwargs)
+
+    backend = self._backends.get(event)
+    if backend is not None and await backend.publish(event, args, kwargs):
+      return
+
+    await self.deliver(event, *args, **kwargs)
+
+  async def deliver(self, event: Event, *args, **kwargs) -> None:
+    """Уведомление подписчиков этого процесса, минуя use_backend().
+
+    Так события, прочитанные из Redis, передаются подписчикам.
+
+    Args:
+      event (Event): Событие.
+      *args: Аргументы, которые будут переданы в функции обратного вызова.
+      **kwargs: Ключевые аргументы, которые будут переданы в функции обратного вызова.
+    """
+    dispatch = self._dispatch.get(event)
+    if dispatch is None:
+      return
+
+    queue = self._queues.get(event)
+    if queue is not None:
+      await queue.put(args, kwargs)
+    else:
+      await dispatch(*args, **kwargs)
+
+  async def _dispatch_now(self, event: Event, *args, **kwargs) -> None:
+    # Подписчики могли добавиться после configure(): берем текущую таблицу
+    dispatch = self._dispatch.get(event)
+    if dispatch is not None:
+      await dispatch(*args, **kwargs)
+
+  def notify_nowait(self, event: Event, *args, **kwargs) -> Optional[asyncio.Task]:
+    """Уведомление подписчиков без ожидания (fire-and-forget).
+
+    Рассылка выполняется в фоновой задаче; вызывающий продолжает работу сразу.
+    Для события с очередью оно ставится в очередь (при заполненной очереди
+    BLOCK - из фоновой задачи, когда освободится место).
+
+    Args:
+      event (Event): Название события, о котором нужно уведомить подписчиков.
+      *args: Аргументы, которые будут переданы в функции обратного вызова.
+      **kwargs: Ключевые аргументы, которые будут переданы в функции обратного вызова.
+
+    Returns:
+      Optional[asyncio.Task]: Фоновая задача (в том числе публикации в Redis) или None,
+      если она не понадобилась (подписчиков нет или событие сразу встало в очередь).
+    """
+    dispatch = self._dispatch.get(event)
+    queue = self._queues.get(event)
+
+    if event in self._backends:
+      work = self.notify(event, *args, **kwargs)
+    else:
+      if self.recorder is not None:
+        self.recorder.record(event, args, kwargs)
+
+      if dispatch is None:
+        return None
+      elif queue is None:
+        work = dispatch(*args, **kwargs)
+      elif queue.put_nowait(args, kwargs):
+        return None
+      else:
+        work = queue.put(args, kwargs)
+
+    task = asyncio.get_running_loop().create_task(work)
+    self._background.add(task)
+    task.add_done_callback(self._background.discard)
+    return task
 
 
 # !SECTION
 
 # SECTION NoServerRoute
 
+# Значение fallback по умолчанию: при таймауте вызывающий получает RouteTimeout
+noFallback: Any = object()
+
+# Сколько разных наборов аргументов запоминается для одного маршрута
+routeCacheSize = 256
+
+class RouteTimeout(asyncio.TimeoutError):
+  """Маршрут не ответил за отведенное время, а fallback не задан."""
+
+class Route:
+  """Маршрут NoServerRoute: обработчик, его параметры, кеш и счетчики."""
+  __slots__ = ('callback', 'timeout', 'fallback', 'ttl', 'coalesce', 'invalidates',
+               'memo', 'inflight', 'generation', 'latency',
+               'calls', 'errors', 'timeouts', 'hits', 'misses', 'coalesced')
+
+  def __init__(self,
+               callback: Callable,
+               timeout: Optional[float] = None,
+               fallback: Any = noFallback,
+               ttl: float = 0,
+               coalesce: bool = False,
+               invalidates: Tuple[str, ...] = ()) -> None:
+    self.callback: Callable = callback
+    self.timeout: Optional[float] = timeout
+    self.fallback: Any = fallback
+    self.ttl: float = ttl
+    # Запоминаемый маршрут всегда объединяет одинаковые вызовы
+    self.coalesce: bool = coalesce or ttl > 0
+    self.invalidates: Tuple[str, ...] = tuple(invalidates)
+
+    self.memo: Optional[TTLCache] = TTLCache(maxsize=routeCacheSize, ttl=ttl) if ttl > 0 else None
+    # ключ -> (поколение кеша, задача)
+    self.inflight: Dict[Any, Tuple[int, asyncio.Task]] = {}
+    self.generation: int = 0
+    self.latency: Histogram = Histogram()
+
+    self.calls: int = 0
+    self.errors: int = 0
+    self.timeouts: int = 0
+    self.hits: int = 0
+    self.misses: int = 0
+    self.coalesced: int = 0
+
+  def invalidate(self) -> None:
+    """Забывает запомненные ответы; ответы идущих вызовов тоже не запоминаются."""
+    self.generation += 1
+    if self.memo is not None:
+      self.memo.clear()
+
+  def stats(self) -> Dict[str, Any]:
+    """Снимок счетчиков маршрута."""
+    return {
+      "calls": self.calls,
+      "errors": self.errors,
+      "timeouts": self.timeouts,
+      "hits": self.hits,
+      "misses": self.misses,
+      "coalesced": self.coalesced,
+      "cached": len(self.memo) if self.memo is not None else 0,
+      "latency": self.latency.snapshot(),
+    }
+
+def _route_key(args: tuple, kwargs: dict) -> Any:
+  # Ключ кеша по аргументам; None, если аргументы нехешируемые
+  key = (args, frozenset(kwargs.items())) if kwargs else args
+  try:
+    hash(key)
+  except TypeError:
+    return None
+  return key
+
 class NoServerRoute:
   def __init__(self) -> None:
-    self._routes: Dict[str, Callable] = {}
+    self._routes: Dict[str, Route] = {}
+
+  def create_route(self,
+                   route: str,
+                   timeout: Optional[float] = None,
+                   fallback: Any = noFallback,
+                   ttl: float = 0,
+                   coalesce: bool = False,
+                   invalidates: Tuple[str, ...] = ()) -> Callable:
+    """Декоратор для регистрации маршрута.
 
-  def create_route(self, route: str) -> Callable:
+    Args:
+      route (str): Имя маршрута.
+      timeout (Optional[float]): Сколько секунд ждать ответа (None - без ограничения).
+      fallback (Any): Что вернуть при таймауте; если не задан, call_route() выбрасывает RouteTimeout.
+      ttl (float): Сколько секунд помнить ответ для тех же аргументов (0 - не помнить); None не запоминается.
+      coalesce (bool): Объединять одновременные вызовы с теми же аргументами в один (при ttl - всегда).
+      invalidates (Tuple[str, ...]): Маршруты, запомненные ответы которых сбрасываются после вызова этого.
 
+    Returns:
+      Callable: Декоратор, возвращающий обработчик без изменений.
+    """
     def decorator(callback: Callable) -> Callable:
-      self._routes[route] = callback
+      self._routes[route] = Route(callback, timeout=timeout, fallback=fallback, ttl=ttl,
+                                  coalesce=coalesce, invalidates=invalidates)
       return callback
-    
+
     return decorator
-  
+
   async def call_route(self, route: str, *argc, **kwargs):
-    if not route in self._routes:
+    entry = self._routes.get(route)
+    if entry is None:
       return None
-    
-    return await self._routes[route](*argc, **kwargs)
+
+    entry.calls += 1
+    key = _route_key(argc, kwargs) if entry.coalesce else None
+
+    if key is None:
+      work = self._run(entry, None, entry.generation, argc, kwargs)
+    else:
+      if entry.memo is not None and key in entry.memo:
+        entry.hits += 1
+        return entry.memo[key]
+
+      inflight = entry.inflight.get(key)
+      if inflight is not None and inflight[0] == entry.generation:
+        entry.coalesced += 1
+        task = inflight[1]
+      else:
+        entry.misses += 1
+        task = asyncio.ensure_future(self._run(entry, key, entry.generation, argc, kwargs))
+        # Ошибку получат ожидающие; если все они отменились или вышли по таймауту - не ругаемся
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        entry.inflight[key] = (entry.generation, task)
+      # shield: таймаут или отмена одного ожидающего не отменяет общий вызов
+      work = asyncio.shield(task)
+
+    if entry.timeout is None:
+      return await work
+
+    try:
+      return await asyncio.wait_for(work, entry.timeout)
+    except asyncio.TimeoutError:
+      entry.timeouts += 1
+      if entry.fallback is noFallback:
+        raise RouteTimeout(f"Маршрут {route} не ответил за {entry.timeout} с") from None
+      return entry.fallback
+
+  async def _run(self, entry: Route, key: Any, generation: int, args: tuple, kwargs: dict) -> Any:
+    # generation - поколение кеша на момент вызова: задача могла стартовать уже после invalidate()
+    started = time.perf_counter()
+    try:
+      result = await entry.callback(*args, **kwargs)
+    except Exception:
+      entry.errors += 1
+      raise
+    finally:
+      entry.latency.observe(time.perf_counter() - started)
+      if key is not None and entry.inflight.get(key, (None, None))[0] == generation:
+        del entry.inflight[key]
+
+    # None - "нет данных" (в том числе нет соединения): его не запоминаем
+    if entry.memo is not None and result is not None and generation == entry.generation:
+      entry.memo[key] = result
+
+    for route in entry.invalidates:
+      self.invalidate(route)
+    return result
+
+  def invalidate(self, route: str) -> None:
+    """Сбрасывает запомненные ответы маршрута.
+
+    Args:
+      route (str): Имя маршрута.
+    """
+    entry = self._routes.get(route)
+    if entry is not None:
+      entry.invalidate()
+
+  def stats(self) -> Dict[str, Dict[str, Any]]:
+    """Счетчики и задержки всех маршрутов.
+
+    Returns:
+      Dict[str, Dict[str, Any]]: {маршрут: Route.stats()}.
+    """
+    return {route: entry.stats() for route, entry in self._routes.items()}
 
 
 # !SECTION
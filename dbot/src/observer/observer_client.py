@@ -1,6 +1,11 @@
 from observer.observer import Observer, Event, Param, NoServerRoute
+from observer.event_queue import OverflowPolicy
+from observer.redis_streams import RedisStreamBackend
+from observer.recorder import EventRecorder
 from logger.log import Log
 
+import atexit
+
 class TextStyle:
   """ANSI Codes for Text Styles"""
   Default = "\x1b[0m"  # Сбрасывает все виды форматирования (включая цвет)
@@ -36,4 +41,79 @@ class Color:
 # -- Init Objects
 logger: Log = Log()
 observer: Observer = Observer()
-nsroute: NoServerRoute = NoServerRoute()
\ No newline at end of file
+nsroute: NoServerRoute = NoServerRoute()
+
+# -- Subscriber monitoring
+def log_slow_subscriber(event: Event, name: str, elapsed: float) -> None:
+  logger.info(f"Observer: медленный подписчик {name} на {event.value}: {elapsed * 1000:.0f} мс")
+
+def log_subscriber_error(event: Event, name: str, err: BaseException) -> None:
+  logger.exception(f"Observer: ошибка в подписчике {name} на {event.value}: {err!r}")
+
+observer.on_slow = log_slow_subscriber
+observer.on_error = log_subscriber_error
+
+# -- Redis Streams
+stream_events: list = []
+stream_backend: RedisStreamBackend = None
+stream_consume: bool = True
+
+# -- configure_observer
+def configure_observer(settings) -> None:
+  """
+    Настраивает observer по настройкам бота: очереди событий, запись событий и Redis Streams.
+    Вызывается точкой входа (app.py) один раз до запуска бота, чтобы сам пакет observer
+    не зависел от config.py.
+
+    :param settings: Модуль config или объект с теми же атрибутами.
+  """
+  global stream_events, stream_backend, stream_consume
+
+  observer.slow_threshold = settings.OBSERVER_SLOW_HANDLER
+
+  # Статус с сервера: важен только последний снимок
+  observer.configure(Event.WBH_INFO, policy=OverflowPolicy.LATEST_WINS)
+  # Чат в обе стороны: по порядку, при всплеске отправитель ждет места в очереди
+  observer.configure(Event.WBH_MESSAGE, max_size=settings.EVENT_QUEUE_SIZE, policy=OverflowPolicy.BLOCK)
+  observer.configure(Event.BE_MESSAGE, max_size=settings.EVENT_QUEUE_SIZE, policy=OverflowPolicy.BLOCK)
+
+  if settings.OBSERVER_RECORD_FILE:
+    observer.recorder = EventRecorder(settings.OBSERVER_RECORD_FILE)
+    atexit.register(observer.recorder.close)
+
+  stream_events = [Event(name) for name in settings.OBSERVER_STREAM_EVENTS]
+  stream_consume = settings.OBSERVER_STREAM_CONSUME
+  if stream_events:
+    stream_backend = RedisStreamBackend(host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+                                        group=settings.OBSERVER_STREAM_GROUP)
+    observer.use_backend(stream_backend, stream_events)
+
+# -- on_ready start_stream_backend
+@observer.subscribe(Event.BE_READY)
+async def start_stream_backend():
+  if stream_backend is None or not stream_consume:
+    return
+
+  await stream_backend.start(observer, stream_events)
+  logger.info(f"Observer: события {', '.join(event.value for event in stream_events)} читаются из Redis "
+              f"(группа {stream_backend.group}, потребитель {stream_backend.consumer})")
+
+# -- (route) observer_stats
+@nsroute.create_route("/observer/stats")
+async def route_observer_stats() -> dict:
+  return observer.stats()
+
+# -- (route) observer_subscribers
+@nsroute.create_route("/observer/subscribers")
+async def route_observer_subscribers() -> dict:
+  return observer.subscriber_stats()
+
+# -- (route) nsroute_stats
+@nsroute.create_route("/nsroute/stats")
+async def route_nsroute_stats() -> dict:
+  return nsroute.stats()
+
+# -- (route) observer_streams
+@nsroute.create_route("/observer/streams")
+async def route_observer_streams() -> dict:
+  return stream_backend.stats() if stream_backend is not None else None
\ No newline at end of file
@@ -0,0 +1,195 @@
+import asyncio
+import gzip
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from observer.observer import Event, Param
+
+# Записи копятся в памяти и дописываются в файл пачкой:
+# по числу записей или по времени с прошлой записи на диск
+recordFlushEvents = 100
+recordFlushInterval = 1.0
+
+# Ключ-перечисление Param в словаре аргументов записывается строкой "Param.<имя>"
+paramPrefix = "Param."
+# Значение, которое нельзя записать (объекты Discord и т.п.): {"omitted": "<имя типа>"}
+omittedKey = "omitted"
+
+# -- sanitize()
+def sanitize(value: Any) -> Any:
+  """
+  Аргументы события в виде, пригодном для JSON.
+
+  Словари и списки обходятся рекурсивно. Объекты, которых нет в JSON
+  (discord.Interaction, discord.Message и т.п.), заменяются на
+  {"omitted": "<имя типа>"}; ключи Param - на строки "Param.<имя>".
+  """
+  if value is None or isinstance(value, (bool, int, float, str)):
+    return value
+  if isinstance(value, (list, tuple)):
+    return [sanitize(item) for item in value]
+  if isinstance(value, dict):
+    return {_key(key): sanitize(item) for key, item in value.items()}
+  return {omittedKey: type(value).__name__}
+
+# -- _key()
+def _key(key: Any) -> str:
+  if isinstance(key, Param):
+    return paramPrefix + key.name
+  return key if isinstance(key, str) else str(key)
+
+# -- restore()
+def restore(value: Any, stub: Callable[[str], Any]) -> Any:
+  """
+  Обратное к sanitize(): ключи "Param.<имя>" снова становятся Param,
+  а пропущенные объекты заменяются заглушками.
+
+  :param value: Значение из записи.
+  :param stub: Фабрика заглушек: получает имя типа пропущенного объекта.
+  """
+  if isinstance(value, list):
+    return [restore(item, stub) for item in value]
+  if not isinstance(value, dict):
+    return value
+  if len(value) == 1 and isinstance(value.get(omittedKey), str):
+    return stub(value[omittedKey])
+
+  result = {}
+  for key, item in value.items():
+    if key.startswith(paramPrefix) and key[len(paramPrefix):] in Param.__members__:
+      key = Param[key[len(paramPrefix):]]
+    result[key] = restore(item, stub)
+  return result
+
+# -- read_recording()
+def read_recording(path: str) -> Iterator[Tuple[float, str, List[Any], Dict[str, Any]]]:
+  """
+  Читает запись событий.
+
+  :param path: Файл, записанный EventRecorder.
+  :return: (время, событие, args, kwargs) в порядке записи; args и kwargs - как после sanitize().
+  """
+  with gzip.open(path, 'rt', encoding='utf-8') as file:
+    for line in file:
+      if not line.strip():
+        continue
+      record = json.loads(line)
+      yield record["ts"], record["event"], record["args"], record["kwargs"]
+
+# SECTION Class EventRecorder
+class EventRecorder:
+  """
+  Запись всех событий Observer в сжатый файл (gzip, одна JSON-строка на событие).
+
+  Файл только дописывается: каждая пачка записей - отдельный член gzip,
+  так что запись можно продолжать после перезапуска, а оборванный
+  последний член теряет только свою пачку. Ошибки записи на диск
+  не мешают рассылке событий, а только считаются.
+
+  Внутри цикла событий пачки сжимаются и пишутся в отдельном потоке,
+  по одной и по порядку; без цикла - сразу в вызывающем потоке.
+  """
+  # -- __init__()
+  def __init__(self,
+               path: str,
+               flush_events: int = recordFlushEvents,
+               flush_interval: float = recordFlushInterval) -> None:
+    """
+    :param path: Файл записи.
+    :param flush_events: Сколько записей копить перед записью на диск.
+    :param flush_interval: Через сколько секунд записывать накопленное, даже если записей меньше.
+    """
+    self.path: str = path
+    self.flush_events: int = flush_events
+    self.flush_interval: float = flush_interval
+
+    self._buffer: List[str] = []
+    self._last_flush: float = time.monotonic()
+    # Поток записи создается при первой пачке из цикла событий
+    self._writer: Optional[ThreadPoolExecutor] = None
+    self._pending: List[Future] = []
+
+    self.recorded: int = 0
+    self.errors: int = 0
+
+  # -- record()
+  def record(self, event: Event, args: tuple, kwargs: dict) -> None:
+    """Добавляет событие в запись."""
+    line = json.dumps({
+      "ts": time.time(),
+      "event": event.value,
+      "args": sanitize(args),
+      "kwargs": sanitize(kwargs),
+    }, ensure_ascii=False, separators=(',', ':'))
+
+    self._buffer.append(line)
+    self.recorded += 1
+
+    if len(self._buffer) >= self.flush_events or time.monotonic() - self._last_flush >= self.flush_interval:
+      self.flush()
+
+  # -- flush()
+  def flush(self) -> None:
+    """
+    Дописывает накопленные записи в файл.
+
+    Из цикла событий пачка уходит потоку записи и метод не ждет диска;
+    без цикла пачка пишется сразу, после уже отданных потоку.
+    """
+    self._last_flush = time.monotonic()
+    if not self._buffer:
+      return
+
+    lines, self._buffer = self._buffer, []
+    try:
+      asyncio.get_running_loop()
+    except RuntimeError:
+      self._drain()
+      self._write(lines)
+      return
+
+    if self._writer is None:
+      self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="EventRecorder")
+    self._pending = [future for future in self._pending if not future.done()]
+    self._pending.append(self._writer.submit(self._write, lines))
+
+  # -- close()
+  def close(self) -> None:
+    """Записывает остаток на диск и ждет поток записи (для atexit)."""
+    self._drain()
+    if self._buffer:
+      lines, self._buffer = self._buffer, []
+      self._write(lines)
+
+    if self._writer is not None:
+      self._writer.shutdown(wait=True)
+      self._writer = None
+
+  # -- _drain()
+  def _drain(self) -> None:
+    """Ждет пачки, отданные потоку записи."""
+    pending, self._pending = self._pending, []
+    wait(pending)
+
+  # -- _write()
+  def _write(self, lines: List[str]) -> None:
+    try:
+      with gzip.open(self.path, 'at', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    except OSError:
+      self.errors += 1
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """Счетчики записи."""
+    return {
+      "path": self.path,
+      "recorded": self.recorded,
+      "buffered": len(self._buffer),
+      "writing": sum(not future.done() for future in self._pending),
+      "errors": self.errors,
+    }
+
+# !SECTION
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import os
+import socket
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from redis import asyncio as aioredis
+
+if TYPE_CHECKING:
+  from observer.observer import Event, Observer
+
+# Префикс ключей потоков: один поток Redis на событие
+streamPrefix = "dbot:events:"
+# Сколько записей хранит поток (MAXLEN ~): обработанные записи вытесняются
+streamMaxLen = 10000
+
+# SECTION StreamError
+class StreamError(Exception):
+  """Базовый класс для исключений RedisStreamBackend."""
+  pass
+
+# -- StreamEncodeError
+class StreamEncodeError(StreamError):
+  """Аргументы события нельзя передать через Redis (не сериализуются в JSON)."""
+  pass
+# !SECTION
+
+# -- encode_event()
+def encode_event(args: tuple, kwargs: dict) -> Dict[str, str]:
+  """
+  Поля записи потока для аргументов события.
+
+  :param args: Позиционные аргументы notify().
+  :param kwargs: Ключевые аргументы notify().
+  :return: Поля записи ("args" и "kwargs" в JSON).
+  :raises StreamEncodeError: Если аргументы не сериализуются в JSON
+    (например, discord.Interaction или ключи-перечисления Param).
+  """
+  try:
+    return {
+      "args": json.dumps(args, ensure_ascii=False, separators=(',', ':')),
+      "kwargs": json.dumps(kwargs, ensure_ascii=False, separators=(',', ':')),
+    }
+  except (TypeError, ValueError) as err:
+    raise StreamEncodeError(f"Событие нельзя передать через Redis: {err}")
+
+# -- decode_event()
+def decode_event(fields: Dict[Any, Any]) -> Tuple[list, dict]:
+  """
+  Аргументы события из полей записи потока.
+
+  :raises StreamError: Если запись повреждена.
+  """
+  try:
+    args = fields.get(b"args", fields.get("args"))
+    kwargs = fields.get(b"kwargs", fields.get("kwargs"))
+    args, kwargs = json.loads(args), json.loads(kwargs)
+  except (TypeError, ValueError) as err:
+    raise StreamError(f"Поврежденная запись потока: {err}")
+
+  if not isinstance(args, list) or not isinstance(kwargs, dict):
+    raise StreamError("Поврежденная запись потока: неверные args/kwargs")
+  return args, kwargs
+
+# SECTION Class RedisStreamBackend
+class RedisStreamBackend:
+  """
+  Передача событий Observer между процессами через Redis Streams.
+
+  publish() добавляет событие в поток "<prefix><event>" (XADD). start()
+  запускает чтение потоков в группе потребителей (XREADGROUP): каждая
+  запись достается одному процессу группы и передается в Observer.deliver()
+  этого процесса, после чего подтверждается (XACK). Процессы с разными
+  group получают все события, процессы одной группы делят их между собой.
+
+  Записи, не подтвержденные после падения процесса, при перезапуске
+  с тем же consumer обрабатываются заново; записи других потребителей,
+  висящие дольше claim_idle, забираются через XAUTOCLAIM.
+  """
+  # -- __init__()
+  def __init__(self,
+               host: str = '127.0.0.1',
+               port: int = 6379,
+               db: int = 0,
+               group: str = "dbot",
+               consumer: Optional[str] = None,
+               prefix: str = streamPrefix,
+               max_len: int = streamMaxLen,
+               batch: int = 64,
+               block: float = 1.0,
+               claim_idle: float = 60.0) -> None:
+    """
+    :param host: Хост Redis.
+    :param port: Порт Redis.
+    :param db: Номер базы.
+    :param group: Группа потребителей.
+    :param consumer: Имя потребителя в группе; по умолчанию "<hostname>-<pid>".
+    :param prefix: Префикс ключей потоков.
+    :param max_len: Примерная максимальная длина потока.
+    :param batch: Сколько записей читается за один XREADGROUP.
+    :param block: Сколько секунд XREADGROUP ждет новых записей.
+    :param claim_idle: Через сколько секунд чужая неподтвержденная запись забирается себе.
+    """
+    self.host: str = host
+    self.port: int = port
+    self.db: int = db
+    self.group: str = group
+    self.consumer: str = consumer or f"{socket.gethostname()}-{os.getpid()}"
+    self.prefix: str = prefix
+    self.max_len: int = max_len
+    self.batch: int = batch
+    self.block: float = block
+    self.claim_idle: float = claim_idle
+
+    # Соединение устанавливается при первой команде
+    self.redis: aioredis.Redis = aioredis.Redis.from_url(f"redis://{host}:{port}/{db}")
+
+    self._streams: Dict[str, "Event"] = {}
+    self._task: Optional[asyncio.Task] = None
+
+    self.published: int = 0
+    self.publish_errors: int = 0
+    self.unencodable: int = 0
+    self.consumed: int = 0
+    self.claimed: int = 0
+    self.malformed: int = 0
+    self.read_errors: int = 0
+
+  # -- stream()
+  def stream(self, event: "Event") -> str:
+    """Ключ потока события."""
+    return self.prefix + event.value
+
+  # -- publish()
+  async def publish(self, event: "Event", args: tuple, kwargs: dict) -> bool:
+    """
+    Добавляет событие в его поток.
+
+    :return: False, если событие не удалось передать (аргументы не
+      сериализуются или Redis недоступен) - тогда его нужно обработать локально.
+    """
+    try:
+      fields = encode_event(args, kwargs)
+    except StreamEncodeError:
+      self.unencodable += 1
+      return False
+
+    try:
+      await self.redis.xadd(self.stream(event), fields, maxlen=self.max_len, approximate=True)
+    except aioredis.RedisError:
+      self.publish_errors += 1
+      return False
+
+    self.published += 1
+    return True
+
+  # -- start()
+  async def start(self, observer: "Observer", events: Iterable["Event"]) -> None:
+    """
+    Запускает чтение потоков событий в группе потребителей.
+
+    Группы создаются при первом чтении; пока Redis недоступен, чтение
+    повторяется каждые block секунд.
+
+    :param observer: Observer, в котором вызываются подписчики.
+    :param events: События, которые этот процесс читает из Redis.
+    """
+    await self.stop()
+    self._streams = {self.stream(event): event for event in events}
+
+    if self._streams:
+      self._task = asyncio.create_task(self._consume(observer))
+
+  # -- stop()
+  async def stop(self) -> None:
+    """Останавливает чтение потоков."""
+    if self._task is None:
+      return
+
+    # _consume() выходит и сам, увидев, что он больше не текущая задача чтения:
+    # redis-py может поглотить отмену, пришедшую посреди чтения ответа
+    task, self._task = self._task, None
+    task.cancel()
+    try:
+      await task
+    except asyncio.CancelledError:
+      pass
+
+  # -- close()
+  async def close(self) -> None:
+    """Останавливает чтение и закрывает соединения с Redis."""
+    await self.stop()
+    await self.redis.aclose()
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """Счетчики передачи событий."""
+    return {
+      "group": self.group,
+      "consumer": self.consumer,
+      "streams": list(self._streams),
+      "published": self.published,
+      "publish_errors": self.publish_errors,
+      "unencodable": self.unencodable,
+      "consumed": self.consumed,
+      "claimed": self.claimed,
+      "malformed": self.malformed,
+      "read_errors": self.read_errors,
+    }
+
+  # -- _consume()
+  async def _consume(self, observer: "Observer") -> None:
+    loop = asyncio.get_running_loop()
+    groups_ready = False
+    # Сначала свои записи, не подтвержденные до перезапуска
+    pending = True
+    next_claim = loop.time() + self.claim_idle
+
+    while self._task is asyncio.current_task():
+      try:
+        if not groups_ready:
+          await self._create_groups()
+          groups_ready = True
+
+        # Чужие записи забираются только после своих: XAUTOCLAIM отдает и их
+        if not pending and loop.time() >= next_claim:
+          next_claim = loop.time() + self.claim_idle
+          await self._claim(observer)
+
+        start_id = "0" if pending else ">"
+        response = await self.redis.xreadgroup(
+          self.group, self.consumer, {stream: start_id for stream in self._streams},
+          count=self.batch, block=None if pending else int(self.block * 1000))
+
+        handled = 0
+        for stream, entries in self._entries(response):
+          handled += await self._handle(observer, stream, entries)
+
+        # Своих неподтвержденных записей больше нет - читаем новые
+        if pending and not handled:
+          pending = False
+      except asyncio.CancelledError:
+        raise
+      except aioredis.RedisError as err:
+        # Поток или группу удалили (FLUSHDB, DEL) - создаем заново
+        if "NOGROUP" in str(err):
+          groups_ready = False
+        self.read_errors += 1
+        await asyncio.sleep(self.block)
+
+  # -- _create_groups()
+  async def _create_groups(self) -> None:
+    for stream in self._streams:
+      try:
+        await self.redis.xgroup_create(stream, self.group, id="$", mkstream=True)
+      except aioredis.ResponseError as err:
+        # Группа уже есть - это нормально при перезапуске
+        if "BUSYGROUP" not in str(err):
+          raise
+
+  # -- _claim()
+  async def _claim(self, observer: "Observer") -> None:
+    for stream in self._streams:
+      response = await self.redis.xautoclaim(stream, self.group, self.consumer,
+                                             min_idle_time=int(self.claim_idle * 1000), count=self.batch)
+      entries = response[1] if response and len(response) > 1 else []
+      self.claimed += len(entries)
+      await self._handle(observer, stream, entries)
+
+  # -- _entries()
+  @staticmethod
+  def _entries(response: Any) -> List[Tuple[str, list]]:
+    # В зависимости от версии redis-py и протокола: список пар [поток, записи],
+    # словарь {поток: записи} или словарь {поток: [записи]}
+    if not response:
+      return []
+
+    result = []
+    for stream, entries in (response.items() if isinstance(response, dict) else response):
+      if len(entries) == 1 and isinstance(entries[0], list):
+        entries = entries[0]
+      result.append((stream.decode() if isinstance(stream, bytes) else stream, entries))
+    return result
+
+  # -- _handle()
+  async def _handle(self, observer: "Observer", stream: Any, entries: list) -> int:
+    if isinstance(stream, bytes):
+      stream = stream.decode()
+    event = self._streams.get(stream)
+
+    for entry_id, fields in entries:
+      # Запись удалена из потока (MAXLEN), но осталась в списке ожидания
+      if fields is None:
+        if entry_id is not None:
+          await self.redis.xack(stream, self.group, entry_id)
+        continue
+
+      try:
+        args, kwargs = decode_event(fields)
+      except StreamError:
+        self.malformed += 1
+      else:
+        self.consumed += 1
+        await observer.deliver(event, *args, **kwargs)
+
+      await self.redis.xack(stream, self.group, entry_id)
+
+    return len(entries)
+
+# !SECTION
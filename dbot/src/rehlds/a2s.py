@@ -0,0 +1,391 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import struct
+import time
+
+# Заголовки пакетов A2S
+singleHeader = b'\xFF\xFF\xFF\xFF'
+splitHeader = b'\xFE\xFF\xFF\xFF'
+
+# Запросы
+a2sInfoRequest = singleHeader + b'TSource Engine Query\x00'
+a2sPlayerRequest = singleHeader + b'U'
+
+# Типы ответов
+s2cChallenge = ord('A')
+s2aInfo = ord('I')
+s2aInfoGoldSrc = ord('m')
+s2aPlayer = ord('D')
+
+# Сколько раз повторять запрос, если сервер прислал новый challenge
+maxChallengeRetries = 2
+
+# SECTION Исключения A2S
+# -- A2SError
+class A2SError(Exception):
+  """Базовый класс для исключений A2S."""
+  pass
+
+# -- A2STimeout
+class A2STimeout(A2SError):
+  """Исключение для запроса, на который сервер не ответил вовремя."""
+  pass
+
+# -- MalformedResponse
+class MalformedResponse(A2SError):
+  """Исключение для ответа, который не удалось разобрать."""
+  pass
+
+# !SECTION
+
+# SECTION Results
+# -- ServerInfo
+class ServerInfo:
+  """Ответ на A2S_INFO."""
+  __slots__ = ('name', 'map', 'folder', 'game', 'players', 'max_players', 'bots',
+               'server_type', 'environment', 'password', 'vac', 'version')
+
+  def __init__(self, name: str, map: str, folder: str, game: str, players: int, max_players: int,
+               bots: int = 0, server_type: str = 'd', environment: str = 'l',
+               password: bool = False, vac: bool = False, version: str = '') -> None:
+    self.name: str = name
+    self.map: str = map
+    self.folder: str = folder
+    self.game: str = game
+    self.players: int = players
+    self.max_players: int = max_players
+    self.bots: int = bots
+    self.server_type: str = server_type
+    self.environment: str = environment
+    self.password: bool = password
+    self.vac: bool = vac
+    self.version: str = version
+
+  def __repr__(self) -> str:
+    return f"ServerInfo({self.name!r}, map={self.map!r}, players={self.players}/{self.max_players})"
+
+# -- A2SPlayer
+class A2SPlayer:
+  """Игрок из ответа на A2S_PLAYER."""
+  __slots__ = ('index', 'name', 'score', 'duration')
+
+  def __init__(self, index: int, name: str, score: int, duration: float) -> None:
+    self.index: int = index
+    self.name: str = name
+    self.score: int = score
+    self.duration: float = duration
+
+  def __repr__(self) -> str:
+    return f"A2SPlayer({self.name!r}, score={self.score}, duration={self.duration:.0f})"
+
+# !SECTION
+
+# SECTION Parsing
+# -- _Reader
+class _Reader:
+  """Последовательное чтение полей ответа A2S (little-endian, строки с нулем в конце)."""
+  __slots__ = ('data', 'pos')
+
+  def __init__(self, data: bytes, pos: int = 0) -> None:
+    self.data: bytes = data
+    self.pos: int = pos
+
+  def _unpack(self, fmt: str, size: int) -> Any:
+    if self.pos + size > len(self.data):
+      raise MalformedResponse("Ответ A2S обрезан.")
+    value = struct.unpack_from(fmt, self.data, self.pos)[0]
+    self.pos += size
+    return value
+
+  def byte(self) -> int:
+    return self._unpack('<B', 1)
+
+  def short(self) -> int:
+    return self._unpack('<h', 2)
+
+  def long(self) -> int:
+    return self._unpack('<l', 4)
+
+  def float(self) -> float:
+    return self._unpack('<f', 4)
+
+  def char(self) -> str:
+    return chr(self.byte())
+
+  def string(self) -> str:
+    end = self.data.find(b'\x00', self.pos)
+    if end < 0:
+      raise MalformedResponse("Ответ A2S обрезан.")
+    value = self.data[self.pos:end].decode('utf-8', errors='replace')
+    self.pos = end + 1
+    return value
+
+  @property
+  def remaining(self) -> int:
+    return len(self.data) - self.pos
+
+# -- parse_info()
+def parse_info(payload: bytes) -> ServerInfo:
+  """
+  Разбирает ответ на A2S_INFO (без заголовка 0xFFFFFFFF).
+
+  Понимает и формат Source ('I'), которым отвечают современные HLDS/ReHLDS,
+  и устаревший формат GoldSrc ('m').
+
+  :raises MalformedResponse: Если ответ не удалось разобрать.
+  """
+  reader = _Reader(payload, 1)
+  kind = payload[0] if payload else None
+
+  if kind == s2aInfo:
+    reader.byte()  # версия протокола
+    name, map_name, folder, game = reader.string(), reader.string(), reader.string(), reader.string()
+    reader.short()  # Steam App ID
+    players, max_players, bots = reader.byte(), reader.byte(), reader.byte()
+    server_type, environment = reader.char(), reader.char()
+    password, vac = bool(reader.byte()), bool(reader.byte())
+    version = reader.string() if reader.remaining else ''
+    return ServerInfo(name, map_name, folder, game, players, max_players, bots,
+                      server_type, environment, password, vac, version)
+
+  if kind == s2aInfoGoldSrc:
+    reader.string()  # адрес сервера
+    name, map_name, folder, game = reader.string(), reader.string(), reader.string(), reader.string()
+    players, max_players = reader.byte(), reader.byte()
+    reader.byte()  # версия протокола
+    server_type, environment = reader.char(), reader.char()
+    password = bool(reader.byte())
+    if reader.byte():  # это мод: ссылки, версия, размер, тип, своя dll
+      reader.string(), reader.string(), reader.byte(), reader.long(), reader.long(), reader.byte(), reader.byte()
+    vac, bots = bool(reader.byte()), reader.byte()
+    return ServerInfo(name, map_name, folder, game, players, max_players, bots,
+                      server_type.lower(), environment, password, vac)
+
+  raise MalformedResponse(f"Неожиданный тип ответа A2S_INFO: {payload[:1]!r}")
+
+# -- parse_players()
+def parse_players(payload: bytes) -> List[A2SPlayer]:
+  """
+  Разбирает ответ на A2S_PLAYER (без заголовка 0xFFFFFFFF).
+
+  Игроки, которые еще подключаются, приходят с пустым ником и пропускаются.
+
+  :raises MalformedResponse: Если ответ не удалось разобрать.
+  """
+  if not payload or payload[0] != s2aPlayer:
+    raise MalformedResponse(f"Неожиданный тип ответа A2S_PLAYER: {payload[:1]!r}")
+
+  reader = _Reader(payload, 1)
+  count = reader.byte()
+
+  players: List[A2SPlayer] = []
+  for _ in range(count):
+    # Сервер может сообщить больше игроков, чем поместилось в ответ
+    if not reader.remaining:
+      break
+    player = A2SPlayer(reader.byte(), reader.string(), reader.long(), reader.float())
+    if player.name:
+      players.append(player)
+  return players
+
+# !SECTION
+
+# SECTION Class _A2SProtocol
+class _A2SProtocol(asyncio.DatagramProtocol):
+  """Складывает входящие датаграммы (и ошибки сокета) в очередь для A2SClient."""
+  # -- __init__()
+  def __init__(self) -> None:
+    self.packets: asyncio.Queue = asyncio.Queue()
+
+  # -- datagram_received()
+  def datagram_received(self, data: bytes, addr) -> None:
+    self.packets.put_nowait(data)
+
+  # -- error_received()
+  def error_received(self, exc: Exception) -> None:
+    self.packets.put_nowait(exc)
+
+# !SECTION
+
+# SECTION Class A2SClient
+class A2SClient:
+  """
+  Асинхронный клиент запросов A2S_INFO и A2S_PLAYER.
+
+  Запросы не требуют пароля и плагинов на сервере. Challenge
+  (ответ S2C_CHALLENGE) запоминается и подставляется в следующие
+  запросы; если сервер выдал новый, запрос повторяется с ним.
+  Ответы кешируются на ttl секунд, одновременные одинаковые
+  запросы ждут один обмен с сервером. Большие ответы, разбитые
+  на split-пакеты GoldSrc, собираются целиком.
+  """
+  # -- __init__()
+  def __init__(self, *, host: str, port: int = 27015, timeout: float = 2.0, ttl: float = 2.0) -> None:
+    """
+    :param host: Адрес сервера.
+    :param port: Игровой порт сервера (по умолчанию 27015).
+    :param timeout: Таймаут одного запроса в секундах.
+    :param ttl: Сколько секунд ответ считается свежим.
+    """
+    self.host: str = host
+    self.port: int = port
+    self.timeout: float = timeout
+    self.ttl: float = ttl
+
+    self._transport: Optional[asyncio.DatagramTransport] = None
+    self._protocol: Optional[_A2SProtocol] = None
+    self._lock: asyncio.Lock = asyncio.Lock()
+    self._cache: Dict[int, Tuple[float, Any]] = {}
+
+    self.challenge: Optional[bytes] = None
+
+    self.requests: int = 0
+    self.timeouts: int = 0
+    self.challenges: int = 0
+    self.hits: int = 0
+
+  # -- close()
+  def close(self) -> None:
+    """Закрывает UDP-сокет (следующий запрос откроет новый)."""
+    if self._transport:
+      self._transport.close()
+    self._transport = None
+    self._protocol = None
+    self.challenge = None
+
+  # -- stats()
+  def stats(self) -> Dict[str, int]:
+    """Счетчики запросов."""
+    return {
+      "requests": self.requests,
+      "timeouts": self.timeouts,
+      "challenges": self.challenges,
+      "hits": self.hits,
+    }
+
+  # -- info()
+  async def info(self, max_age: Optional[float] = None) -> ServerInfo:
+    """
+    Информация о сервере (A2S_INFO).
+
+    :param max_age: Допустимый возраст закешированного ответа в секундах; по умолчанию ttl.
+    :raises A2STimeout: Если сервер не ответил вовремя.
+    :raises A2SError: Если сервер недоступен или ответ не удалось разобрать.
+    """
+    return await self._cached(s2aInfo, max_age,
+                              lambda: self._query(a2sInfoRequest, (s2aInfo, s2aInfoGoldSrc), parse_info))
+
+  # -- players()
+  async def players(self, max_age: Optional[float] = None) -> List[A2SPlayer]:
+    """
+    Список игроков (A2S_PLAYER).
+
+    :param max_age: Допустимый возраст закешированного ответа в секундах; по умолчанию ttl.
+    :raises A2STimeout: Если сервер не ответил вовремя.
+    :raises A2SError: Если сервер недоступен или ответ не удалось разобрать.
+    """
+    return await self._cached(s2aPlayer, max_age,
+                              lambda: self._query(a2sPlayerRequest, (s2aPlayer,), parse_players, True))
+
+  # -- _cached()
+  async def _cached(self, kind: int, max_age: Optional[float], fetch: Callable[[], Awaitable[Any]]) -> Any:
+    max_age = self.ttl if max_age is None else max_age
+
+    # Запросы идут по одному: пока ждали блокировку, ответ мог уже прийти
+    async with self._lock:
+      entry = self._cache.get(kind)
+      if entry is not None and time.monotonic() - entry[0] <= max_age:
+        self.hits += 1
+        return entry[1]
+
+      result = await fetch()
+      self._cache[kind] = (time.monotonic(), result)
+      return result
+
+  # -- _query()
+  async def _query(self, request: bytes, expected: Tuple[int, ...], parse: Callable[[bytes], Any],
+                   needs_challenge: bool = False) -> Any:
+    await self._open()
+    self.requests += 1
+
+    for _ in range(maxChallengeRetries + 1):
+      if self.challenge is not None:
+        self._send(request + self.challenge)
+      elif needs_challenge:
+        # A2S_PLAYER без challenge: сервер ответит S2C_CHALLENGE
+        self._send(request + singleHeader)
+      else:
+        self._send(request)
+
+      payload = await self._recv()
+      if payload[0] == s2cChallenge:
+        self.challenge = payload[1:5]
+        self.challenges += 1
+        continue
+
+      if payload[0] not in expected:
+        raise MalformedResponse(f"Неожиданный тип ответа A2S: {payload[:1]!r}")
+      return parse(payload)
+
+    raise A2SError("Сервер не принял challenge.")
+
+  # -- _open()
+  async def _open(self) -> None:
+    if self._transport is not None and not self._transport.is_closing():
+      return
+
+    loop = asyncio.get_running_loop()
+    try:
+      self._transport, self._protocol = await loop.create_datagram_endpoint(
+        _A2SProtocol, remote_addr=(self.host, int(self.port)))
+    except OSError as e:
+      raise A2SError(f"Не удалось открыть сокет A2S: {e}")
+
+  # -- _send()
+  def _send(self, data: bytes) -> None:
+    # Отбрасываем опоздавшие ответы на просроченные запросы
+    packets = self._protocol.packets
+    while not packets.empty():
+      packets.get_nowait()
+
+    self._transport.sendto(data)
+
+  # -- _recv()
+  async def _recv(self) -> bytes:
+    """Принимает ответ целиком (собирая split-пакеты) и возвращает его без заголовка."""
+    deadline = time.monotonic() + self.timeout
+    parts: Dict[int, bytes] = {}
+    split_id: Optional[int] = None
+
+    while True:
+      try:
+        item: Union[bytes, Exception] = await asyncio.wait_for(
+          self._protocol.packets.get(), max(0.0, deadline - time.monotonic()))
+      except asyncio.TimeoutError:
+        self.timeouts += 1
+        raise A2STimeout(f"Сервер не ответил на запрос A2S за {self.timeout} с.")
+
+      if isinstance(item, Exception):
+        self.close()
+        raise A2SError(f"Сервер недоступен: {str(item) or type(item).__name__}")
+
+      if item.startswith(singleHeader) and len(item) > 4:
+        return item[4:]
+
+      if not item.startswith(splitHeader) or len(item) < 9:
+        raise MalformedResponse(f"Неизвестный заголовок пакета A2S: {item[:4]!r}")
+
+      # Split-пакет GoldSrc: id, байт (номер << 4 | всего), кусок исходного пакета
+      request_id = struct.unpack_from('<l', item, 4)[0]
+      number, total = item[8] >> 4, item[8] & 0x0F
+      if request_id != split_id:
+        split_id, parts = request_id, {}
+      parts[number] = item[9:]
+
+      if total and len(parts) == total:
+        data = b''.join(parts.get(i, b'') for i in range(total))
+        if not data.startswith(singleHeader) or len(data) <= 4:
+          raise MalformedResponse("Не удалось собрать split-ответ A2S.")
+        return data[4:]
+
+# !SECTION
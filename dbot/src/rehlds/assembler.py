@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional
+import struct
+
+singleHeader = b'\xFF\xFF\xFF\xFF'
+splitHeader = b'\xFE\xFF\xFF\xFF'
+printType = b'l'
+
+# Размер буфера перенаправления вывода в GoldSrc (SV_OUTPUTBUF_LENGTH = 1384).
+# Ответ такого размера почти наверняка будет продолжен следующим пакетом.
+continuationThreshold = 1000
+
+# SECTION Исключения Assembler
+# -- MalformedPacket
+class MalformedPacket(Exception):
+  """Исключение для пакета, который не удалось разобрать."""
+  pass
+
+# !SECTION
+
+# SECTION Class ResponseAssembler
+class ResponseAssembler:
+  """
+  Собирает ответ RCON из нескольких UDP-пакетов.
+
+  GoldSrc разбивает большой вывод двумя способами:
+  - split-пакеты (заголовок 0xFFFFFFFE): номер запроса, байт
+    (номер_пакета << 4 | всего_пакетов) и кусок исходного пакета;
+  - продолжения: несколько обычных пакетов 0xFFFFFFFF 'l' подряд,
+    по одному на каждый сброс буфера вывода сервера.
+
+  Класс не работает с сокетом: ему скармливают пакеты через feed(),
+  а он возвращает готовые куски текста в порядке следования.
+  """
+  # -- __init__()
+  def __init__(self, continuation_threshold: int = continuationThreshold) -> None:
+    """
+    :param continuation_threshold: Размер полезной нагрузки (в байтах), начиная с которого
+                                   ожидается пакет-продолжение.
+    """
+    self.continuation_threshold: int = continuation_threshold
+
+    self.packets: int = 0
+    self.last_size: int = 0
+
+    self._split_id: Optional[int] = None
+    self._split_total: int = 0
+    self._split_parts: Dict[int, bytes] = {}
+
+  # -- pending
+  @property
+  def pending(self) -> bool:
+    """Собраны не все части split-пакета: ответ точно не закончен."""
+    return self._split_id is not None
+
+  # -- may_continue
+  @property
+  def may_continue(self) -> bool:
+    """Последний пакет был почти полным: сервер, вероятно, пришлет продолжение."""
+    return self.last_size >= self.continuation_threshold
+
+  # -- feed()
+  def feed(self, packet: bytes) -> List[bytes]:
+    """
+    Принимает очередной пакет.
+
+    :param packet: Сырые байты датаграммы.
+    :return: Куски текста, ставшие доступными после этого пакета (может быть пустым).
+    :raises MalformedPacket: Если пакет не является ответом RCON.
+    """
+    self.packets += 1
+
+    if packet.startswith(splitHeader):
+      packet = self._feed_split(packet)
+      if packet is None:
+        return []
+
+    if not packet.startswith(singleHeader):
+      raise MalformedPacket(f"Неизвестный заголовок пакета: {packet[:4]!r}")
+
+    # 0xFFFFFFFF 'l' <текст> \0
+    payload = packet[5:] if packet[4:5] == printType else packet[4:]
+    payload = payload.rstrip(b'\x00')
+
+    self.last_size = len(payload)
+    return [payload] if payload else []
+
+  # -- _feed_split()
+  def _feed_split(self, packet: bytes) -> Optional[bytes]:
+    if len(packet) < 9:
+      raise MalformedPacket("Слишком короткий split-пакет.")
+
+    request_id = struct.unpack_from('<i', packet, 4)[0]
+    number, total = packet[8] >> 4, packet[8] & 0x0F
+
+    if total == 0 or number >= total:
+      raise MalformedPacket(f"Неверный номер split-пакета: {number}/{total}")
+
+    # Пришел новый ответ - недособранный старый уже не нужен
+    if request_id != self._split_id:
+      self._split_id = request_id
+      self._split_total = total
+      self._split_parts = {}
+
+    self._split_parts[number] = packet[9:]
+    if len(self._split_parts) < self._split_total:
+      return None
+
+    data = b''.join(self._split_parts[i] for i in range(self._split_total))
+    self._split_id = None
+    self._split_parts = {}
+    return data
+
+# !SECTION
+
+# -- decode_response()
+def decode_response(chunks: List[bytes]) -> str:
+  """
+  Склеивает куски ответа в строку, убирая завершающий перевод строки.
+
+  :param chunks: Куски, полученные из ResponseAssembler.feed().
+  :return: Текст ответа.
+  """
+  text = b''.join(chunks).decode('utf-8', errors='replace')
+  return text[:-1] if text.endswith('\n') else text
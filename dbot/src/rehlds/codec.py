@@ -0,0 +1,121 @@
+from typing import Dict, Optional, Union
+
+from rehlds.assembler import MalformedPacket, singleHeader
+
+endBytes = b'\n'
+packetSize = 8192
+
+# Готовые пакеты и префиксы
+challengePacket = singleHeader + b'getchallenge' + endBytes
+commandHead = singleHeader + b'rcon '
+badChallengeBytes = b'Bad challenge'
+
+# Сколько готовых пакетов частых команд хранится для текущего challenge
+packetCacheSize = 32
+
+# -- parse_challenge()
+def parse_challenge(packet: Union[bytes, bytearray], size: Optional[int] = None) -> str:
+  """
+  Достает challenge из ответа на getchallenge ("\\xFF\\xFF\\xFF\\xFFA00000000 <challenge> ...").
+
+  Работает прямо с байтами пакета (в том числе с буфером recv_into),
+  не превращая весь пакет в строку.
+
+  :param packet: Пакет или буфер, в начале которого лежит пакет.
+  :param size: Размер пакета в буфере; по умолчанию len(packet).
+  :return: Challenge.
+  :raises MalformedPacket: Если в пакете нет challenge.
+  """
+  words = packet[len(singleHeader):size].split(None, 2)
+  challenge = words[1].split(b'\x00', 1)[0] if len(words) > 1 else b''
+
+  if not challenge:
+    raise MalformedPacket("В ответе на getchallenge нет challenge.")
+  return challenge.decode('ascii')
+
+# SECTION Class RCONCodec
+class RCONCodec:
+  """
+  Сборка пакетов RCON без лишних копий.
+
+  Заголовок, challenge и пароль записываются в начало переиспользуемого
+  буфера один раз на challenge; для каждой команды копируется только
+  она сама. Наружу отдается memoryview на этот буфер: он действителен
+  до следующего вызова encode_command(), поэтому пакет нужно отправить сразу.
+  Пакеты команд без аргументов (status, stats, ultrahc_ds_get_info) повторяются
+  постоянно и кешируются целиком, пока не сменится challenge.
+
+  recv_buffer - переиспользуемый буфер для socket.recv_into().
+  """
+  # -- __init__()
+  def __init__(self, password: str, buffer_size: int = packetSize) -> None:
+    """
+    :param password: Пароль RCON.
+    :param buffer_size: Размер буферов отправки и приема в байтах.
+    """
+    self.password: bytes = b' ' + password.encode() + b' '
+    self.challenge: Optional[str] = None
+
+    self._prefix: bytes = b''
+    self._packets: Dict[str, bytes] = {}
+
+    self._out: bytearray = bytearray(buffer_size)
+    self._out_view: memoryview = memoryview(self._out)
+
+    self.recv_buffer: bytearray = bytearray(buffer_size)
+    self.recv_view: memoryview = memoryview(self.recv_buffer)
+
+  # -- set_challenge()
+  def set_challenge(self, challenge: str) -> None:
+    """Запоминает challenge; префикс и кеш пакетов пересобираются только при его смене."""
+    if challenge == self.challenge:
+      return
+
+    self.challenge = challenge
+    self._prefix = commandHead + challenge.encode('ascii') + self.password
+    self._packets.clear()
+
+    if len(self._prefix) < len(self._out):
+      self._out_view[:len(self._prefix)] = self._prefix
+
+  # -- encode_command()
+  def encode_command(self, challenge: str, cmd: str) -> Union[bytes, memoryview]:
+    """
+    Пакет "rcon <challenge> <password> <cmd>\\n".
+
+    :param challenge: Challenge.
+    :param cmd: Команда.
+    :return: Готовый пакет (bytes из кеша или memoryview на внутренний буфер).
+    """
+    self.set_challenge(challenge)
+
+    packet = self._packets.get(cmd)
+    if packet is not None:
+      return packet
+
+    body = cmd.encode()
+
+    if ' ' not in cmd and len(self._packets) < packetCacheSize:
+      packet = self._packets[cmd] = self._prefix + body + endBytes
+      return packet
+
+    start = len(self._prefix)
+    end = start + len(body)
+
+    # Команда длиннее буфера (большой пакет чата) - собираем обычным способом
+    if end >= len(self._out):
+      return self._prefix + body + endBytes
+
+    view = self._out_view
+    view[start:end] = body
+    view[end] = 0x0A
+    return view[:end + 1]
+
+  # -- reset()
+  def reset(self) -> None:
+    """Забывает challenge (например, после отключения)."""
+    self.challenge = None
+    self._prefix = b''
+    self._packets.clear()
+
+# !SECTION
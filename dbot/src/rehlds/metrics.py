@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Tuple
+import bisect
+
+# Границы корзин гистограммы задержек, в секундах
+latencyBuckets: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Ограничение на число типов команд: через /rcon можно отправить что угодно
+maxCommandTypes = 64
+otherCommands = "other"
+batchCommands = "batch"
+
+# SECTION Class Histogram
+class Histogram:
+  """Гистограмма с фиксированными корзинами (как в Prometheus, но без зависимостей)."""
+  __slots__ = ('bounds', 'counts', 'count', 'total', 'max')
+
+  # -- __init__()
+  def __init__(self, bounds: Tuple[float, ...] = latencyBuckets) -> None:
+    """
+    :param bounds: Возрастающие верхние границы корзин; последняя корзина (+inf) добавляется сама.
+    """
+    self.bounds: Tuple[float, ...] = bounds
+    self.counts: List[int] = [0] * (len(bounds) + 1)
+    self.count: int = 0
+    self.total: float = 0.0
+    self.max: float = 0.0
+
+  # -- observe()
+  def observe(self, value: float) -> None:
+    """Добавляет наблюдение."""
+    self.counts[bisect.bisect_left(self.bounds, value)] += 1
+    self.count += 1
+    self.total += value
+    if value > self.max:
+      self.max = value
+
+  # -- quantile()
+  def quantile(self, q: float) -> float:
+    """
+    Оценка квантиля: верхняя граница корзины, в которую он попадает.
+
+    :param q: Квантиль от 0 до 1.
+    :return: Оценка; 0.0, если наблюдений нет.
+    """
+    if not self.count:
+      return 0.0
+
+    rank = q * self.count
+    seen = 0
+    for bound, count in zip(self.bounds, self.counts):
+      seen += count
+      if seen >= rank:
+        return min(bound, self.max)
+    return self.max
+
+  # -- snapshot()
+  def snapshot(self) -> Dict[str, Any]:
+    """Снимок гистограммы для отдачи наружу."""
+    return {
+      "count": self.count,
+      "sum": self.total,
+      "max": self.max,
+      "p50": self.quantile(0.5),
+      "p90": self.quantile(0.9),
+      "p99": self.quantile(0.99),
+      "buckets": {str(bound): count for bound, count in zip(self.bounds + (float('inf'),), self.counts)},
+    }
+
+# !SECTION
+
+# -- command_type()
+def command_type(cmd: str) -> str:
+  """
+  Тип команды для метрик: первое слово в нижнем регистре.
+
+  Несколько команд через ';' считаются одним пакетом - "batch".
+  """
+  if ';' in cmd:
+    return batchCommands
+
+  parts = cmd.split(None, 1)
+  return parts[0].lower() if parts else ""
+
+# SECTION Class RCONMetrics
+class RCONMetrics:
+  """
+  Метрики обменов с сервером: задержки по типам команд, ошибки, таймауты и трафик.
+
+  Используется и в rehlds.RCON/AsyncRCON (один обмен по сети),
+  и в CSRCON (вместе с ожиданием в очереди команд).
+
+  errors - все неудачные запросы, timeouts - те из них, что упали
+  по таймауту; challenge_timeouts - таймауты запроса getchallenge.
+  """
+  # -- __init__()
+  def __init__(self) -> None:
+    self.latency: Dict[str, Histogram] = {}
+
+    self.requests: int = 0
+    self.errors: int = 0
+    self.timeouts: int = 0
+    self.challenge_timeouts: int = 0
+    self.bytes_in: int = 0
+    self.bytes_out: int = 0
+    self.packets_in: int = 0
+    self.packets_out: int = 0
+    self.connects: int = 0
+    self.connect_failures: int = 0
+
+  # -- observe()
+  def observe(self, cmd: str, elapsed: float) -> None:
+    """
+    Учитывает успешно выполненную команду.
+
+    :param cmd: Текст команды.
+    :param elapsed: Время выполнения в секундах.
+    """
+    kind = command_type(cmd)
+    if kind not in self.latency and len(self.latency) >= maxCommandTypes:
+      kind = otherCommands
+
+    histogram = self.latency.get(kind)
+    if histogram is None:
+      histogram = self.latency[kind] = Histogram()
+    histogram.observe(elapsed)
+
+  # -- sent()
+  def sent(self, size: int) -> None:
+    """Учитывает отправленную датаграмму."""
+    self.packets_out += 1
+    self.bytes_out += size
+
+  # -- received()
+  def received(self, size: int) -> None:
+    """Учитывает полученную датаграмму."""
+    self.packets_in += 1
+    self.bytes_in += size
+
+  # -- snapshot()
+  def snapshot(self) -> Dict[str, Any]:
+    """Снимок всех метрик."""
+    return {
+      "requests": self.requests,
+      "errors": self.errors,
+      "timeouts": self.timeouts,
+      "challenge_timeouts": self.challenge_timeouts,
+      "bytes_in": self.bytes_in,
+      "bytes_out": self.bytes_out,
+      "packets_in": self.packets_in,
+      "packets_out": self.packets_out,
+      "connects": self.connects,
+      "connect_failures": self.connect_failures,
+      "latency": {kind: histogram.snapshot() for kind, histogram in self.latency.items()},
+    }
+
+# !SECTION
@@ -1,10 +1,16 @@
-from io import BytesIO
-from typing import Optional
+from typing import AsyncIterator, Optional, Union
+import asyncio
+import codecs
 import socket
+import time
 
-startBytes = b'\xFF\xFF\xFF\xFF'
-endBytes = b'\n'
-packetSize = 8192
+from rehlds.assembler import ResponseAssembler, decode_response
+from rehlds.codec import RCONCodec, badChallengeBytes, challengePacket, parse_challenge
+from rehlds.metrics import RCONMetrics
+
+badChallenge = 'Bad challenge'
+# Сколько ждать пакет-продолжение после почти полного пакета (в секундах)
+continuationTimeout = 0.05
 
 # SECTION Исключения RCON
 # -- RCONError
@@ -32,6 +38,11 @@ class NoConnection(RCONError):
   """Исключение для отсутствия соединения."""
   pass
 
+# -- RequestTimeout
+class RequestTimeout(ServerOffline):
+  """Исключение для случая, когда сервер не ответил за отведенное время."""
+  pass
+
 # !SECTION
 
 # SECTION Class RCON
@@ -50,6 +61,23 @@ class RCON:
     self.password: str = password
     self.sock: Optional[socket.socket] = None
 
+    # Challenge кэшируется на время соединения и обновляется только по "Bad challenge"
+    self.challenge: Optional[str] = None
+    self.challenge_refreshes: int = 0
+
+    self.metrics: RCONMetrics = RCONMetrics()
+
+  # -- password
+  @property
+  def password(self) -> str:
+    """Пароль RCON; при смене пересобирается кодек пакетов."""
+    return self._password
+
+  @password.setter
+  def password(self, value: str) -> None:
+    self._password = value
+    self.codec: RCONCodec = RCONCodec(value)
+
   # -- connect()
   def connect(self, timeout: int = 6) -> None:
     """
@@ -61,12 +89,14 @@ class RCON:
     """
     self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     self.sock.settimeout(timeout)
+    self.metrics.connects += 1
 
     try:
       self.sock.connect((self.host, int(self.port)))
       if self.execute('stats') == 'Bad rcon_password.':
         raise BadRCONPassword("Неверный пароль RCON.")
     except Exception as e:
+      self.metrics.connect_failures += 1
       self.disconnect()
       raise BadConnection(f"Ошибка при соединении с RCON: {str(e)}")
 
@@ -76,6 +106,24 @@ class RCON:
     if self.sock:
       self.sock.close()
       self.sock = None
+    self.challenge = None
+    self.codec.reset()
+
+  # -- _sendPacket()
+  def _sendPacket(self, data: Union[bytes, memoryview]) -> None:
+    self.sock.send(data)
+    self.metrics.sent(len(data))
+
+  # -- _recvInto()
+  def _recvInto(self) -> int:
+    # Один буфер на все пакеты вместо нового bytes размером packetSize на каждый recv()
+    size = self.sock.recv_into(self.codec.recv_buffer)
+    self.metrics.received(size)
+    return size
+
+  # -- _recvPacket()
+  def _recvPacket(self) -> bytes:
+    return bytes(self.codec.recv_view[:self._recvInto()])
 
   # -- getChallenge()
   def getChallenge(self) -> str:
@@ -90,46 +138,343 @@ class RCON:
       raise NoConnection("Нет соединения с RCON.")
 
     try:
-      msg = BytesIO()
-      msg.write(startBytes)
-      msg.write(b'getchallenge')
-      msg.write(endBytes)
-      self.sock.send(msg.getvalue())
-
-      response = BytesIO(self.sock.recv(packetSize))
-      return str(response.getvalue()).split(" ")[1]
+      self._sendPacket(challengePacket)
+      self.challenge = parse_challenge(self.codec.recv_buffer, self._recvInto())
+      return self.challenge
     except Exception as e:
+      if isinstance(e, socket.timeout):
+        self.metrics.challenge_timeouts += 1
       self.disconnect()
       raise ServerOffline(f"Ошибка в getChallenge (RCON) (Возможно, сервер оффлайн): {str(e)}")
 
+  # -- _sendCommand()
+  def _sendCommand(self, challenge: str, cmd: str) -> str:
+    self._sendPacket(self.codec.encode_command(challenge, cmd))
+
+    assembler = ResponseAssembler()
+    chunks = assembler.feed(self._recvPacket())
+
+    timeout = self.sock.gettimeout()
+    try:
+      while assembler.pending or assembler.may_continue:
+        self.sock.settimeout(timeout if assembler.pending else continuationTimeout)
+        try:
+          chunks.extend(assembler.feed(self._recvPacket()))
+        except socket.timeout:
+          if assembler.pending:
+            raise
+          break
+    finally:
+      self.sock.settimeout(timeout)
+
+    return decode_response(chunks)
+
   # -- execute()
   def execute(self, cmd: str) -> str:
     """
     Выполнение команды на сервере.
 
+    Использует закэшированный challenge; новый запрашивается только
+    если сервер ответил "Bad challenge".
+
     :param cmd: Команда для выполнения.
     :return: Результат выполнения команды.
     :raises ServerOffline: Если сервер оффлайн.
     """
+    self.metrics.requests += 1
+    started = time.monotonic()
+
     try:
-      challenge = self.getChallenge()
-
-      msg = BytesIO()
-      msg.write(startBytes)
-      msg.write(b'rcon ')
-      msg.write(challenge.encode())
-      msg.write(b' ')
-      msg.write(self.password.encode())
-      msg.write(b' ')
-      msg.write(cmd.encode())
-      msg.write(endBytes)
-
-      self.sock.send(msg.getvalue())
-      response = BytesIO(self.sock.recv(packetSize))
-
-      return response.getvalue()[5:-3].decode()
+      response = self._sendCommand(self.challenge or self.getChallenge(), cmd)
+
+      if response.startswith(badChallenge):
+        self.challenge_refreshes += 1
+        response = self._sendCommand(self.getChallenge(), cmd)
+
+      self.metrics.observe(cmd, time.monotonic() - started)
+      return response
     except Exception as e:
+      self.metrics.errors += 1
+      # getChallenge заворачивает таймаут сокета в ServerOffline
+      if isinstance(e, socket.timeout) or isinstance(e.__context__, socket.timeout):
+        self.metrics.timeouts += 1
       self.disconnect()
       raise ServerOffline(f"Ошибка в execute (RCON) (Возможно, сервер оффлайн): {str(e)}")
 
 # !SECTION
+
+# SECTION Class _RCONProtocol
+class _RCONProtocol(asyncio.DatagramProtocol):
+  """
+  Протокол UDP для AsyncRCON.
+
+  Складывает входящие датаграммы (и ошибки сокета) в очередь,
+  из которой их забирает AsyncRCON.
+  """
+  # -- __init__()
+  def __init__(self) -> None:
+    self.transport: Optional[asyncio.DatagramTransport] = None
+    self.packets: asyncio.Queue = asyncio.Queue()
+    self.closed: asyncio.Future = asyncio.get_running_loop().create_future()
+
+  # -- connection_made()
+  def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+    self.transport = transport
+
+  # -- datagram_received()
+  def datagram_received(self, data: bytes, addr) -> None:
+    self.packets.put_nowait(data)
+
+  # -- error_received()
+  def error_received(self, exc: Exception) -> None:
+    # Например, ICMP port unreachable -> ConnectionRefusedError
+    self.packets.put_nowait(exc)
+
+  # -- connection_lost()
+  def connection_lost(self, exc: Optional[Exception]) -> None:
+    self.packets.put_nowait(exc or NoConnection("Соединение с RCON закрыто."))
+    if not self.closed.done():
+      self.closed.set_result(None)
+
+# !SECTION
+
+# SECTION Class AsyncRCON
+class AsyncRCON:
+  """
+  Асинхронный клиент RCON поверх asyncio.DatagramProtocol.
+
+  В отличие от RCON не блокирует цикл событий: ожидание ответа сервера
+  ограничено таймаутом на каждый запрос, а обмены с сервером
+  выполняются строго по очереди. Ответы из нескольких пакетов
+  собираются через ResponseAssembler.
+  """
+  # -- __init__()
+  def __init__(self, *, host: str, port: int = 27015, password: str, timeout: float = 3.0):
+    """
+    Инициализация класса AsyncRCON.
+
+    :param host: Адрес хоста сервера.
+    :param port: Порт сервера (по умолчанию 27015).
+    :param password: Пароль для RCON.
+    :param timeout: Таймаут одного запроса в секундах (по умолчанию 3).
+    """
+    self.host: str = host
+    self.port: int = port
+    self.password: str = password
+    self.timeout: float = timeout
+    self.continuation_timeout: float = continuationTimeout
+
+    self._transport: Optional[asyncio.DatagramTransport] = None
+    self._protocol: Optional[_RCONProtocol] = None
+    self._lock: asyncio.Lock = asyncio.Lock()
+
+    # Challenge кэшируется на время соединения и обновляется только по "Bad challenge"
+    self.challenge: Optional[str] = None
+    self.challenge_refreshes: int = 0
+
+    self.metrics: RCONMetrics = RCONMetrics()
+
+  # -- password
+  @property
+  def password(self) -> str:
+    """Пароль RCON; при смене пересобирается кодек пакетов."""
+    return self._password
+
+  @password.setter
+  def password(self, value: str) -> None:
+    self._password = value
+    self.codec: RCONCodec = RCONCodec(value)
+
+  # -- connected
+  @property
+  def connected(self) -> bool:
+    """Открыт ли UDP-транспорт."""
+    return self._transport is not None and not self._transport.is_closing()
+
+  # -- connect()
+  async def connect(self, timeout: Optional[float] = None) -> None:
+    """
+    Подключение к RCON серверу.
+
+    :param timeout: Время ожидания ответа в секундах (по умолчанию self.timeout).
+    :raises BadConnection: Если подключение не удалось.
+    :raises BadRCONPassword: Если неверный пароль RCON.
+    """
+    self.disconnect()
+    loop = asyncio.get_running_loop()
+    self.metrics.connects += 1
+
+    try:
+      self._transport, self._protocol = await loop.create_datagram_endpoint(
+        _RCONProtocol, remote_addr=(self.host, int(self.port)))
+
+      response = await self.execute('stats', timeout=timeout)
+    except Exception as e:
+      self.metrics.connect_failures += 1
+      self.disconnect()
+      raise BadConnection(f"Ошибка при соединении с RCON: {str(e)}")
+
+    if response == 'Bad rcon_password.':
+      self.metrics.connect_failures += 1
+      self.disconnect()
+      raise BadRCONPassword("Неверный пароль RCON.")
+
+  # -- disconnect()
+  def disconnect(self) -> None:
+    """Отключение от RCON сервера."""
+    if self._transport:
+      self._transport.close()
+    self._transport = None
+    self._protocol = None
+    self.challenge = None
+    self.codec.reset()
+
+  # -- _send()
+  def _send(self, data: Union[bytes, memoryview]) -> None:
+    if not self.connected:
+      raise NoConnection("Нет соединения с RCON.")
+
+    # Отбрасываем опоздавшие ответы на предыдущие (уже просроченные) запросы
+    packets = self._protocol.packets
+    while not packets.empty():
+      packets.get_nowait()
+
+    self._transport.sendto(data)
+    self.metrics.sent(len(data))
+
+  # -- _recv()
+  async def _recv(self, timeout: float) -> bytes:
+    try:
+      item: Union[bytes, Exception] = await asyncio.wait_for(self._protocol.packets.get(), timeout)
+    except asyncio.TimeoutError:
+      raise RequestTimeout(f"Сервер не ответил за {timeout} с.")
+
+    if isinstance(item, Exception):
+      self.disconnect()
+      raise ServerOffline(str(item))
+
+    self.metrics.received(len(item))
+    return item
+
+  # -- _getChallenge()
+  async def _getChallenge(self, timeout: float) -> str:
+    self._send(challengePacket)
+
+    try:
+      response = await self._recv(timeout)
+    except RequestTimeout:
+      self.metrics.challenge_timeouts += 1
+      raise
+
+    self.challenge = parse_challenge(response)
+    return self.challenge
+
+  # -- getChallenge()
+  async def getChallenge(self, timeout: Optional[float] = None) -> str:
+    """
+    Получение вызова (challenge) от сервера.
+
+    :param timeout: Время ожидания ответа в секундах (по умолчанию self.timeout).
+    :return: Строка вызова.
+    :raises NoConnection: Если нет соединения.
+    :raises RequestTimeout: Если сервер не ответил вовремя.
+    :raises ServerOffline: Если сервер оффлайн.
+    """
+    async with self._lock:
+      return await self._getChallenge(self.timeout if timeout is None else timeout)
+
+  # -- _sendCommand()
+  async def _sendCommand(self, challenge: str, cmd: str, timeout: float) -> AsyncIterator[bytes]:
+    self._send(self.codec.encode_command(challenge, cmd))
+
+    assembler = ResponseAssembler()
+    while True:
+      # Первый пакет и недостающие части split-пакета ждем полный таймаут,
+      # возможное продолжение - только continuation_timeout
+      waiting_for_more = assembler.packets > 0 and not assembler.pending
+      try:
+        packet = await self._recv(self.continuation_timeout if waiting_for_more else timeout)
+      except RequestTimeout:
+        if waiting_for_more:
+          return
+        raise
+
+      for chunk in assembler.feed(packet):
+        yield chunk
+
+      if not (assembler.pending or assembler.may_continue):
+        return
+
+  # -- execute_iter()
+  async def execute_iter(self, cmd: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Выполнение команды с потоковой выдачей ответа.
+
+    Куски текста отдаются по мере прихода пакетов, не дожидаясь конца
+    ответа. Пока итератор не исчерпан или не закрыт, другие запросы
+    к серверу ждут, поэтому прерванный итератор нужно закрывать
+    (например, через contextlib.aclosing).
+
+    :param cmd: Команда для выполнения.
+    :param timeout: Время ожидания каждого ответа в секундах (по умолчанию self.timeout).
+    :return: Асинхронный итератор кусков ответа.
+    :raises NoConnection: Если нет соединения.
+    :raises RequestTimeout: Если сервер не ответил вовремя.
+    :raises ServerOffline: Если сервер оффлайн.
+    """
+    timeout = self.timeout if timeout is None else timeout
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    async with self._lock:
+      self.metrics.requests += 1
+      started = time.monotonic()
+
+      try:
+        chunks = self._sendCommand(self.challenge or await self._getChallenge(timeout), cmd, timeout)
+        first = await anext(chunks, b'')
+
+        if first.startswith(badChallengeBytes):
+          await chunks.aclose()
+          self.challenge_refreshes += 1
+          chunks = self._sendCommand(await self._getChallenge(timeout), cmd, timeout)
+          first = await anext(chunks, b'')
+
+        yield decoder.decode(first)
+        async for chunk in chunks:
+          yield decoder.decode(chunk)
+      except RequestTimeout:
+        self.metrics.errors += 1
+        self.metrics.timeouts += 1
+        # Сервер мог молча отбросить устаревший challenge
+        self.challenge = None
+        raise
+      except Exception:
+        self.metrics.errors += 1
+        raise
+
+      self.metrics.observe(cmd, time.monotonic() - started)
+
+      tail = decoder.decode(b'', final=True)
+      if tail:
+        yield tail
+
+  # -- execute()
+  async def execute(self, cmd: str, timeout: Optional[float] = None) -> str:
+    """
+    Выполнение команды на сервере.
+
+    Использует закэшированный challenge; новый запрашивается только
+    если сервер ответил "Bad challenge". Ответ из нескольких пакетов
+    собирается целиком.
+
+    :param cmd: Команда для выполнения.
+    :param timeout: Время ожидания каждого ответа в секундах (по умолчанию self.timeout).
+    :return: Результат выполнения команды.
+    :raises NoConnection: Если нет соединения.
+    :raises RequestTimeout: Если сервер не ответил вовремя.
+    :raises ServerOffline: Если сервер оффлайн.
+    """
+    text = ''.join([chunk async for chunk in self.execute_iter(cmd, timeout)])
+    return text[:-1] if text.endswith('\n') else text
+
+# !SECTION
@@ -0,0 +1,286 @@
+from typing import AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import codecs
+import itertools
+import struct
+import time
+
+from rehlds.rcon import BadConnection, BadRCONPassword, NoConnection, RequestTimeout, ServerOffline
+from rehlds.metrics import RCONMetrics
+
+# Типы пакетов Source RCON
+serverdataAuth = 3
+serverdataAuthResponse = 2
+serverdataExecCommand = 2
+serverdataResponseValue = 0
+
+# Размер пакета без поля size: id + type + два нулевых байта
+packetOverhead = 10
+maxPacketSize = 4096 + packetOverhead
+
+# SECTION Packet utilities
+
+# -- encode_packet()
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+  """
+  Собирает пакет Source RCON: size, id, type (int32 LE), тело и два нулевых байта.
+
+  :param request_id: Номер запроса.
+  :param packet_type: Тип пакета.
+  :param body: Тело пакета.
+  """
+  payload = struct.pack('<ii', request_id, packet_type) + body.encode('utf-8') + b'\x00\x00'
+  return struct.pack('<i', len(payload)) + payload
+
+# -- read_packet()
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+  """
+  Читает один пакет из потока.
+
+  :return: (id, type, тело без завершающих нулей).
+  :raises ServerOffline: Если пакет поврежден.
+  :raises asyncio.IncompleteReadError: Если соединение закрыто.
+  """
+  size = struct.unpack('<i', await reader.readexactly(4))[0]
+  if size < packetOverhead or size > maxPacketSize:
+    raise ServerOffline(f"Неверный размер пакета Source RCON: {size}")
+
+  payload = await reader.readexactly(size)
+  request_id, packet_type = struct.unpack_from('<ii', payload)
+  return request_id, packet_type, payload[8:-2]
+
+# !SECTION
+
+# SECTION Class SourceRCON
+class SourceRCON:
+  """
+  Асинхронный клиент Source RCON (TCP).
+
+  Держит одно аутентифицированное соединение и конвейеризует запросы:
+  команды отправляются сразу, не дожидаясь ответов на предыдущие,
+  а ответы сопоставляются запросам по id. Конец многопакетного
+  ответа определяется пустым пакетом SERVERDATA_RESPONSE_VALUE,
+  который отправляется вслед за командой: сервер отвечает на него
+  только после всего вывода команды.
+
+  Интерфейс совпадает с AsyncRCON, поэтому класс подходит для CSRCON.
+  """
+  # -- __init__()
+  def __init__(self, *, host: str, port: int = 27015, password: str, timeout: float = 3.0):
+    """
+    Инициализация класса SourceRCON.
+
+    :param host: Адрес хоста сервера.
+    :param port: Порт сервера (по умолчанию 27015).
+    :param password: Пароль для RCON.
+    :param timeout: Таймаут одного запроса в секундах (по умолчанию 3).
+    """
+    self.host: str = host
+    self.port: int = port
+    self.password: str = password
+    self.timeout: float = timeout
+
+    self._reader: Optional[asyncio.StreamReader] = None
+    self._writer: Optional[asyncio.StreamWriter] = None
+    self._reader_task: Optional[asyncio.Task] = None
+    self._ids = itertools.count(1)
+
+    # id маркера конца ответа -> очередь кусков ответа; id команды -> id маркера
+    self._pending: Dict[int, asyncio.Queue] = {}
+    self._commands: Dict[int, int] = {}
+
+    # Challenge в Source RCON нет; атрибуты оставлены для совместимости с AsyncRCON
+    self.challenge: Optional[str] = None
+    self.challenge_refreshes: int = 0
+
+    self.metrics: RCONMetrics = RCONMetrics()
+
+  # -- connected
+  @property
+  def connected(self) -> bool:
+    """Открыто ли аутентифицированное соединение."""
+    return self._reader_task is not None and not self._reader_task.done()
+
+  # -- in_flight
+  @property
+  def in_flight(self) -> int:
+    """Сколько запросов ждут ответа."""
+    return len(self._pending)
+
+  # -- connect()
+  async def connect(self, timeout: Optional[float] = None) -> None:
+    """
+    Подключение и аутентификация (SERVERDATA_AUTH).
+
+    :param timeout: Время ожидания в секундах (по умолчанию self.timeout).
+    :raises BadConnection: Если подключение не удалось.
+    :raises BadRCONPassword: Если неверный пароль RCON.
+    """
+    self.disconnect()
+    timeout = self.timeout if timeout is None else timeout
+    self.metrics.connects += 1
+
+    try:
+      self._reader, self._writer = await asyncio.wait_for(
+        asyncio.open_connection(self.host, int(self.port)), timeout)
+
+      auth_id = next(self._ids)
+      self._write(encode_packet(auth_id, serverdataAuth, self.password))
+      authenticated = await asyncio.wait_for(self._read_auth(auth_id), timeout)
+    except Exception as e:
+      self.metrics.connect_failures += 1
+      self.disconnect()
+      raise BadConnection(f"Ошибка при соединении с RCON: {str(e) or type(e).__name__}")
+
+    if not authenticated:
+      self.metrics.connect_failures += 1
+      self.disconnect()
+      raise BadRCONPassword("Неверный пароль RCON.")
+
+    self._reader_task = asyncio.create_task(self._read_loop())
+
+  # -- disconnect()
+  def disconnect(self) -> None:
+    """Закрывает соединение; ожидающие запросы получают ServerOffline."""
+    if self._reader_task and not self._reader_task.done() and self._reader_task is not asyncio.current_task():
+      self._reader_task.cancel()
+    self._reader_task = None
+
+    if self._writer:
+      self._writer.close()
+    self._reader = None
+    self._writer = None
+
+    self._fail_pending(ServerOffline("Соединение с RCON закрыто."))
+
+  # -- _write()
+  def _write(self, data: bytes) -> None:
+    self._writer.write(data)
+    self.metrics.sent(len(data))
+
+  # -- _read()
+  async def _read(self) -> Tuple[int, int, bytes]:
+    request_id, packet_type, body = await read_packet(self._reader)
+    self.metrics.received(len(body) + packetOverhead + 4)
+    return request_id, packet_type, body
+
+  # -- _read_auth()
+  async def _read_auth(self, auth_id: int) -> bool:
+    # Перед SERVERDATA_AUTH_RESPONSE сервер присылает пустой SERVERDATA_RESPONSE_VALUE
+    while True:
+      request_id, packet_type, _ = await self._read()
+      if packet_type == serverdataAuthResponse:
+        return request_id == auth_id
+
+  # -- _read_loop()
+  async def _read_loop(self) -> None:
+    try:
+      while True:
+        request_id, packet_type, body = await self._read()
+        if packet_type != serverdataResponseValue:
+          continue
+
+        # Ответ на маркер: вывод команды закончился
+        chunks = self._pending.pop(request_id, None)
+        if chunks is not None:
+          chunks.put_nowait(None)
+          continue
+
+        chunks = self._pending.get(self._commands.get(request_id))
+        if chunks is not None and body:
+          chunks.put_nowait(body)
+        # Ответы на просроченные запросы и лишние пакеты-маркеры отбрасываются
+    except asyncio.CancelledError:
+      raise
+    except Exception as e:
+      self._fail_pending(ServerOffline(f"Соединение с RCON потеряно: {str(e) or type(e).__name__}"))
+      if self._writer:
+        self._writer.close()
+
+  # -- _fail_pending()
+  def _fail_pending(self, error: Exception) -> None:
+    for chunks in self._pending.values():
+      chunks.put_nowait(error)
+    self._pending.clear()
+    self._commands.clear()
+
+  # -- _forget()
+  def _forget(self, command_id: int, marker_id: int) -> None:
+    self._commands.pop(command_id, None)
+    self._pending.pop(marker_id, None)
+
+  # -- execute_iter()
+  async def execute_iter(self, cmd: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Выполнение команды с потоковой выдачей ответа.
+
+    Другие запросы не ждут: их можно отправлять одновременно.
+
+    :param cmd: Команда для выполнения.
+    :param timeout: Время ожидания каждого пакета ответа в секундах (по умолчанию self.timeout).
+    :return: Асинхронный итератор кусков ответа.
+    :raises NoConnection: Если нет соединения.
+    :raises RequestTimeout: Если сервер не ответил вовремя.
+    :raises ServerOffline: Если соединение потеряно.
+    """
+    if not self.connected:
+      raise NoConnection("Нет соединения с RCON.")
+
+    timeout = self.timeout if timeout is None else timeout
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    command_id, marker_id = next(self._ids), next(self._ids)
+    chunks: asyncio.Queue = asyncio.Queue()
+    self._commands[command_id] = marker_id
+    self._pending[marker_id] = chunks
+
+    self.metrics.requests += 1
+    started = time.monotonic()
+
+    try:
+      self._write(encode_packet(command_id, serverdataExecCommand, cmd))
+      self._write(encode_packet(marker_id, serverdataResponseValue, ''))
+      await self._writer.drain()
+
+      while True:
+        try:
+          chunk = await asyncio.wait_for(chunks.get(), timeout)
+        except asyncio.TimeoutError:
+          raise RequestTimeout(f"Сервер не ответил за {timeout} с.")
+
+        if chunk is None:
+          break
+        if isinstance(chunk, Exception):
+          raise chunk
+        yield decoder.decode(chunk)
+    except RequestTimeout:
+      self.metrics.errors += 1
+      self.metrics.timeouts += 1
+      raise
+    except Exception:
+      self.metrics.errors += 1
+      raise
+    finally:
+      self._forget(command_id, marker_id)
+
+    self.metrics.observe(cmd, time.monotonic() - started)
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+      yield tail
+
+  # -- execute()
+  async def execute(self, cmd: str, timeout: Optional[float] = None) -> str:
+    """
+    Выполнение команды на сервере.
+
+    :param cmd: Команда для выполнения.
+    :param timeout: Время ожидания каждого пакета ответа в секундах (по умолчанию self.timeout).
+    :return: Результат выполнения команды.
+    :raises NoConnection: Если нет соединения.
+    :raises RequestTimeout: Если сервер не ответил вовремя.
+    :raises ServerOffline: Если соединение потеряно.
+    """
+    text = ''.join([chunk async for chunk in self.execute_iter(cmd, timeout)])
+    return text[:-1] if text.endswith('\n') else text
+
+# !SECTION
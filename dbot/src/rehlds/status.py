@@ -0,0 +1,154 @@
+from typing import Iterator, List, Optional
+import re
+import time
+
+# Строка игрока в выводе `status` (ReHLDS/HLDS):
+# #<slot> "<name>" <userid> <uniqueid> <frags> <time> <ping> <loss> [<adr>]
+# Имя захватывается жадно: кавычки внутри ника не ломают разбор.
+playerLine = re.compile(
+  r'^#\s*(?P<slot>\d+)\s+"(?P<name>.*)"\s+(?P<userid>\d+)\s+(?P<steamid>\S+)\s+-?\d+\s+'
+  r'(?P<time>[\d:]+)\s+(?P<ping>\d+)\s+(?P<loss>\d+)(?:\s+(?P<adr>\S+))?\s*$'
+)
+
+# SECTION Class Player
+class Player:
+  """Игрок из вывода `status`."""
+  __slots__ = ('slot', 'userid', 'name', 'steamid', 'ping', 'loss', 'time', 'ip')
+
+  # -- __init__()
+  def __init__(self, slot: int, userid: int, name: str, steamid: str,
+               ping: int, loss: int, time: int, ip: Optional[str]) -> None:
+    """
+    :param slot: Номер слота (с 1).
+    :param userid: userid игрока; по нему работают `kick #userid`, `amx_kick #userid` и т.п.
+    :param name: Ник.
+    :param steamid: SteamID, `BOT` или `HLTV`.
+    :param ping: Пинг в мс.
+    :param loss: Потери пакетов в процентах.
+    :param time: Время на сервере в секундах.
+    :param ip: IP без порта; None для ботов.
+    """
+    self.slot: int = slot
+    self.userid: int = userid
+    self.name: str = name
+    self.steamid: str = steamid
+    self.ping: int = ping
+    self.loss: int = loss
+    self.time: int = time
+    self.ip: Optional[str] = ip
+
+  # -- target
+  @property
+  def target(self) -> str:
+    """Цель для консольных команд: `#userid`."""
+    return f"#{self.userid}"
+
+  # -- __repr__()
+  def __repr__(self) -> str:
+    return f"Player(slot={self.slot}, userid={self.userid}, name={self.name!r}, steamid={self.steamid!r})"
+
+# !SECTION
+
+# SECTION Class PlayerTable
+class PlayerTable:
+  """
+  Таблица игроков, индексированная по слоту.
+
+  `slots[i]` - игрок в слоте i + 1 или None, если слот свободен.
+  """
+  __slots__ = ('slots', 'created')
+
+  # -- __init__()
+  def __init__(self, players: List[Player]) -> None:
+    """
+    :param players: Игроки в любом порядке.
+    """
+    size = max((player.slot for player in players), default=0)
+    self.slots: List[Optional[Player]] = [None] * size
+    for player in players:
+      self.slots[player.slot - 1] = player
+
+    self.created: float = time.monotonic()
+
+  # -- __iter__()
+  def __iter__(self) -> Iterator[Player]:
+    return (player for player in self.slots if player is not None)
+
+  # -- __len__()
+  def __len__(self) -> int:
+    return sum(1 for player in self.slots if player is not None)
+
+  # -- age
+  @property
+  def age(self) -> float:
+    """Сколько секунд назад была получена таблица."""
+    return time.monotonic() - self.created
+
+  # -- names()
+  def names(self) -> List[str]:
+    """Ники игроков в порядке слотов."""
+    return [player.name for player in self]
+
+  # -- find()
+  def find(self, name: str) -> Optional[Player]:
+    """
+    Ищет игрока по нику: сначала точное совпадение, затем без учета регистра.
+
+    :param name: Ник.
+    :return: Игрок или None.
+    """
+    lowered = name.lower()
+    folded: Optional[Player] = None
+
+    for player in self:
+      if player.name == name:
+        return player
+      if folded is None and player.name.lower() == lowered:
+        folded = player
+
+    return folded
+
+# !SECTION
+
+# -- parse_time()
+def parse_time(value: str) -> int:
+  """
+  Переводит время из `status` (`SS`, `MM:SS` или `HH:MM:SS`) в секунды.
+
+  :param value: Время из вывода `status`.
+  """
+  seconds = 0
+  for part in value.split(':'):
+    seconds = seconds * 60 + int(part or 0)
+  return seconds
+
+# -- parse_status()
+def parse_status(text: str) -> PlayerTable:
+  """
+  Разбирает вывод консольной команды `status`.
+
+  Заголовок (hostname, map, players) и строки, не похожие на игроков, пропускаются.
+
+  :param text: Ответ сервера на `status`.
+  :return: Таблица игроков.
+  """
+  players: List[Player] = []
+
+  for line in text.splitlines():
+    match = playerLine.match(line)
+    if match is None:
+      continue
+
+    adr = match['adr']
+    ip = adr.rsplit(':', 1)[0] if adr and adr != 'loopback' else adr
+
+    players.append(Player(slot=int(match['slot']),
+                          userid=int(match['userid']),
+                          name=match['name'],
+                          steamid=match['steamid'],
+                          ping=int(match['ping']),
+                          loss=int(match['loss']),
+                          time=parse_time(match['time']),
+                          ip=ip))
+
+  return PlayerTable(players)
@@ -0,0 +1,191 @@
+import ipaddress
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Сколько IP-адресов помнят ограничитель частоты и счетчики отказов:
+# адрес, к которому дольше всех не обращались, забывается первым
+maxTrackedIPs = 4096
+
+# -- parse_ip()
+def parse_ip(value: Optional[str]) -> Optional[IPAddress]:
+  """
+  IP-адрес из строки; IPv4, отображенный в IPv6 (::ffff:1.2.3.4), становится IPv4.
+
+  :return: Адрес или None, если строка - не IP-адрес.
+  """
+  if not value:
+    return None
+  try:
+    ip = ipaddress.ip_address(value.strip())
+  except ValueError:
+    return None
+  if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+    return ip.ipv4_mapped
+  return ip
+
+# SECTION Class IPAllowList
+class IPAllowList:
+  """Список разрешенных адресов и сетей (CIDR, IPv4 и IPv6), разобранный один раз."""
+  # -- __init__()
+  def __init__(self, entries: Iterable[str]) -> None:
+    """
+    :param entries: Адреса ("127.0.0.1", "::1") и сети ("10.0.0.0/8", "2001:db8::/32").
+    :raises ValueError: Если запись - не адрес и не сеть.
+    """
+    self.entries: List[str] = list(entries)
+    self.addresses: set = set()
+    self.networks: List[IPNetwork] = []
+
+    for entry in self.entries:
+      network = ipaddress.ip_network(entry.strip(), strict=False)
+      if network.num_addresses == 1:
+        self.addresses.add(parse_ip(str(network.network_address)))
+      else:
+        self.networks.append(network)
+
+  # -- __contains__()
+  def __contains__(self, ip: Optional[IPAddress]) -> bool:
+    if ip is None:
+      return False
+    if ip in self.addresses:
+      return True
+    return any(ip in network for network in self.networks if network.version == ip.version)
+
+  # -- __bool__()
+  def __bool__(self) -> bool:
+    return bool(self.addresses or self.networks)
+
+# !SECTION
+
+# -- client_ip()
+def client_ip(remote: Optional[str], forwarded_for: Optional[str], trusted_proxies: IPAllowList) -> Optional[IPAddress]:
+  """
+  Адрес клиента с учетом обратных прокси.
+
+  Заголовку X-Forwarded-For верим, только если запрос пришел от доверенного
+  прокси, и только в его доверенной части: адреса читаются справа налево,
+  пока они принадлежат прокси; первый чужой адрес - клиент.
+
+  :param remote: Адрес, с которого пришло соединение.
+  :param forwarded_for: Значение заголовка X-Forwarded-For.
+  :param trusted_proxies: Адреса доверенных прокси.
+  :return: Адрес клиента или None, если адрес не разобрать.
+  """
+  ip = parse_ip(remote)
+  if ip is None or not forwarded_for or ip not in trusted_proxies:
+    return ip
+
+  for hop in reversed(forwarded_for.split(',')):
+    hop_ip = parse_ip(hop)
+    if hop_ip is None:
+      # Мусор в заголовке: дальше ему верить нельзя
+      return ip
+    ip = hop_ip
+    if ip not in trusted_proxies:
+      break
+  return ip
+
+# SECTION Class TokenBucket
+class TokenBucket:
+  """Корзина токенов: rate токенов в секунду, не больше burst про запас."""
+  __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+  # -- __init__()
+  def __init__(self, rate: float, burst: float) -> None:
+    self.rate: float = rate
+    self.burst: float = burst
+    self.tokens: float = burst
+    self.updated: float = time.monotonic()
+
+  # -- take()
+  def take(self, now: float) -> float:
+    """
+    Берет токен.
+
+    :return: 0, если токен взят, иначе - через сколько секунд он появится.
+    """
+    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+    if self.tokens >= 1:
+      self.tokens -= 1
+      return 0.0
+    return (1 - self.tokens) / self.rate
+
+# !SECTION
+
+# SECTION Class RateLimiter
+class RateLimiter:
+  """
+  Ограничение частоты запросов с каждого IP-адреса (корзина токенов на адрес).
+
+  Помнит не больше max_tracked адресов; отказы считаются по адресам,
+  а не пишутся в лог на каждый запрос.
+  """
+  # -- __init__()
+  def __init__(self, rate: float, burst: float, max_tracked: int = maxTrackedIPs) -> None:
+    """
+    :param rate: Сколько запросов в секунду разрешено с одного адреса (0 - без ограничения).
+    :param burst: Сколько запросов подряд разрешено сверх rate.
+    :param max_tracked: Сколько адресов помнить.
+    """
+    self.rate: float = rate
+    self.burst: float = max(1.0, burst)
+    self.max_tracked: int = max_tracked
+
+    self._buckets: "OrderedDict[IPAddress, TokenBucket]" = OrderedDict()
+    self.limited: "OrderedDict[str, int]" = OrderedDict()
+    self.limited_total: int = 0
+
+  # -- check()
+  def check(self, ip: IPAddress) -> float:
+    """
+    Учитывает запрос с адреса.
+
+    :return: 0, если запрос разрешен, иначе - через сколько секунд повторить.
+    """
+    if self.rate <= 0:
+      return 0.0
+
+    bucket = self._buckets.get(ip)
+    if bucket is None:
+      bucket = self._buckets[ip] = TokenBucket(self.rate, self.burst)
+      if len(self._buckets) > self.max_tracked:
+        self._buckets.popitem(last=False)
+    else:
+      self._buckets.move_to_end(ip)
+
+    retry_after = bucket.take(time.monotonic())
+    if retry_after:
+      self.limited_total += 1
+      count_ip(self.limited, str(ip), self.max_tracked)
+    return retry_after
+
+  # -- stats()
+  def stats(self) -> Dict[str, object]:
+    return {
+      "rate": self.rate,
+      "burst": self.burst,
+      "tracked": len(self._buckets),
+      "limited": self.limited_total,
+      "limited_by_ip": top_ips(self.limited),
+    }
+
+# !SECTION
+
+# -- count_ip()
+def count_ip(counters: "OrderedDict[str, int]", ip: str, max_tracked: int = maxTrackedIPs) -> int:
+  """Увеличивает счетчик адреса; при переполнении забывается самый давний адрес. Возвращает новое значение."""
+  count = counters.pop(ip, 0) + 1
+  counters[ip] = count
+  if len(counters) > max_tracked:
+    counters.popitem(last=False)
+  return count
+
+# -- top_ips()
+def top_ips(counters: Dict[str, int], limit: int = 20) -> List[Tuple[str, int]]:
+  """Адреса с наибольшими счетчиками."""
+  return sorted(counters.items(), key=lambda item: -item[1])[:limit]
@@ -0,0 +1,220 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from rehlds.metrics import Histogram
+
+# Границы корзин времени ожидания в очереди, в секундах
+queueTimeBuckets: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# SECTION IngestError
+class IngestError(Exception):
+  """Базовый класс для исключений IngestQueue."""
+  pass
+
+# -- IngestFull
+class IngestFull(IngestError):
+  """Очередь заполнена: запрос нужно повторить позже (HTTP 429)."""
+  pass
+
+# -- IngestUnavailable
+class IngestUnavailable(IngestError):
+  """Очередь остановлена или обработчики не успевают (HTTP 503)."""
+  pass
+# !SECTION
+
+# SECTION Class IngestQueue
+class IngestQueue:
+  """
+  Очередь приема вебхуков с пулом обработчиков.
+
+  submit() только ставит задание в очередь, а workers обработчиков
+  выполняют задания в фоне. Задания с одним ключом попадают к одному
+  обработчику и выполняются по порядку; задания с разными ключами
+  выполняются параллельно.
+
+  Новое задание не принимается, если в очереди уже max_size заданий
+  (IngestFull), если очередь остановлена или самое старое задание
+  ждет дольше max_wait секунд - обработчики не успевают, и копить
+  задания дальше бессмысленно (IngestUnavailable).
+  """
+  # -- __init__()
+  def __init__(self, workers: int = 4, max_size: int = 1000, max_wait: float = 30.0) -> None:
+    """
+    :param workers: Сколько заданий выполняется одновременно.
+    :param max_size: Сколько заданий может ждать выполнения.
+    :param max_wait: Сколько секунд может ждать самое старое задание (0 - не ограничивать).
+    """
+    self.workers: int = max(1, workers)
+    self.max_size: int = max(1, max_size)
+    self.max_wait: float = max_wait
+
+    # Ошибка в задании: on_error(err)
+    self.on_error: Optional[Callable[[BaseException], None]] = None
+
+    self._shards: List[Deque[Tuple[float, Callable[..., Awaitable[Any]], tuple]]] = [deque() for _ in range(self.workers)]
+    self._wakeups: List[asyncio.Event] = []
+    self._tasks: List[asyncio.Task] = []
+    self._idle: Optional[asyncio.Event] = None
+    self._closed: bool = False
+
+    self.depth: int = 0
+    self.running: int = 0
+    self.max_depth: int = 0
+    self.accepted: int = 0
+    self.processed: int = 0
+    self.failed: int = 0
+    self.rejected_full: int = 0
+    self.rejected_unavailable: int = 0
+    self.queue_time: Histogram = Histogram(queueTimeBuckets)
+    self.process_time: Histogram = Histogram()
+
+  # -- free
+  @property
+  def free(self) -> int:
+    """Сколько заданий еще можно поставить."""
+    return max(0, self.max_size - self.depth)
+
+  # -- oldest_wait()
+  def oldest_wait(self) -> float:
+    """Сколько секунд ждет самое старое задание в очереди."""
+    heads = [shard[0][0] for shard in self._shards if shard]
+    return time.monotonic() - min(heads) if heads else 0.0
+
+  # -- submit()
+  def submit(self, key: Any, handler: Callable[..., Awaitable[Any]], *args) -> None:
+    """
+    Ставит задание в очередь.
+
+    :param key: Ключ порядка: задания с одним ключом выполняются по очереди.
+    :param handler: Корутина задания.
+    :param args: Аргументы handler.
+    :raises IngestFull: Очередь заполнена.
+    :raises IngestUnavailable: Очередь остановлена или обработчики не успевают.
+    """
+    self.submit_many([(key, handler, args)])
+
+  # -- submit_many()
+  def submit_many(self, jobs: Iterable[Tuple[Any, Callable[..., Awaitable[Any]], tuple]]) -> None:
+    """
+    Ставит в очередь все задания или ни одного.
+
+    :param jobs: Задания (ключ, корутина, аргументы).
+    :raises IngestFull: Все задания не помещаются в очередь.
+    :raises IngestUnavailable: Очередь остановлена или обработчики не успевают.
+    """
+    jobs = list(jobs)
+    if self._closed:
+      self.rejected_unavailable += 1
+      raise IngestUnavailable("Очередь приема остановлена")
+    if self.max_wait and self.oldest_wait() > self.max_wait:
+      self.rejected_unavailable += 1
+      raise IngestUnavailable(f"Задания ждут в очереди дольше {self.max_wait} с")
+    if len(jobs) > self.free:
+      self.rejected_full += 1
+      raise IngestFull(f"Очередь приема заполнена ({self.depth}/{self.max_size})")
+
+    self._ensure_workers()
+    now = time.monotonic()
+    for key, handler, args in jobs:
+      index = hash(key) % self.workers
+      self._shards[index].append((now, handler, args))
+      self._wakeups[index].set()
+
+    self.depth += len(jobs)
+    self.accepted += len(jobs)
+    if self.depth > self.max_depth:
+      self.max_depth = self.depth
+    if self.depth:
+      self._idle.clear()
+
+  # -- join()
+  async def join(self) -> None:
+    """Ждет, пока все принятые задания будут выполнены."""
+    if self._idle is not None:
+      await self._idle.wait()
+
+  # -- close()
+  def close(self) -> None:
+    """Останавливает обработчики; новые задания не принимаются, ожидающие отбрасываются."""
+    self._closed = True
+    for task in self._tasks:
+      task.cancel()
+    self._tasks = []
+    for shard in self._shards:
+      shard.clear()
+    self.depth = 0
+    if self._idle is not None:
+      self._idle.set()
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """Снимок метрик очереди."""
+    return {
+      "workers": self.workers,
+      "depth": self.depth,
+      "max_depth": self.max_depth,
+      "max_size": self.max_size,
+      "running": self.running,
+      "oldest_wait": self.oldest_wait(),
+      "accepted": self.accepted,
+      "processed": self.processed,
+      "failed": self.failed,
+      "rejected_full": self.rejected_full,
+      "rejected_unavailable": self.rejected_unavailable,
+      "queue_time": self.queue_time.snapshot(),
+      "process_time": self.process_time.snapshot(),
+    }
+
+  # -- _ensure_workers()
+  def _ensure_workers(self) -> None:
+    if self._tasks and not any(task.done() for task in self._tasks):
+      return
+
+    for task in self._tasks:
+      task.cancel()
+
+    if self._idle is None:
+      self._idle = asyncio.Event()
+      self._idle.set()
+    self._wakeups = [asyncio.Event() for _ in range(self.workers)]
+    self._tasks = [asyncio.create_task(self._run(index)) for index in range(self.workers)]
+
+  # -- _run()
+  async def _run(self, index: int) -> None:
+    shard = self._shards[index]
+    wakeup = self._wakeups[index]
+
+    while True:
+      if not shard:
+        wakeup.clear()
+        await wakeup.wait()
+        continue
+
+      enqueued_at, handler, args = shard.popleft()
+      started = time.monotonic()
+      self.queue_time.observe(started - enqueued_at)
+      self.running += 1
+      try:
+        await handler(*args)
+      except asyncio.CancelledError:
+        raise
+      except Exception as err:
+        self.failed += 1
+        if self.on_error is not None:
+          try:
+            self.on_error(err)
+          except Exception:
+            pass
+      finally:
+        self.running -= 1
+        self.processed += 1
+        self.process_time.observe(time.monotonic() - started)
+        # После close() счетчик уже обнулен
+        if self.depth:
+          self.depth -= 1
+        if not self.depth:
+          self._idle.set()
+
+# !SECTION
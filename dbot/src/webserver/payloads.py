@@ -0,0 +1,242 @@
+import json
+from typing import Any, Callable, Dict, Iterator, Tuple, Type
+
+# Быстрый разбор JSON, если установлен orjson; иначе - стандартный json
+try:
+  import orjson
+  loads: Callable[[Any], Any] = orjson.loads
+except ImportError:
+  orjson = None
+  loads = json.loads
+
+# Тела application/msgpack принимаются, только если установлен msgpack
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+
+msgpackTypes = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+# SECTION PayloadError
+class PayloadError(ValueError):
+  """Базовый класс для ошибок разбора вебхука."""
+  pass
+
+# -- UnsupportedPayload
+class UnsupportedPayload(PayloadError):
+  """Формат тела запроса не поддерживается (HTTP 415)."""
+  pass
+# !SECTION
+
+# SECTION Payloads
+# -- MessagePayload
+class MessagePayload:
+  """Сообщение из чата сервера CS (type "message")."""
+  __slots__ = ('nick', 'message', 'team', 'channel', 'steam_id')
+  type = 'message'
+
+  def __repr__(self) -> str:
+    return f"MessagePayload({self.nick!r}, {self.message[:30]!r}, team={self.team})"
+
+# -- NotifyPayload
+class NotifyPayload:
+  """Сообщение игрока администрации через /notify (type "notify")."""
+  __slots__ = ('nick', 'message', 'steam_id')
+  type = 'notify'
+
+  def __repr__(self) -> str:
+    return f"NotifyPayload({self.nick!r}, {self.message[:30]!r})"
+
+# -- PlayerPayload
+class PlayerPayload:
+  """Игрок из статуса сервера: stats - (фраги, смерти, команда)."""
+  __slots__ = ('name', 'steam_id', 'stats')
+
+  def as_dict(self) -> Dict[str, Any]:
+    """Игрок в том виде, в котором он приходит от плагина."""
+    return {"name": self.name, "steam_id": self.steam_id, "stats": list(self.stats)}
+
+  def __repr__(self) -> str:
+    return f"PlayerPayload({self.name!r}, stats={self.stats})"
+
+# -- InfoPayload
+class InfoPayload:
+  """Статус сервера CS (type "info")."""
+  __slots__ = ('map', 'current_players', 'max_players')
+  type = 'info'
+
+  def __repr__(self) -> str:
+    return f"InfoPayload({self.map!r}, players={len(self.current_players)}/{self.max_players})"
+
+# !SECTION
+
+# SECTION Schema
+# Поле без значения по умолчанию
+required = object()
+
+# -- compile_schema()
+def compile_schema(cls: Type, fields: Tuple[Tuple[str, Any, Any], ...]) -> Callable[[Any], Any]:
+  """
+  Собирает разборщик словаря в объект cls.
+
+  Схема превращается в код функции один раз при сборке: разборщик
+  проверяет типы и заполняет слоты напрямую, без цикла по полям
+  и промежуточных словарей.
+
+  :param cls: Класс со __slots__.
+  :param fields: (имя, тип или разборщик вложенного значения, значение по умолчанию или required).
+    Отсутствующее поле и null считаются одинаково.
+  :return: Функция dict -> cls; лишние ключи словаря пропускаются.
+  :raises PayloadError: (из функции) Если поля нет или у него неверный тип.
+  """
+  kind = getattr(cls, 'type', cls.__name__)
+  namespace: Dict[str, Any] = {'new': object.__new__, 'cls': cls, 'PayloadError': PayloadError}
+  lines = [
+    "def decode(data):",
+    "  if type(data) is not dict:",
+    f"    raise PayloadError({kind!r} + ': ожидается объект, получено ' + type(data).__name__)",
+    "  obj = new(cls)",
+    "  get = data.get",
+  ]
+
+  for index, (name, kind_of, default) in enumerate(fields):
+    lines.append(f"  value = get({name!r})")
+    lines.append("  if value is None:")
+    if default is required:
+      lines.append(f"    raise PayloadError({kind + ': нет поля ' + name!r})")
+    else:
+      namespace[f"default_{index}"] = default
+      lines.append(f"    value = default_{index}")
+
+    if isinstance(kind_of, type):
+      # type() is, а не isinstance: bool - подкласс int, но командой или счетом быть не может
+      namespace[f"type_{index}"] = kind_of
+      lines.append(f"  elif type(value) is not type_{index}:")
+      lines.append(f"    raise PayloadError({kind + ': поле ' + name + ' должно быть ' + kind_of.__name__!r})")
+    else:
+      namespace[f"convert_{index}"] = kind_of
+      lines.append("  else:")
+      lines.append(f"    value = convert_{index}(value)")
+    lines.append(f"  obj.{name} = value")
+
+  lines.append("  return obj")
+  exec("\n".join(lines), namespace)
+  return namespace['decode']
+
+# -- list_of()
+def list_of(decode: Callable[[Any], Any]) -> Callable[[Any], tuple]:
+  """Разборщик списка, каждый элемент которого разбирает decode."""
+  def decode_list(value: Any) -> tuple:
+    if type(value) is not list:
+      raise PayloadError(f"ожидается список, получено {type(value).__name__}")
+    return tuple(map(decode, value))
+  return decode_list
+
+# -- _stats()
+def _stats(value: Any) -> Tuple[int, int, int]:
+  if type(value) is list and len(value) == 3:
+    frags, deaths, team = value
+    if type(frags) is int and type(deaths) is int and type(team) is int:
+      return frags, deaths, team
+  raise PayloadError("stats: ожидается [фраги, смерти, команда]")
+
+decode_message = compile_schema(MessagePayload, (
+  ('nick', str, required),
+  ('message', str, required),
+  ('team', int, required),
+  ('channel', str, ''),
+  ('steam_id', str, ''),
+))
+
+decode_notify = compile_schema(NotifyPayload, (
+  ('nick', str, required),
+  ('message', str, required),
+  ('steam_id', str, ''),
+))
+
+decode_player = compile_schema(PlayerPayload, (
+  ('name', str, required),
+  ('steam_id', str, ''),
+  ('stats', _stats, required),
+))
+
+decode_info = compile_schema(InfoPayload, (
+  ('map', str, required),
+  ('current_players', list_of(decode_player), ()),
+  ('max_players', int, required),
+))
+
+payloadDecoders: Dict[str, Callable[[Any], Any]] = {
+  MessagePayload.type: decode_message,
+  NotifyPayload.type: decode_notify,
+  InfoPayload.type: decode_info,
+}
+
+# -- decode_payload()
+def decode_payload(data: Any) -> Any:
+  """
+  Событие вебхука в виде объекта по его полю "type".
+
+  :param data: Разобранное тело (словарь).
+  :return: MessagePayload, NotifyPayload или InfoPayload.
+  :raises PayloadError: Если тип неизвестен или поля неверные.
+  """
+  if type(data) is not dict:
+    raise PayloadError(f"Ожидается объект, получено {type(data).__name__}")
+
+  decode = payloadDecoders.get(data.get('type'))
+  if decode is None:
+    raise PayloadError(f"Неизвестный тип события: {data.get('type')!r}")
+  return decode(data)
+
+# !SECTION
+
+# SECTION Body
+# -- is_msgpack()
+def is_msgpack(content_type: str) -> bool:
+  return content_type in msgpackTypes
+
+# -- decode_body()
+def decode_body(body: bytes, content_type: str) -> Any:
+  """
+  Разбирает тело запроса: msgpack для типов application/msgpack, иначе JSON.
+
+  :raises UnsupportedPayload: Тело msgpack, а модуль msgpack не установлен.
+  :raises PayloadError: Тело не разбирается.
+  """
+  if is_msgpack(content_type):
+    if msgpack is None:
+      raise UnsupportedPayload("msgpack не установлен")
+    try:
+      return msgpack.unpackb(body)
+    except (ValueError, msgpack.UnpackException) as err:
+      raise PayloadError(f"Неверный msgpack: {err}")
+
+  try:
+    return loads(body)
+  except ValueError as err:
+    raise PayloadError(f"Неверный JSON: {err}")
+
+# -- iter_msgpack()
+def iter_msgpack(body: bytes) -> Iterator[Any]:
+  """
+  События пакета msgpack: массив событий или несколько объектов подряд.
+
+  :raises UnsupportedPayload: Модуль msgpack не установлен.
+  :raises PayloadError: Тело не разбирается.
+  """
+  if msgpack is None:
+    raise UnsupportedPayload("msgpack не установлен")
+
+  unpacker = msgpack.Unpacker()
+  unpacker.feed(body)
+  try:
+    for item in unpacker:
+      if type(item) is list:
+        yield from item
+      else:
+        yield item
+  except (ValueError, msgpack.UnpackException) as err:
+    raise PayloadError(f"Неверный msgpack: {err}")
+
+# !SECTION
@@ -1,8 +1,12 @@
 from aiohttp import web
 from enum import Enum
-from typing import Callable, List, Optional
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import math
 
 from observer.observer_client import observer, Event
+from webserver.ingest_queue import IngestQueue, IngestFull, IngestUnavailable
+from webserver.access import IPAllowList, RateLimiter, client_ip, count_ip, top_ips
 
 # SECTION Исключения WebServer
 
@@ -31,13 +35,28 @@ class AllowedIPsEmpty(WebServerError):
 # SECTION Class WebServer
 class WebServer:
   # -- __init__()
-  def __init__(self, host: str, port: int, allowed_ips: List[str]) -> None:
+  def __init__(self,
+               host: str,
+               port: int,
+               allowed_ips: List[str],
+               trusted_proxies: Iterable[str] = (),
+               rate_limit: float = 0,
+               rate_burst: float = 0,
+               ingest_workers: int = 4,
+               ingest_queue_size: int = 1000,
+               ingest_max_wait: float = 30.0) -> None:
     """
     Инициализирует экземпляр веб-сервера.
 
     :param host: Адрес, на котором будет запущен сервер.
     :param port: Порт, на котором будет запущен сервер.
-    :param allowed_ips: Список разрешенных IP-адресов для доступа к серверу.
+    :param allowed_ips: Список разрешенных IP-адресов и сетей (CIDR, IPv4 и IPv6) для доступа к серверу.
+    :param trusted_proxies: Адреса и сети обратных прокси, которым можно верить в X-Forwarded-For.
+    :param rate_limit: Сколько запросов в секунду разрешено с одного IP-адреса (0 - без ограничения).
+    :param rate_burst: Сколько запросов подряд разрешено сверх rate_limit (по умолчанию - rate_limit).
+    :param ingest_workers: Сколько принятых запросов обрабатывается одновременно (см. accept()).
+    :param ingest_queue_size: Сколько принятых запросов может ждать обработки.
+    :param ingest_max_wait: Сколько секунд может ждать самый старый принятый запрос (0 - не ограничивать).
     """
     if not allowed_ips:
       raise AllowedIPsEmpty("allowed_ips list cannot be empty.")
@@ -49,6 +68,19 @@ class WebServer:
     self.host: str = host
     self.port: int = port
     self.allowed_ips: List[str] = allowed_ips
+    try:
+      self.allowlist: IPAllowList = IPAllowList(allowed_ips)
+      self.trusted_proxies: IPAllowList = IPAllowList(trusted_proxies)
+    except ValueError as e:
+      raise ServerSetupFailed(f"Неверный адрес в списке: {e}") from e
+    self.rate_limiter: RateLimiter = RateLimiter(rate_limit, rate_burst or rate_limit)
+
+    # Отказы по IP считаются, а в лог (событие WS_IP_NOT_ALLOWED) попадает только первый отказ адресу
+    self.rejected: "OrderedDict[str, int]" = OrderedDict()
+    self.rejected_total: int = 0
+    self.ingest: IngestQueue = IngestQueue(workers=ingest_workers,
+                                           max_size=ingest_queue_size,
+                                           max_wait=ingest_max_wait)
 
     # Добавление middleware для проверки IP-адресов
     self.app.middlewares.append(self.ip_check_middleware)
@@ -63,20 +95,37 @@ class WebServer:
     :param handler: Функция-обработчик для обработки запроса.
     :return: Ответ на запрос или ошибка доступа.
     """
-    client_ip: str = request.remote
-    if client_ip not in self.allowed_ips:
-      await observer.notify(Event.WS_IP_NOT_ALLOWED, {
-        "request_remote": request.remote,
-        "request_url": request.url,
-        "request_method": request.method,
-        "request_headers": request.headers,
-        "request_body": await request.text()
-      })
-      return web.Response(status=403, text="Access Forbidden: Your IP is not allowed.")
+    ip = client_ip(request.remote, request.headers.get('X-Forwarded-For'), self.trusted_proxies)
+    if ip not in self.allowlist:
+      self.rejected_total += 1
+      if count_ip(self.rejected, str(ip or request.remote)) == 1:
+        await observer.notify(Event.WS_IP_NOT_ALLOWED, {
+          "request_remote": str(ip or request.remote),
+          "request_url": str(request.rel_url),
+          "request_method": request.method,
+        })
+      # Тело запроса не читаем: соединение закрывается вместе с ответом
+      response = web.Response(status=403, text="Access Forbidden: Your IP is not allowed.")
+      response.force_close()
+      return response
+
+    retry_after = self.rate_limiter.check(ip)
+    if retry_after:
+      return web.Response(status=429, text="Too Many Requests",
+                          headers={"Retry-After": str(math.ceil(retry_after))})
     
     # Если IP-адрес разрешен, продолжить обработку запроса
     return await handler(request)
 
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """Счетчики отказов по IP и ограничения частоты."""
+    return {
+      "rejected": self.rejected_total,
+      "rejected_by_ip": top_ips(self.rejected),
+      "rate_limit": self.rate_limiter.stats(),
+    }
+
   # -- add_route()
   def add_post(self, path: str, handler: Callable, method: str = 'GET') -> None:
     """
@@ -88,6 +137,36 @@ class WebServer:
     """
     self.app.router.add_post(path, handler)
 
+  # -- add_get()
+  def add_get(self, path: str, handler: Callable) -> None:
+    """
+    Добавляет GET-маршрут (в том числе WebSocket) в приложение.
+
+    :param path: Путь маршрута.
+    :param handler: Функция-обработчик для данного маршрута.
+    """
+    self.app.router.add_get(path, handler)
+
+  # -- accept()
+  def accept(self, jobs: Iterable[Tuple[Any, Callable[..., Awaitable[Any]], tuple]], **extra) -> web.Response:
+    """
+    Ставит обработку запроса в очередь приема и сразу отвечает.
+
+    :param jobs: Задания (ключ порядка, корутина, аргументы); принимаются все или ни одного.
+    :param extra: Дополнительные поля ответа.
+    :return: 202 - задания приняты; 429 - очередь заполнена;
+      503 - очередь остановлена или обработчики не успевают.
+    """
+    jobs = list(jobs)
+    try:
+      self.ingest.submit_many(jobs)
+    except IngestFull as err:
+      return web.json_response({"error": str(err), **extra}, status=429, headers={"Retry-After": "1"})
+    except IngestUnavailable as err:
+      return web.json_response({"error": str(err), **extra}, status=503, headers={"Retry-After": "5"})
+
+    return web.json_response({"queued": len(jobs), **extra}, status=202)
+
   # -- run_webserver()
   async def run_webserver(self) -> None:
     """
@@ -0,0 +1,315 @@
+import asyncio
+import inspect
+import json
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from aiohttp import WSMsgType, web
+
+# Коды закрытия соединения канала (диапазон 4000-4999 - для приложений)
+closeBadHello = 4000
+closeReplaced = 4001
+
+# SECTION ChannelError
+class ChannelError(Exception):
+  """Базовый класс для исключений GameChannel."""
+  pass
+
+# -- ChannelRetry
+class ChannelRetry(ChannelError):
+  """Событие не принято сейчас: клиент повторит его с того же номера."""
+  def __init__(self, message: str, retry_after: float = 1.0) -> None:
+    super().__init__(message)
+    self.retry_after: float = retry_after
+# !SECTION
+
+# SECTION Class ChannelSession
+class ChannelSession:
+  """
+  Сессия канала: номера событий в обе стороны и неподтвержденные исходящие события.
+
+  Сессия переживает разрыв соединения на resume_timeout секунд:
+  клиент, переподключившийся с ее id, получает исходящие события,
+  которые не успел подтвердить, и продолжает свою нумерацию.
+  """
+  # -- __init__()
+  def __init__(self, name: str, buffer_size: int) -> None:
+    self.id: str = uuid.uuid4().hex
+    self.name: str = name
+    self.ws: Optional[web.WebSocketResponse] = None
+    self.disconnected_at: float = time.monotonic()
+
+    # Последнее принятое входящее событие
+    self.in_seq: int = 0
+    # Последнее отправленное исходящее событие и неподтвержденные исходящие события
+    self.out_seq: int = 0
+    self.out_buffer: Deque[Tuple[int, dict]] = deque(maxlen=buffer_size)
+
+  # -- connected
+  @property
+  def connected(self) -> bool:
+    return self.ws is not None and not self.ws.closed
+
+  # -- acknowledge()
+  def acknowledge(self, seq: int) -> None:
+    """Убирает из буфера исходящие события до seq включительно."""
+    while self.out_buffer and self.out_buffer[0][0] <= seq:
+      self.out_buffer.popleft()
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    return {
+      "name": self.name,
+      "connected": self.connected,
+      "in_seq": self.in_seq,
+      "out_seq": self.out_seq,
+      "unacked": len(self.out_buffer),
+    }
+
+# !SECTION
+
+# SECTION Class GameChannel
+class GameChannel:
+  """
+  Долгоживущий канал WebSocket между сервером CS и ботом.
+
+  Кадры - JSON-объекты с полем "op":
+
+  - клиент: {"op": "hello", "name": <имя сервера>, "session": <id или null>, "ack": <номер>}
+    первым кадром; ack - последнее полученное клиентом исходящее событие;
+  - бот: {"op": "welcome", "session": <id>, "resumed": <bool>, "ack": <номер>, "heartbeat": <с>};
+    ack - последнее принятое входящее событие, клиент продолжает со следующего;
+  - в обе стороны: {"op": "event", "seq": <номер>, "data": {"type": ..., ...}}
+    и подтверждение {"op": "ack", "seq": <номер>};
+  - бот: {"op": "nack", "seq": <номер>, "expected": <номер>, "error": ..., "retry_after": <с>} -
+    событие не принято, клиент повторяет события начиная с expected.
+
+  Входящие события принимаются строго по порядку номеров: повтор уже
+  принятого подтверждается еще раз, пропуск номера отклоняется. Живость
+  соединения проверяется пингами WebSocket каждые heartbeat секунд.
+  """
+  # -- __init__()
+  def __init__(self,
+               authorize: Callable[[web.Request], bool],
+               on_event: Callable[[ChannelSession, dict], Union[None, Awaitable[None]]],
+               heartbeat: float = 15.0,
+               resume_timeout: float = 60.0,
+               buffer_size: int = 1000) -> None:
+    """
+    :param authorize: Проверка запроса на подключение (например, API-ключа).
+    :param on_event: Обработчик входящего события. ValueError - событие неверное
+      (подтверждается и пропускается), ChannelRetry - клиент должен повторить его позже.
+    :param heartbeat: Интервал пингов в секундах; без ответа соединение закрывается.
+    :param resume_timeout: Сколько секунд сессия ждет переподключения.
+    :param buffer_size: Сколько неподтвержденных исходящих событий хранит сессия.
+    """
+    self.authorize: Callable[[web.Request], bool] = authorize
+    self.on_event: Callable[[ChannelSession, dict], Union[None, Awaitable[None]]] = on_event
+    self.heartbeat: float = heartbeat
+    self.resume_timeout: float = resume_timeout
+    self.buffer_size: int = buffer_size
+
+    self._sessions: Dict[str, ChannelSession] = {}
+
+    self.connections: int = 0
+    self.resumed: int = 0
+    self.received: int = 0
+    self.duplicates: int = 0
+    self.rejected: int = 0
+    self.invalid: int = 0
+    self.sent: int = 0
+    self.replayed: int = 0
+    self.overflowed: int = 0
+
+  # -- handle()
+  async def handle(self, request: web.Request) -> web.StreamResponse:
+    """Обработчик aiohttp для GET-маршрута канала."""
+    if not self.authorize(request):
+      return web.Response(text='Unauthorized', status=401)
+
+    ws = web.WebSocketResponse(heartbeat=self.heartbeat)
+    await ws.prepare(request)
+
+    try:
+      hello = await ws.receive_json(timeout=self.heartbeat)
+      if not isinstance(hello, dict) or hello.get("op") != "hello":
+        raise ValueError("первый кадр должен быть hello")
+    except (asyncio.TimeoutError, TypeError, ValueError):
+      await ws.close(code=closeBadHello, message=b"expected hello")
+      return ws
+
+    self.connections += 1
+    session = await self._attach(ws, hello)
+    try:
+      async for msg in ws:
+        if msg.type == WSMsgType.TEXT:
+          await self._receive(session, ws, msg.data)
+        elif msg.type == WSMsgType.ERROR:
+          break
+    finally:
+      if session.ws is ws:
+        session.ws = None
+        session.disconnected_at = time.monotonic()
+
+    return ws
+
+  # -- send()
+  async def send(self, data: dict, name: Optional[str] = None) -> int:
+    """
+    Отправляет событие клиентам канала.
+
+    Событие получает следующий номер сессии и хранится до подтверждения,
+    так что клиент, который сейчас не подключен, получит его при возобновлении.
+
+    :param data: Событие ({"type": ..., ...}).
+    :param name: Имя сервера из hello; None - всем сессиям.
+    :return: Сколько сессий получит событие.
+    """
+    self._expire()
+    sessions = [session for session in self._sessions.values() if name is None or session.name == name]
+
+    for session in sessions:
+      session.out_seq += 1
+      seq = session.out_seq
+      if len(session.out_buffer) == session.out_buffer.maxlen:
+        self.overflowed += 1
+      session.out_buffer.append((seq, data))
+
+      if session.connected:
+        try:
+          await session.ws.send_json({"op": "event", "seq": seq, "data": data})
+          self.sent += 1
+        except ConnectionError:
+          # Событие осталось в буфере и уйдет при возобновлении
+          pass
+
+    return len(sessions)
+
+  # -- connected()
+  def connected(self, name: str) -> bool:
+    """Подключен ли сейчас клиент с этим именем сервера."""
+    return any(session.connected and session.name == name for session in self._sessions.values())
+
+  # -- sessions()
+  def sessions(self) -> List[ChannelSession]:
+    """Живые сессии канала."""
+    self._expire()
+    return list(self._sessions.values())
+
+  # -- close()
+  async def close(self) -> None:
+    """Закрывает все соединения и забывает сессии."""
+    for session in list(self._sessions.values()):
+      if session.connected:
+        await session.ws.close()
+    self._sessions.clear()
+
+  # -- stats()
+  def stats(self) -> Dict[str, Any]:
+    """Счетчики канала и состояние сессий."""
+    return {
+      "sessions": {session.id: session.stats() for session in self.sessions()},
+      "connections": self.connections,
+      "resumed": self.resumed,
+      "received": self.received,
+      "duplicates": self.duplicates,
+      "rejected": self.rejected,
+      "invalid": self.invalid,
+      "sent": self.sent,
+      "replayed": self.replayed,
+      "overflowed": self.overflowed,
+    }
+
+  # -- _expire()
+  def _expire(self) -> None:
+    deadline = time.monotonic() - self.resume_timeout
+    for session_id, session in list(self._sessions.items()):
+      if not session.connected and session.disconnected_at < deadline:
+        del self._sessions[session_id]
+
+  # -- _attach()
+  async def _attach(self, ws: web.WebSocketResponse, hello: dict) -> ChannelSession:
+    self._expire()
+    session = self._sessions.get(hello.get("session"))
+    resumed = session is not None
+    if resumed:
+      self.resumed += 1
+      # Клиент переподключился, не дождавшись закрытия старого соединения
+      if session.connected:
+        await session.ws.close(code=closeReplaced, message=b"replaced")
+    else:
+      session = ChannelSession(str(hello.get("name") or ""), self.buffer_size)
+      self._sessions[session.id] = session
+
+    await ws.send_json({"op": "welcome", "session": session.id, "resumed": resumed,
+                        "ack": session.in_seq, "heartbeat": self.heartbeat})
+
+    acked = hello.get("ack") if resumed and isinstance(hello.get("ack"), int) else 0
+    session.acknowledge(acked)
+
+    # Досылаем неподтвержденное; события, отправленные во время досылки,
+    # попадают в буфер и уходят на следующем проходе
+    while True:
+      pending = [(seq, data) for seq, data in session.out_buffer if seq > acked]
+      if not pending:
+        break
+      for seq, data in pending:
+        await ws.send_json({"op": "event", "seq": seq, "data": data})
+        self.replayed += 1
+        acked = seq
+
+    session.ws = ws
+    return session
+
+  # -- _receive()
+  async def _receive(self, session: ChannelSession, ws: web.WebSocketResponse, raw: str) -> None:
+    try:
+      frame = json.loads(raw)
+      op = frame["op"]
+      seq = frame["seq"]
+    except (ValueError, TypeError, KeyError):
+      self.invalid += 1
+      return
+    if not isinstance(seq, int) or isinstance(seq, bool):
+      self.invalid += 1
+      return
+
+    if op == "ack":
+      session.acknowledge(seq)
+      return
+    if op != "event":
+      self.invalid += 1
+      return
+
+    if seq <= session.in_seq:
+      # Повтор после переподключения: уже принято
+      self.duplicates += 1
+      await ws.send_json({"op": "ack", "seq": seq})
+      return
+    if seq != session.in_seq + 1:
+      self.rejected += 1
+      await ws.send_json({"op": "nack", "seq": seq, "expected": session.in_seq + 1,
+                          "error": "пропущен номер события", "retry_after": 0})
+      return
+
+    reply: Dict[str, Any] = {"op": "ack", "seq": seq}
+    try:
+      result = self.on_event(session, frame.get("data"))
+      if inspect.isawaitable(result):
+        await result
+    except ChannelRetry as err:
+      self.rejected += 1
+      await ws.send_json({"op": "nack", "seq": seq, "expected": seq,
+                          "error": str(err), "retry_after": err.retry_after})
+      return
+    except ValueError as err:
+      self.invalid += 1
+      reply["error"] = str(err)
+
+    session.in_seq = seq
+    self.received += 1
+    await ws.send_json(reply)
+
+# !SECTION
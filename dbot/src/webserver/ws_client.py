@@ -1,6 +1,10 @@
 from enum import Enum
 from observer.observer_client import logger, observer, Event, nsroute, Color, TextStyle
 from webserver.web_server import WebServer, WebServerError
+from webserver.ingest_queue import IngestFull, IngestUnavailable
+from webserver.ws_channel import GameChannel, ChannelSession, ChannelRetry
+from webserver.payloads import (MessagePayload, NotifyPayload, InfoPayload, PayloadError, UnsupportedPayload,
+                                decode_payload, decode_body, is_msgpack, iter_msgpack, loads)
 
 from aiohttp import web
 
@@ -10,7 +14,18 @@ import config
 # -- init
 ws: WebServer = WebServer(host=config.WEB_HOST_ADDRESS,
                           port=config.WEB_SERVER_PORT,
-                          allowed_ips=config.WEB_ALLOWED_IPS)
+                          allowed_ips=config.WEB_ALLOWED_IPS,
+                          trusted_proxies=config.WEB_TRUSTED_PROXIES,
+                          rate_limit=config.WEB_RATE_LIMIT,
+                          rate_burst=config.WEB_RATE_BURST,
+                          ingest_workers=config.WEBHOOK_INGEST_WORKERS,
+                          ingest_queue_size=config.WEBHOOK_INGEST_QUEUE_SIZE,
+                          ingest_max_wait=config.WEBHOOK_INGEST_MAX_WAIT)
+
+def log_ingest_error(err: BaseException) -> None:
+  logger.exception(f"WebServer: Ошибка при обработке вебхука: {err!r}")
+
+ws.ingest.on_error = log_ingest_error
 
 # -- Events
 @observer.subscribe(Event.BE_READY)
@@ -43,11 +58,8 @@ def format_info_message(map_name, current_players, max_players):
   team_players = {1: [], 2: [], 3: []}
 
   for player in current_players:
-    player_name = player['name']
-    stats = player['stats']
-    frags = stats[0]
-    deaths = stats[1]
-    team = stats[2]
+    player_name = player.name
+    frags, deaths, team = player.stats
 
     if team in team_players:
       team_players[team].append(f"{player_name} - {frags}/{deaths}")
@@ -87,16 +99,16 @@ def check_api_key(request):
 # SECTION Web Hooks
 
 # -- handle_message
-async def handle_message(data: dict):
+async def handle_message(data: MessagePayload):
   import asyncio
 
-  cs_message = data['message']
-  nick = data['nick']
-  team = data['team']
-  channel_prefix = data.get('channel', '')
-  steam_id = data.get('steam_id', '')
+  cs_message = data.message
+  nick = data.nick
+  team = data.team
+  channel_prefix = data.channel
+  steam_id = data.steam_id
 
-  if not (cs_message and nick and team is not None ):
+  if not (cs_message and nick):
     return
   
   # Логируем получение сообщения из CS
@@ -105,17 +117,14 @@ async def handle_message(data: dict):
   # Получаем Discord ID с использованием кеша и таймаута
   prefix = ""
   try:
-    # Таймаут 1 секунда для запроса к базе
-    discord_id = await asyncio.wait_for(nsroute.call_route("/CheckSteam", steam_id=steam_id), timeout=1.0)
+    # Таймаут 1 секунда для запроса к базе (задан у маршрута)
+    discord_id = await nsroute.call_route("/CheckSteam", steam_id=steam_id)
     
     if discord_id:
       # Если нашелся Discord ID, получаем данные о пользователе
       try:
-        # Таймаут 1 секунда для получения Member
-        member = await asyncio.wait_for(
-          nsroute.call_route("/GetMember", discord_id=discord_id),
-          timeout=1.0
-        )
+        # Таймаут 1 секунда для получения Member (задан у маршрута)
+        member = await nsroute.call_route("/GetMember", discord_id=discord_id)
         if member:
           prefix = f"[{member.display_name}] "
       except asyncio.TimeoutError:
@@ -139,48 +148,204 @@ async def handle_message(data: dict):
   })
 
 # -- handle_info
-async def handle_info(data):
-  map_name = data.get('map')
-  current_players = data.get('current_players', [])
-  max_players = data.get('max_players')
-
-  formatted_info = format_info_message(map_name, current_players, max_players)
+async def handle_info(data: InfoPayload):
+  formatted_info = format_info_message(data.map, data.current_players, data.max_players)
 
   await observer.notify(Event.WBH_INFO, {
     "info_message": formatted_info,
-    "current_players": current_players
+    "current_players": [player.as_dict() for player in data.current_players]
   })
 
+# -- handle_notify
+async def handle_notify(data: NotifyPayload):
+  # Сообщения /notify плагин отправляет, но в Discord они пока не пересылаются
+  logger.info(f"Получен notify из CS: {data.nick}: {data.message[:30]}...")
+
 # !SECTION
 
 # SECTION class WebHooksType
 class WebHooksType(Enum):
   Message = 'message'
   Info = 'info'
-
-  # Deprecated
-  # Notify = 'notify' 
+  # Deprecated: принимается, но не пересылается
+  Notify = 'notify'
 
 # !SECTION
 
+# -- dispatch_webhook
+async def dispatch_webhook(data) -> None:
+  """Обрабатывает одно событие вебхука (после webhook_job())."""
+  if data.type == WebHooksType.Message.value:
+    await handle_message(data)
+  elif data.type == WebHooksType.Info.value:
+    await handle_info(data)
+  else:
+    await handle_notify(data)
+
+# -- webhook_job
+def webhook_job(data):
+  """
+    Задание очереди приема для события вебхука.
+    Сообщения одного игрока обрабатываются по порядку, статус - по порядку с прошлым статусом.
+
+    :raises PayloadError: Событие неверное.
+  """
+  payload = decode_payload(data)
+
+  if payload.type == WebHooksType.Info.value:
+    key = (payload.type,)
+  else:
+    key = (WebHooksType.Message.value, payload.steam_id or payload.nick)
+
+  return key, dispatch_webhook, (payload,)
+
 # -- handle_webhook
 async def handle_webhook(request: web.Request):
   if not check_api_key(request):
     return web.Response(text='Unauthorized', status=401)
   
-  data: dict = await request.json()
-  message_type: str = data['type']
+  try:
+    job = webhook_job(decode_body(await request.read(), request.content_type))
+  except UnsupportedPayload as err:
+    return web.Response(text=str(err), status=415)
+  except PayloadError as err:
+    return web.Response(text=str(err), status=400)
+
+  # Ответ не ждет Discord: событие обрабатывается в очереди приема
+  return ws.accept([job])
+
+# -- read_batch
+async def read_batch(request: web.Request):
+  """
+    События пакета по порядку: JSON-массив, NDJSON (по одному JSON-объекту в строке)
+    или msgpack (массив событий или несколько объектов подряд).
+    NDJSON разбирается по мере чтения тела запроса; строка, которую не удалось
+    разобрать, отдается как None.
+
+    :raises UnsupportedPayload: Тело msgpack, а модуль msgpack не установлен.
+    :raises ValueError: Тело запроса - поврежденный JSON-массив или msgpack.
+  """
+  if request.content_type == 'application/x-ndjson':
+    async for line in request.content:
+      if line.strip():
+        yield parse_line(line)
+    return
 
-  if message_type == WebHooksType.Message.value:
-    await handle_message(data)
-  elif message_type == WebHooksType.Info.value:
-    await handle_info(data)
+  body: bytes = await request.read()
+  if is_msgpack(request.content_type):
+    events = iter_msgpack(body)
+  elif body.lstrip().startswith(b'['):
+    events = loads(body)
+  else:
+    events = [parse_line(line) for line in body.splitlines() if line.strip()]
 
-  return web.Response(text='OK')
+  for data in events:
+    yield data
+
+# -- parse_line
+def parse_line(line):
+  try:
+    return loads(line)
+  except ValueError:
+    return None
+
+# -- handle_webhook_batch
+async def handle_webhook_batch(request: web.Request):
+  """
+    Несколько событий вебхука в одном запросе: JSON-массив, NDJSON или msgpack.
+    События ставятся в очередь приема по порядку, как если бы пришли отдельными запросами.
+    Неверные события пропускаются и считаются в failed ответа.
+  """
+  if not check_api_key(request):
+    return web.Response(text='Unauthorized', status=401)
+
+  jobs = []
+  failed = 0
+  try:
+    async for data in read_batch(request):
+      if len(jobs) + failed >= config.WEBHOOK_BATCH_MAX:
+        return web.json_response({"error": f"В пакете больше {config.WEBHOOK_BATCH_MAX} событий"}, status=413)
+
+      try:
+        jobs.append(webhook_job(data))
+      except PayloadError:
+        failed += 1
+  except UnsupportedPayload as err:
+    return web.json_response({"error": str(err)}, status=415)
+  except ValueError:
+    return web.json_response({"error": "Тело запроса - не JSON-массив, не NDJSON и не msgpack"}, status=400)
+
+  # Пакет ставится в очередь приема целиком или отклоняется целиком
+  return ws.accept(jobs, failed=failed)
 
 # -- webhook route
 ws.add_post('/webhook', handle_webhook)
+ws.add_post('/webhook/batch', handle_webhook_batch)
+
+# SECTION WebSocket channel
+
+# -- channel_event
+def channel_event(session: ChannelSession, data) -> None:
+  """
+    Событие из канала WebSocket - то же, что тело /webhook; ставится в очередь приема.
+    Неверное событие (PayloadError) канал подтверждает с ошибкой и пропускает.
+  """
+  job = webhook_job(data)
+
+  try:
+    ws.ingest.submit_many([job])
+  except IngestFull as err:
+    raise ChannelRetry(str(err), retry_after=1.0)
+  except IngestUnavailable as err:
+    raise ChannelRetry(str(err), retry_after=5.0)
+
+channel: GameChannel = GameChannel(authorize=check_api_key,
+                                   on_event=channel_event,
+                                   heartbeat=config.WS_CHANNEL_HEARTBEAT,
+                                   resume_timeout=config.WS_CHANNEL_RESUME_TIMEOUT,
+                                   buffer_size=config.WS_CHANNEL_BUFFER)
+
+# -- channel route
+ws.add_get('/ws', channel.handle)
+
+# -- (route) channel_send
+@nsroute.create_route("/channel/send")
+async def route_channel_send(data: dict, name: str = None) -> int:
+  """Событие для серверов CS через канал WebSocket; возвращает число сессий-получателей."""
+  return await channel.send(data, name=name)
+
+# -- (route) channel_command
+@nsroute.create_route("/channel/command")
+async def route_channel_command(name: str, commands: list) -> bool:
+  """
+    Команды для сервера CS через канал: событие {"type": "command", "commands": [...]}.
+    Отправляется, только если клиент сервера name сейчас подключен; иначе возвращает False,
+    и команды уходят по RCON. Ответы команд через канал не возвращаются.
+  """
+  if not channel.connected(name):
+    return False
+
+  await channel.send({"type": "command", "commands": list(commands)}, name=name)
+  return True
+
+# -- (route) channel_stats
+@nsroute.create_route("/channel/stats")
+async def route_channel_stats() -> dict:
+  return channel.stats()
+
+# !SECTION
+
+# -- (route) webserver_stats
+@nsroute.create_route("/webserver/stats")
+async def route_webserver_stats() -> dict:
+  return ws.stats()
+
+# -- (route) webserver_ingest_stats
+@nsroute.create_route("/webserver/ingest/stats")
+async def route_ingest_stats() -> dict:
+  return ws.ingest.stats()
 
 @observer.subscribe(Event.WS_IP_NOT_ALLOWED)
 async def ev_ip_not_allowed(data):
-  logger.info(f"IP NOT ADDLOWED: IP: \"{data['request_remote']}\", url:\"{data['request_url']}\", \"{data['request_method']}\", \"{data['request_headers']}\", \"{data['request_body']}\"")
\ No newline at end of file
+  # Пишется только первый отказ каждому адресу, остальные считаются в /webserver/stats
+  logger.info(f"IP NOT ALLOWED: IP: \"{data['request_remote']}\", url:\"{data['request_url']}\", \"{data['request_method']}\"")
\ No newline at end of file
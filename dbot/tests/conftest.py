@@ -6,3 +6,31 @@ import os
 # This assumes conftest.py is in dbot/tests/
 # and the source code is in dbot/src/
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+
+def _load_template_config():
+    """Import src/config.py even while it is the unfilled template.
+
+    Modules like cs_server.cs_server and webserver.ws_client read config at
+    import time; blank IDs (``GUILD_ID = ``) become 0 so the template compiles.
+    """
+    try:
+        import config  # noqa: F401
+        return
+    except SyntaxError:
+        pass
+
+    import re
+    import types
+
+    path = os.path.join(os.path.dirname(__file__), '../src/config.py')
+    with open(path, encoding='utf-8') as file:
+        source = re.sub(r'^(\w+) = *$', r'\1 = 0', file.read(), flags=re.MULTILINE)
+
+    module = types.ModuleType('config')
+    module.__file__ = os.path.abspath(path)
+    exec(compile(source, module.__file__, 'exec'), module.__dict__)
+    sys.modules['config'] = module
+
+
+_load_template_config()
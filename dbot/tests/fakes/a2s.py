@@ -0,0 +1,114 @@
+"""In-process fake A2S query responder (UDP) for tests.
+
+Answers A2S_INFO and A2S_PLAYER the way a current HLDS/ReHLDS does:
+an S2C_CHALLENGE first (A2S_PLAYER always, A2S_INFO when ``info_challenge``
+is set), then the real reply once the request carries the challenge.
+Player replies larger than ``split_size`` are sent as GoldSrc split packets.
+"""
+import asyncio
+import struct
+
+from fakes.hlds import DEFAULT_PLAYERS
+
+HEADER = b"\xFF\xFF\xFF\xFF"
+SPLIT = b"\xFE\xFF\xFF\xFF"
+INFO = HEADER + b"TSource Engine Query\x00"
+PLAYER = HEADER + b"U"
+
+
+def cstr(value: str) -> bytes:
+    return value.encode() + b"\x00"
+
+
+class FakeA2S(asyncio.DatagramProtocol):
+    """Fake A2S responder.
+
+    Args:
+        name, map_name, max_players: Reported by A2S_INFO.
+        players: Nicknames reported by A2S_PLAYER (score = index, duration = 60 * index).
+        info_challenge: Require a challenge for A2S_INFO too.
+        goldsrc_info: Reply to A2S_INFO in the obsolete GoldSrc ('m') format.
+        split_size: Split replies larger than this into GoldSrc split packets (0 = never).
+        silent: Never reply.
+    """
+
+    def __init__(self, name: str = "Fake Server", map_name: str = "de_dust2", max_players: int = 32,
+                 players: list = None, info_challenge: bool = True, goldsrc_info: bool = False,
+                 split_size: int = 0, silent: bool = False):
+        self.name = name
+        self.map_name = map_name
+        self.max_players = max_players
+        self.players = DEFAULT_PLAYERS if players is None else players
+        self.info_challenge = info_challenge
+        self.goldsrc_info = goldsrc_info
+        self.split_size = split_size
+        self.silent = silent
+
+        self.challenge = b"\x11\x22\x33\x44"
+        self.transport = None
+        self.queries = 0
+        self.challenges = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.silent:
+            return
+
+        if data.startswith(INFO):
+            self.queries += 1
+            challenge = data[len(INFO):]
+            if self.info_challenge and challenge != self.challenge:
+                self._send_challenge(addr)
+            else:
+                self._send(self._info(), addr)
+        elif data.startswith(PLAYER):
+            self.queries += 1
+            if data[len(PLAYER):] != self.challenge:
+                self._send_challenge(addr)
+            else:
+                self._send(self._players(), addr)
+
+    def rotate_challenge(self):
+        """Issue a new challenge, as a server does from time to time."""
+        self.challenge = bytes((b + 1) & 0xFF for b in self.challenge)
+
+    def _send_challenge(self, addr):
+        self.challenges += 1
+        self.transport.sendto(HEADER + b"A" + self.challenge, addr)
+
+    def _info(self) -> bytes:
+        if self.goldsrc_info:
+            return (HEADER + b"m" + cstr("127.0.0.1:27015") + cstr(self.name) + cstr(self.map_name)
+                    + cstr("cstrike") + cstr("Counter-Strike")
+                    + bytes([len(self.players), self.max_players, 47]) + b"dl" + bytes([0, 0, 1, 0]))
+        return (HEADER + b"I" + bytes([48]) + cstr(self.name) + cstr(self.map_name) + cstr("cstrike")
+                + cstr("Counter-Strike") + struct.pack("<h", 10)
+                + bytes([len(self.players), self.max_players, 0]) + b"dl" + bytes([0, 1])
+                + cstr("1.1.2.7/Stdio"))
+
+    def _players(self) -> bytes:
+        body = HEADER + b"D" + bytes([len(self.players)])
+        for index, name in enumerate(self.players):
+            body += bytes([index]) + cstr(name) + struct.pack("<lf", index, 60.0 * index)
+        return body
+
+    def _send(self, packet: bytes, addr):
+        if not self.split_size or len(packet) <= self.split_size:
+            self.transport.sendto(packet, addr)
+            return
+
+        parts = [packet[i:i + self.split_size] for i in range(0, len(packet), self.split_size)]
+        # Out of order on purpose: the client must reassemble by number
+        for number in reversed(range(len(parts))):
+            header = SPLIT + struct.pack("<l", 7) + bytes([number << 4 | len(parts)])
+            self.transport.sendto(header + parts[number], addr)
+
+
+async def start_a2s_server(**kwargs):
+    """Start a FakeA2S on a free port of the running loop. Returns (transport, port)."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: FakeA2S(**kwargs), local_addr=("127.0.0.1", 0))
+    return transport, transport.get_extra_info("sockname")[1]
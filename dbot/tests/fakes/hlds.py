@@ -0,0 +1,220 @@
+"""In-process fake GoldSrc (HLDS/ReHLDS) RCON responder for tests and benchmarks.
+
+Speaks the real wire protocol over UDP on 127.0.0.1:
+
+- ``getchallenge`` -> ``A00000000 <challenge> ...``
+- ``rcon <challenge> <password> <command>`` -> ``l<output>\\n``,
+  ``Bad challenge.`` or ``Bad rcon_password.``
+- large outputs as split packets (0xFFFFFFFE) or continuation packets
+
+Commands are split on ``;`` outside quotes like the engine command buffer.
+``echo <text>`` prints text, ``status`` prints a player table, ``big <n>``
+prints about n bytes, and anything else is echoed back as ``echo: <cmd>``.
+"""
+import asyncio
+import random
+import struct
+import threading
+
+PASSWORD = "secret"
+
+SINGLE = b"\xff\xff\xff\xff"
+SPLIT = b"\xfe\xff\xff\xff"
+
+DEFAULT_PLAYERS = ["Player", "[BOT] Joe", "Sniper"]
+
+
+class FakeHLDS(asyncio.DatagramProtocol):
+    """Fake GoldSrc RCON server.
+
+    Args:
+        password: Expected rcon_password.
+        delay: Base reply latency in seconds.
+        jitter: Extra random latency, uniform in [0, jitter] seconds.
+        loss: Probability of dropping each request and each reply packet.
+        silent: Never reply (a dead server).
+        split_size: Send packets larger than this as split packets.
+        chunk_size: Send the output as continuation packets of this size.
+        responses: Fixed outputs for whole command lines.
+        players: Nicknames listed by ``status``.
+        seed: Seed for latency and loss, for reproducible runs.
+    """
+
+    def __init__(self, password: str = PASSWORD, delay: float = 0.0, jitter: float = 0.0, loss: float = 0.0,
+                 silent: bool = False, split_size: int = 0, chunk_size: int = 0, responses: dict = None,
+                 players: list = None, seed: int = None):
+        self.password = password
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.silent = silent
+        self.split_size = split_size
+        self.chunk_size = chunk_size
+        self.responses = responses or {}
+        self.players = DEFAULT_PLAYERS if players is None else players
+        self.random = random.Random(seed)
+
+        self.transport = None
+        self.challenge = 1234
+        self.challenge_requests = 0
+        self.commands = 0
+        self.dropped = 0
+        self._split_id = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.silent or self._lost():
+            return
+
+        latency = self.delay + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if latency:
+            asyncio.get_running_loop().call_later(latency, self._reply, data, addr)
+        else:
+            self._reply(data, addr)
+
+    def _lost(self) -> bool:
+        if self.loss and self.random.random() < self.loss:
+            self.dropped += 1
+            return True
+        return False
+
+    def _send(self, packet, addr):
+        if not self._lost():
+            self.transport.sendto(packet, addr)
+
+    def _reply(self, data, addr):
+        if self.transport.is_closing():
+            return
+
+        if data == SINGLE + b"getchallenge\n":
+            self.challenge_requests += 1
+            self._send(SINGLE + b"A00000000 %d 2 0 1\n\x00" % self.challenge, addr)
+            return
+
+        self.commands += 1
+        _, challenge, password, cmd = data[4:-1].decode().split(" ", 3)
+        if int(challenge) != self.challenge:
+            text = "Bad challenge."
+        elif password != self.password:
+            text = "Bad rcon_password."
+        elif cmd in self.responses:
+            text = self.responses[cmd]
+        else:
+            text = "\n".join(self.run_command(part) for part in split_commands(cmd))
+
+        body = (text + "\n").encode()
+        chunks = [body]
+        if self.chunk_size:
+            chunks = [body[i:i + self.chunk_size] for i in range(0, len(body), self.chunk_size)]
+
+        for chunk in chunks:
+            packet = SINGLE + b"l" + chunk + b"\x00"
+            if self.split_size and len(packet) > self.split_size:
+                self._send_split(packet, addr)
+            else:
+                self._send(packet, addr)
+
+    def _send_split(self, packet, addr):
+        self._split_id += 1
+        parts = [packet[i:i + self.split_size] for i in range(0, len(packet), self.split_size)]
+        # Fragments are deliberately sent out of order
+        for number in reversed(range(len(parts))):
+            header = SPLIT + struct.pack("<i", self._split_id) + bytes([number << 4 | len(parts)])
+            self._send(header + parts[number], addr)
+
+    def run_command(self, cmd: str) -> str:
+        return run_command(cmd, self.players)
+
+
+def run_command(cmd: str, players: list = DEFAULT_PLAYERS) -> str:
+    """Console output of one command."""
+    if cmd.startswith("echo "):
+        return cmd[5:]
+    if cmd == "status":
+        return status_text(players)
+    if cmd.startswith("big "):
+        return big_text(int(cmd[4:]))
+    return f"echo: {cmd}"
+
+
+def split_commands(line: str):
+    """Split a console line on `;` outside of quotes, like the GoldSrc command buffer."""
+    parts, current, quoted = [], "", False
+    for char in line:
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    return parts + [current]
+
+
+def big_text(size: int) -> str:
+    lines = []
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"line {len(lines):05d} " + "x" * 40)
+    return "\n".join(lines)
+
+
+def status_text(players: list) -> str:
+    lines = [
+        "hostname:  Fake HLDS",
+        "version :  48/1.1.2.7/Stdio 2001 secure  (10)",
+        "tcp/ip  :  127.0.0.1:27015",
+        "map     :  de_dust2 at: 0 x, 0 y, 0 z",
+        f"players :  {len(players)} active (32 max)",
+        "",
+        "#      name userid uniqueid frag time ping loss adr",
+    ]
+    for slot, name in enumerate(players, start=1):
+        if name.startswith("[BOT]"):
+            lines.append(f"#{slot:2d} \"{name}\" {slot + 10} BOT 0 10:00 0 0")
+        else:
+            lines.append(f"#{slot:2d} \"{name}\" {slot + 10} STEAM_0:1:{slot} 0 10:00 50 0 127.0.0.1:{27005 + slot}")
+    lines.append(f"{len(players)} users")
+    return "\n".join(lines)
+
+
+async def start_server(**kwargs):
+    """Start a FakeHLDS on a free port of the running loop. Returns (transport, port)."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: FakeHLDS(**kwargs), local_addr=("127.0.0.1", 0))
+    return transport, transport.get_extra_info("sockname")[1]
+
+
+class ThreadedFakeHLDS:
+    """FakeHLDS on its own event loop thread, for the blocking `RCON` client.
+
+    Usage::
+
+        with ThreadedFakeHLDS(delay=0.01) as fake:
+            rcon = RCON(host="127.0.0.1", port=fake.port, password=PASSWORD)
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.transport = None
+        self.port = None
+
+    @property
+    def protocol(self) -> FakeHLDS:
+        return self.transport.get_protocol()
+
+    def __enter__(self):
+        self.thread.start()
+        future = asyncio.run_coroutine_threadsafe(start_server(**self.kwargs), self.loop)
+        self.transport, self.port = future.result(timeout=5)
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self.transport.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
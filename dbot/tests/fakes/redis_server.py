@@ -0,0 +1,384 @@
+"""In-process fake Redis server (RESP3 over TCP) for tests.
+
+Implements just enough of Redis for the Observer's Redis Streams backend
+and for data_server.redis_client: HELLO/PING/CLIENT/SELECT, MULTI/EXEC,
+XADD (with MAXLEN), XLEN, XGROUP CREATE, XREADGROUP (with COUNT and BLOCK),
+XACK, XAUTOCLAIM, XPENDING (summary form), RPUSH/LRANGE/LREM/LTRIM,
+DEL and FLUSHDB/FLUSHALL. Everything lives in memory of one FakeRedis.
+"""
+import asyncio
+import time
+
+
+class Error(Exception):
+    """Sent back to the client as a RESP error."""
+
+
+class Simple(str):
+    """Sent back as a RESP simple string."""
+
+
+OK = Simple("OK")
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"_\r\n"
+    if isinstance(value, Error):
+        return b"-" + str(value).encode() + b"\r\n"
+    if isinstance(value, Simple):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, bool):
+        return b"#t\r\n" if value else b"#f\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, dict):
+        return b"%%%d\r\n" % len(value) + b"".join(encode(k) + encode(v) for k, v in value.items())
+    return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+
+
+def parse_id(value: bytes, last=(0, 0)):
+    text = value.decode()
+    if text == "$":
+        return last
+    if text in ("-", "0"):
+        return (0, 0)
+    ms, _, seq = text.partition("-")
+    return (int(ms), int(seq or 0))
+
+
+def format_id(entry_id) -> bytes:
+    return b"%d-%d" % entry_id
+
+
+class Group:
+    def __init__(self, last_delivered):
+        self.last_delivered = last_delivered
+        # id -> [consumer, delivery time, delivery count]
+        self.pending = {}
+
+
+class Stream:
+    def __init__(self):
+        self.entries = []
+        self.last_id = (0, 0)
+        self.groups = {}
+
+    def get(self, entry_id):
+        for current, fields in self.entries:
+            if current == entry_id:
+                return fields
+        return None
+
+
+class FakeRedis:
+    """Fake Redis server state.
+
+    Attributes:
+        streams: key -> Stream.
+        commands: Count of every command name received.
+        connections: Open client connections.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.lists = {}
+        self.commands = {}
+        self.connections = set()
+        self.changed = asyncio.Event()
+        self.server = None
+
+    async def handle(self, reader, writer):
+        self.connections.add(writer)
+        # Commands queued after MULTI, None outside a transaction
+        queued = None
+        try:
+            while True:
+                try:
+                    args = await self.read_command(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                if args is None:
+                    return
+
+                name = args[0].decode().upper()
+                if name == "MULTI":
+                    queued, reply = [], OK
+                elif name == "DISCARD":
+                    queued, reply = None, OK
+                elif name == "EXEC":
+                    reply = [await self.run(command) for command in queued or ()]
+                    queued = None
+                elif queued is not None:
+                    queued.append(args)
+                    reply = Simple("QUEUED")
+                else:
+                    reply = await self.run(args)
+                writer.write(encode(reply))
+                await writer.drain()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        count = int(line[1:])
+        args = []
+        for _ in range(count):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def run(self, args):
+        name = args[0].decode().upper()
+        self.commands[name] = self.commands.get(name, 0) + 1
+        try:
+            return await getattr(self, "cmd_" + name.lower(), self.unknown)(*args[1:])
+        except Error as err:
+            return err
+
+    async def unknown(self, *args):
+        raise Error("ERR unknown command")
+
+    def drop_connections(self):
+        """Close every client connection, as a restarted server would."""
+        for writer in list(self.connections):
+            writer.close()
+
+    def close(self):
+        self.drop_connections()
+        if self.server is not None:
+            self.server.close()
+
+    def notify_changed(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    # Connection commands
+
+    async def cmd_hello(self, *args):
+        return {"server": "redis", "version": "7.2.0", "proto": 3, "id": 1,
+                "mode": "standalone", "role": "master", "modules": []}
+
+    async def cmd_ping(self, *args):
+        return Simple("PONG")
+
+    async def cmd_client(self, *args):
+        return OK
+
+    async def cmd_select(self, *args):
+        return OK
+
+    async def cmd_flushdb(self, *args):
+        self.streams.clear()
+        self.lists.clear()
+        return OK
+
+    cmd_flushall = cmd_flushdb
+
+    async def cmd_del(self, *keys):
+        return sum(1 for key in keys
+                   if self.streams.pop(key, None) is not None or self.lists.pop(key, None) is not None)
+
+    # Lists
+
+    async def cmd_rpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        items.extend(values)
+        return len(items)
+
+    async def cmd_lrange(self, key, start, stop):
+        items = self.lists.get(key, [])
+        start, stop = int(start), int(stop)
+        stop = len(items) if stop == -1 else stop + 1
+        return items[start:stop]
+
+    async def cmd_lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        count = int(count)
+        kept, removed = [], 0
+        for item in items:
+            if item == value and (count == 0 or removed < abs(count)):
+                removed += 1
+            else:
+                kept.append(item)
+        self.lists[key] = kept
+        return removed
+
+    async def cmd_ltrim(self, key, start, stop):
+        items = self.lists.get(key, [])
+        start, stop = int(start), int(stop)
+        self.lists[key] = items[start:len(items) if stop == -1 else stop + 1]
+        return OK
+
+    # Streams
+
+    async def cmd_xadd(self, key, *args):
+        args = list(args)
+        max_len = None
+        if args[0].upper() == b"NOMKSTREAM":
+            args.pop(0)
+            if key not in self.streams:
+                return None
+        if args[0].upper() == b"MAXLEN":
+            args.pop(0)
+            if args[0] in (b"~", b"="):
+                args.pop(0)
+            max_len = int(args.pop(0))
+
+        stream = self.streams.setdefault(key, Stream())
+        requested = args.pop(0)
+        if requested == b"*":
+            now = int(time.time() * 1000)
+            last_ms, last_seq = stream.last_id
+            entry_id = (now, 0) if now > last_ms else (last_ms, last_seq + 1)
+        else:
+            entry_id = parse_id(requested)
+            if entry_id <= stream.last_id:
+                raise Error("ERR The ID specified in XADD is equal or smaller than the target stream top item")
+
+        stream.entries.append((entry_id, args))
+        stream.last_id = entry_id
+        if max_len is not None and len(stream.entries) > max_len:
+            del stream.entries[:len(stream.entries) - max_len]
+
+        self.notify_changed()
+        return format_id(entry_id)
+
+    async def cmd_xlen(self, key):
+        stream = self.streams.get(key)
+        return len(stream.entries) if stream else 0
+
+    async def cmd_xgroup(self, sub, key, group, start, *args):
+        if sub.upper() != b"CREATE":
+            raise Error("ERR unknown subcommand")
+
+        stream = self.streams.get(key)
+        if stream is None:
+            if b"MKSTREAM" not in (arg.upper() for arg in args):
+                raise Error("ERR The XGROUP subcommand requires the key to exist")
+            stream = self.streams[key] = Stream()
+        if group in stream.groups:
+            raise Error("BUSYGROUP Consumer Group name already exists")
+
+        stream.groups[group] = Group(parse_id(start, stream.last_id))
+        return OK
+
+    def group(self, key, group, command):
+        stream = self.streams.get(key)
+        if stream is None or group not in stream.groups:
+            raise Error(f"NOGROUP No such key '{key.decode()}' or consumer group '{group.decode()}' "
+                        f"in {command} with GROUP option")
+        return stream, stream.groups[group]
+
+    async def cmd_xreadgroup(self, _group, group, consumer, *args):
+        args = list(args)
+        count, block = None, None
+        while args[0].upper() != b"STREAMS":
+            option = args.pop(0).upper()
+            if option == b"COUNT":
+                count = int(args.pop(0))
+            elif option == b"BLOCK":
+                block = int(args.pop(0))
+        args.pop(0)
+        half = len(args) // 2
+        requests = list(zip(args[:half], args[half:]))
+
+        deadline = None if block is None or block == 0 else time.monotonic() + block / 1000
+        while True:
+            reply = self.read_group(group, consumer, requests, count)
+            new_only = all(start == b">" for _, start in requests)
+            if reply or not new_only or block is None:
+                return reply or None
+
+            changed = self.changed
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                return None
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+    def read_group(self, group, consumer, requests, count):
+        reply = {}
+        for key, start in requests:
+            stream, state = self.group(key, group, "XREADGROUP")
+            entries = []
+
+            if start == b">":
+                for entry_id, fields in stream.entries:
+                    if entry_id <= state.last_delivered:
+                        continue
+                    if count is not None and len(entries) >= count:
+                        break
+                    entries.append([format_id(entry_id), fields])
+                    state.last_delivered = entry_id
+                    state.pending[entry_id] = [consumer, time.monotonic(), 1]
+                if entries:
+                    reply[key] = entries
+            else:
+                after = parse_id(start)
+                for entry_id in sorted(state.pending):
+                    owner = state.pending[entry_id][0]
+                    if owner != consumer or entry_id < after:
+                        continue
+                    if count is not None and len(entries) >= count:
+                        break
+                    entries.append([format_id(entry_id), stream.get(entry_id)])
+                # History reads always list the stream, even when empty
+                reply[key] = entries
+        return reply
+
+    async def cmd_xack(self, key, group, *ids):
+        stream, state = self.group(key, group, "XACK")
+        return sum(1 for entry_id in ids if state.pending.pop(parse_id(entry_id), None) is not None)
+
+    async def cmd_xautoclaim(self, key, group, consumer, min_idle, start, *args):
+        stream, state = self.group(key, group, "XAUTOCLAIM")
+        count = int(args[1]) if len(args) > 1 and args[0].upper() == b"COUNT" else 100
+        min_idle = int(min_idle) / 1000
+        now = time.monotonic()
+
+        claimed, deleted = [], []
+        for entry_id in sorted(state.pending):
+            if entry_id < parse_id(start) or len(claimed) >= count:
+                continue
+            owner, delivered, deliveries = state.pending[entry_id]
+            if now - delivered < min_idle:
+                continue
+            fields = stream.get(entry_id)
+            if fields is None:
+                del state.pending[entry_id]
+                deleted.append(format_id(entry_id))
+                continue
+            state.pending[entry_id] = [consumer, now, deliveries + 1]
+            claimed.append([format_id(entry_id), fields])
+        return [b"0-0", claimed, deleted]
+
+    async def cmd_xpending(self, key, group, *args):
+        stream, state = self.group(key, group, "XPENDING")
+        if not state.pending:
+            return [0, None, None, None]
+        owners = {}
+        for owner, _, _ in state.pending.values():
+            owners[owner] = owners.get(owner, 0) + 1
+        ids = sorted(state.pending)
+        return [len(ids), format_id(ids[0]), format_id(ids[-1]),
+                [[owner, str(total).encode()] for owner, total in owners.items()]]
+
+
+async def start_redis_server():
+    """Start a FakeRedis on a free port of the running loop. Returns (fake, port)."""
+    fake = FakeRedis()
+    fake.server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    return fake, fake.server.sockets[0].getsockname()[1]
@@ -0,0 +1,120 @@
+"""In-process fake Source engine RCON server (TCP) for tests and benchmarks.
+
+Implements the Valve Source RCON protocol: SERVERDATA_AUTH with an empty
+SERVERDATA_RESPONSE_VALUE followed by SERVERDATA_AUTH_RESPONSE (id -1 on a
+bad password), SERVERDATA_EXECCOMMAND with output split into packets of at
+most ``packet_size`` bytes, and the mirrored empty SERVERDATA_RESPONSE_VALUE
+(followed by the ``00 01 00 00`` quirk packet real servers send).
+
+Commands behave like in ``fakes.hlds``.
+"""
+import asyncio
+import struct
+
+from fakes.hlds import DEFAULT_PLAYERS, PASSWORD, run_command, split_commands
+
+AUTH = 3
+AUTH_RESPONSE = 2
+EXECCOMMAND = 2
+RESPONSE_VALUE = 0
+
+
+def packet(request_id: int, packet_type: int, body: bytes) -> bytes:
+    payload = struct.pack("<ii", request_id, packet_type) + body + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+class FakeSourceRCON:
+    """Fake Source RCON server.
+
+    Args:
+        password: Expected rcon_password.
+        delay: Reply latency in seconds; requests are still answered in order.
+        silent: Authenticate, but never answer commands.
+        packet_size: Maximum body size of one response packet.
+        responses: Fixed outputs for whole command lines.
+        players: Nicknames listed by ``status``.
+    """
+
+    def __init__(self, password: str = PASSWORD, delay: float = 0.0, silent: bool = False,
+                 packet_size: int = 4096, responses: dict = None, players: list = None):
+        self.password = password
+        self.delay = delay
+        self.silent = silent
+        self.packet_size = packet_size
+        self.responses = responses or {}
+        self.players = DEFAULT_PLAYERS if players is None else players
+
+        self.server = None
+        self.writers = set()
+        self.connections = 0
+        self.auth_attempts = 0
+        self.commands = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.add(writer)
+        authenticated = False
+        try:
+            while True:
+                size = struct.unpack("<i", await reader.readexactly(4))[0]
+                payload = await reader.readexactly(size)
+                request_id, packet_type = struct.unpack_from("<ii", payload)
+                body = payload[8:-2].decode()
+
+                if packet_type == AUTH:
+                    self.auth_attempts += 1
+                    authenticated = body == self.password
+                    writer.write(packet(request_id, RESPONSE_VALUE, b""))
+                    writer.write(packet(request_id if authenticated else -1, AUTH_RESPONSE, b""))
+                elif not authenticated:
+                    break
+                elif self.silent:
+                    continue
+                elif packet_type == EXECCOMMAND:
+                    self.commands += 1
+                    self._later(writer, self._output(request_id, body))
+                elif packet_type == RESPONSE_VALUE:
+                    self._later(writer, packet(request_id, RESPONSE_VALUE, b"")
+                                + packet(request_id, RESPONSE_VALUE, b"\x00\x01\x00\x00"))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    def _output(self, request_id: int, cmd: str) -> bytes:
+        if cmd in self.responses:
+            text = self.responses[cmd]
+        else:
+            text = "\n".join(run_command(part, self.players) for part in split_commands(cmd))
+
+        body = (text + "\n").encode()
+        return b"".join(packet(request_id, RESPONSE_VALUE, body[i:i + self.packet_size])
+                        for i in range(0, len(body), self.packet_size))
+
+    def _later(self, writer, data: bytes):
+        def send():
+            if not writer.is_closing():
+                writer.write(data)
+
+        if self.delay:
+            asyncio.get_running_loop().call_later(self.delay, send)
+        else:
+            send()
+
+    def drop_connections(self):
+        """Close every client connection (the server keeps listening)."""
+        for writer in list(self.writers):
+            writer.close()
+
+    def close(self):
+        self.drop_connections()
+        self.server.close()
+
+
+async def start_source_server(**kwargs):
+    """Start a FakeSourceRCON on a free port of the running loop. Returns (fake, port)."""
+    fake = FakeSourceRCON(**kwargs)
+    fake.server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    return fake, fake.server.sockets[0].getsockname()[1]
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from rehlds.a2s import A2SClient, A2STimeout, MalformedResponse, parse_info, parse_players
+
+from fakes.a2s import start_a2s_server
+
+
+@pytest.mark.asyncio
+async def test_info_and_players_with_challenge():
+    server, port = await start_a2s_server(players=["Player", "", "Sniper"])
+    fake = server.get_protocol()
+    client = A2SClient(host="127.0.0.1", port=port, timeout=1)
+    try:
+        info = await client.info()
+        assert (info.name, info.map, info.folder) == ("Fake Server", "de_dust2", "cstrike")
+        assert (info.players, info.max_players, info.version) == (3, 32, "1.1.2.7/Stdio")
+
+        players = await client.players()
+        # A player who is still connecting has an empty name
+        assert [player.name for player in players] == ["Player", "Sniper"]
+        assert players[1].score == 2 and players[1].duration == 120.0
+
+        # The challenge from A2S_INFO is reused for A2S_PLAYER
+        assert fake.challenges == 1
+        assert client.stats()["challenges"] == 1
+    finally:
+        client.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_new_challenge_is_retried():
+    server, port = await start_a2s_server()
+    fake = server.get_protocol()
+    client = A2SClient(host="127.0.0.1", port=port, timeout=1, ttl=0)
+    try:
+        await client.players()
+        fake.rotate_challenge()
+        assert len(await client.players()) == 3
+        assert client.challenge == fake.challenge
+    finally:
+        client.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_goldsrc_info_and_split_players():
+    names = [f"player_{i:02}_with_a_long_nickname" for i in range(30)]
+    server, port = await start_a2s_server(goldsrc_info=True, info_challenge=False, players=names, split_size=400)
+    client = A2SClient(host="127.0.0.1", port=port, timeout=1)
+    try:
+        info = await client.info()
+        assert (info.map, info.players, info.bots) == ("de_dust2", 30, 0)
+        assert [player.name for player in await client.players()] == names
+    finally:
+        client.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_and_coalesced():
+    server, port = await start_a2s_server(info_challenge=False)
+    fake = server.get_protocol()
+    client = A2SClient(host="127.0.0.1", port=port, timeout=1, ttl=5)
+    try:
+        await asyncio.gather(*(client.info() for _ in range(10)))
+        assert fake.queries == 1
+        assert client.stats()["hits"] == 9
+
+        await client.info(max_age=0)
+        assert fake.queries == 2
+    finally:
+        client.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_silent_server_times_out():
+    server, port = await start_a2s_server(silent=True)
+    client = A2SClient(host="127.0.0.1", port=port, timeout=0.2)
+    started = time.monotonic()
+    try:
+        with pytest.raises(A2STimeout):
+            await client.info()
+    finally:
+        client.close()
+        server.close()
+
+    assert time.monotonic() - started < 1
+    assert client.stats()["timeouts"] == 1
+
+
+def test_malformed_replies():
+    with pytest.raises(MalformedResponse):
+        parse_info(b"I\x30Fake\x00de_dust2")
+    with pytest.raises(MalformedResponse):
+        parse_players(b"X\x00")
+
+    # The server may announce more players than fit into the reply
+    assert parse_players(b"D\x05\x00Joe\x00\x01\x00\x00\x00\x00\x00\x80\x3f")[0].name == "Joe"
@@ -0,0 +1,75 @@
+import ipaddress
+
+import pytest
+
+from webserver.access import IPAllowList, RateLimiter, TokenBucket, client_ip, parse_ip
+
+
+def ip(value):
+    return ipaddress.ip_address(value)
+
+
+def test_allowlist_matches_addresses_networks_and_ipv6():
+    allowlist = IPAllowList(["127.0.0.1", "10.0.0.0/8", "2001:db8::/32", "::1"])
+
+    assert ip("127.0.0.1") in allowlist
+    assert ip("10.20.30.40") in allowlist
+    assert ip("2001:db8::5") in allowlist
+    assert ip("::1") in allowlist
+    assert ip("11.0.0.1") not in allowlist
+    assert ip("2001:db9::1") not in allowlist
+    assert None not in allowlist
+
+
+def test_ipv4_mapped_ipv6_is_treated_as_ipv4():
+    allowlist = IPAllowList(["192.168.1.0/24"])
+    assert parse_ip("::ffff:192.168.1.7") in allowlist
+
+
+def test_allowlist_rejects_garbage():
+    with pytest.raises(ValueError):
+        IPAllowList(["localhost"])
+
+
+def test_forwarded_for_is_used_only_behind_a_trusted_proxy():
+    proxies = IPAllowList(["10.0.0.1", "10.0.1.0/24"])
+
+    # Direct connection: the header is ignored
+    assert client_ip("203.0.113.5", "127.0.0.1", proxies) == ip("203.0.113.5")
+    # Through two trusted proxies: the first untrusted hop from the right is the client
+    assert client_ip("10.0.0.1", "127.0.0.1, 198.51.100.2, 10.0.1.3", proxies) == ip("198.51.100.2")
+    # Garbage in the header: fall back to the last hop that could be parsed
+    assert client_ip("10.0.0.1", "198.51.100.2, junk", proxies) == ip("10.0.0.1")
+    assert client_ip("not an ip", None, proxies) is None
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == pytest.approx(0.5)
+    assert bucket.take(now + 0.5) == 0
+
+
+def test_rate_limiter_counts_per_ip_and_forgets_old_addresses():
+    limiter = RateLimiter(rate=1, burst=1, max_tracked=2)
+
+    assert limiter.check(ip("192.0.2.1")) == 0
+    assert limiter.check(ip("192.0.2.1")) > 0
+    assert limiter.check(ip("192.0.2.2")) == 0
+    assert limiter.check(ip("192.0.2.3")) == 0
+
+    stats = limiter.stats()
+    assert stats["limited"] == 1
+    assert stats["limited_by_ip"] == [("192.0.2.1", 1)]
+    assert stats["tracked"] == 2
+
+    # The oldest address was forgotten and starts with a full bucket
+    assert limiter.check(ip("192.0.2.1")) == 0
+
+
+def test_rate_limiter_disabled():
+    limiter = RateLimiter(rate=0, burst=0)
+    assert all(limiter.check(ip("192.0.2.1")) == 0 for _ in range(100))
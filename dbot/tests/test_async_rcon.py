@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+from rehlds.rcon import AsyncRCON, BadConnection, BadRCONPassword, RequestTimeout
+
+from fakes.hlds import PASSWORD, big_text, start_server
+
+
+@pytest.mark.asyncio
+async def test_connect_and_execute():
+    server, port = await start_server()
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        assert rcon.connected
+        assert await rcon.execute("version") == "echo: version"
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_bad_password():
+    server, port = await start_server()
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password="wrong", timeout=1)
+    try:
+        with pytest.raises(BadRCONPassword):
+            await rcon.connect()
+        assert not rcon.connected
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_dead_server_times_out_without_blocking_loop():
+    server, port = await start_server(silent=True)
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=0.2)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    started = time.monotonic()
+    try:
+        with pytest.raises(BadConnection):
+            await rcon.connect()
+    finally:
+        task.cancel()
+        server.close()
+
+    assert time.monotonic() - started < 1
+    assert ticks >= 5, "event loop was blocked while waiting for the server"
+
+
+@pytest.mark.asyncio
+async def test_per_request_timeout_and_late_reply_is_discarded():
+    server, port = await start_server()
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        server.get_protocol().delay = 0.1
+
+        with pytest.raises(RequestTimeout):
+            await rcon.execute("slow", timeout=0.05)
+
+        await asyncio.sleep(0.15)
+        server.get_protocol().delay = 0
+        assert await rcon.execute("fast") == "echo: fast"
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_challenge_is_cached_and_refreshed_on_bad_challenge():
+    server, port = await start_server()
+    hlds = server.get_protocol()
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        for _ in range(5):
+            assert await rcon.execute("version") == "echo: version"
+        assert hlds.challenge_requests == 1
+        assert rcon.challenge_refreshes == 0
+
+        hlds.challenge = 9999
+        assert await rcon.execute("version") == "echo: version"
+        assert hlds.challenge_requests == 2
+        assert rcon.challenge_refreshes == 1
+        assert rcon.challenge == "9999"
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("options", [{"split_size": 1400}, {"chunk_size": 1300}])
+async def test_large_response_is_reassembled(options):
+    server, port = await start_server(**options)
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        assert await rcon.execute("big 6000") == big_text(6000)
+        assert await rcon.execute("after") == "echo: after"
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_execute_iter_streams_chunks():
+    server, port = await start_server(chunk_size=1300)
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        chunks = [chunk async for chunk in rcon.execute_iter("big 6000")]
+        assert len(chunks) > 1
+        assert "".join(chunks) == big_text(6000) + "\n"
+    finally:
+        rcon.disconnect()
+        server.close()
@@ -0,0 +1,122 @@
+import pytest
+
+from cs_server.batch import command_budget, pack_commands, split_replies
+from cs_server.csrcon import BatchError, CSRCON
+from rehlds.rcon import RequestTimeout
+
+from fakes.hlds import PASSWORD, start_server
+
+
+def test_pack_commands_respects_size_limit():
+    commands = [f"amx_ban \"player{i}\" 0 \"cheat\"" for i in range(50)]
+    batches = pack_commands(commands, max_size=200)
+
+    assert [i for _, indexes in batches for i in indexes] == list(range(50))
+    assert all(len(payload.encode()) <= 200 for payload, _ in batches)
+    assert len(batches) < len(commands)
+    assert batches[0][0].split(";")[:2] == commands[:2]
+
+
+def test_command_with_unbalanced_quote_is_sent_alone():
+    batches = pack_commands(["say a", 'say "broken', "say b"], marker_prefix="-m-")
+
+    assert [indexes for _, indexes in batches] == [[0], [1], [2]]
+    assert batches[1][0] == 'say "broken'
+
+
+def test_split_replies():
+    response = "reply 0\n-m-0-\n\n-m-1-\nline 1\nline 2\n-m-2-"
+    assert split_replies(response, [0, 1, 2], "-m-") == ["reply 0", "", "line 1\nline 2"]
+    assert split_replies("reply 0\n-m-0-", [0, 1], "-m-") == ["reply 0", None]
+
+
+@pytest.mark.asyncio
+async def test_execute_many_uses_few_packets_and_splits_replies():
+    server, port = await start_server()
+    hlds = server.get_protocol()
+    cs = CSRCON("127.0.0.1", PASSWORD, port=port)
+    try:
+        await cs.connect_to_server()
+        before = hlds.commands
+
+        commands = [f"cmd{i}" for i in range(40)]
+        replies = await cs.execute_many(commands)
+
+        assert replies == [f"echo: cmd{i}" for i in range(40)]
+        assert hlds.commands - before <= 2
+
+        assert await cs.execute_many(["a", "b"], split=False) == [None, None]
+    finally:
+        await cs.disconnect()
+        cs.queue.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_execute_many_sends_batches_in_order_and_keeps_partial_replies(monkeypatch):
+    cs = CSRCON("127.0.0.1", PASSWORD, port=1)
+    sent = []
+
+    async def submit(payload, priority):
+        sent.append(payload)
+        if len(sent) == 2:
+            raise RequestTimeout("no reply")
+        return "\n".join(f"echo: {part}" if not part.startswith("echo ") else part[5:]
+                         for part in payload.split(";"))
+
+    monkeypatch.setattr(cs, "_submit", submit)
+    commands = [f"cmd{i}" for i in range(3)]
+
+    with pytest.raises(BatchError) as error:
+        await cs.execute_many(commands, max_size=40)
+
+    assert [payload.split(";")[0] for payload in sent] == ["cmd0", "cmd1"]
+    assert error.value.executed == 1
+    assert error.value.replies == ["echo: cmd0", None, None]
+    cs.queue.close()
+
+
+def test_batch_size_leaves_room_for_rcon_prefix():
+    cs = CSRCON("127.0.0.1", PASSWORD, port=1)
+    cs.cs_server.challenge = "1234567890"
+
+    prefix = f"rcon 1234567890 {PASSWORD} "
+    assert cs.batch_size() == command_budget(PASSWORD, "1234567890") == 1024 - len(prefix) - 1
+    assert command_budget(PASSWORD) == cs.batch_size()
+    cs.queue.close()
+
+
+@pytest.mark.asyncio
+async def test_execute_many_without_replies_prefers_the_channel():
+    server, port = await start_server()
+    hlds = server.get_protocol()
+    cs = CSRCON("127.0.0.1", PASSWORD, port=port)
+    delivered = []
+    live = True
+
+    async def channel(commands):
+        if live:
+            delivered.append(list(commands))
+        return live
+
+    cs.channel = channel
+    try:
+        await cs.connect_to_server()
+        before = hlds.commands
+
+        assert await cs.execute_many(["say a", "say b"], split=False) == [None, None]
+        assert delivered == [["say a", "say b"]]
+        assert hlds.commands == before
+        assert cs.stats()["channel_commands"] == 2
+
+        # Commands whose replies are needed never use the channel
+        assert await cs.execute_many(["cmd"]) == ["echo: cmd"]
+
+        # No client connected: fall back to RCON
+        live = False
+        assert await cs.execute_many(["say c"], split=False) == [None]
+        assert hlds.commands == before + 2
+    finally:
+        await cs.disconnect()
+        cs.queue.close()
+        server.close()
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cs_server import cs_server
+from observer.observer_client import Param
+
+
+class RecordingPool:
+    """Stands in for cs_pool: records every flushed batch, optionally running a hook mid-send."""
+
+    def __init__(self, during_send=None):
+        self.batches = []
+        self.during_send = during_send
+
+    async def fan_out(self, func):
+        self.batches.append(None)
+        index = len(self.batches) - 1
+        server = SimpleNamespace(execute_many=self.record(index))
+        return {"main": await func(server)}
+
+    def record(self, index):
+        async def execute_many(commands, priority, split=True):
+            self.batches[index] = list(commands)
+            if self.during_send:
+                hook, self.during_send = self.during_send, None
+                await hook()
+            await asyncio.sleep(0)
+            return [None] * len(commands)
+        return execute_many
+
+
+def discord_message(author, text):
+    return {Param.Message: SimpleNamespace(author=SimpleNamespace(display_name=author), content=text)}
+
+
+@pytest.mark.asyncio
+async def test_message_sent_during_flush_is_delivered(monkeypatch):
+    async def send_second():
+        await cs_server.send_message(discord_message("Bob", "second"))
+
+    pool = RecordingPool(during_send=send_second)
+    monkeypatch.setattr(cs_server, "cs_pool", pool)
+    monkeypatch.setattr(cs_server.config, "CS_CHAT_RELAY_DELAY", 0)
+    monkeypatch.setattr(cs_server, "chat_relay_task", None)
+
+    await cs_server.send_message(discord_message("Alice", "first"))
+    await asyncio.wait_for(cs_server.chat_relay_task, 1)
+
+    assert pool.batches == [['ultrahc_ds_send_msg "Alice" "first"'],
+                            ['ultrahc_ds_send_msg "Bob" "second"']]
+    assert not cs_server.chat_relay_buffer
+
+
+class BroadcastPool:
+    """Stands in for cs_pool: only the listed servers answer a broadcast."""
+
+    def __init__(self, names, answering):
+        self.names = names
+        self.answering = answering
+        self.commands = []
+
+    async def broadcast(self, command, priority):
+        self.commands.append(command)
+        return {name: "" for name in self.answering}
+
+
+def sync_maps_request(**data):
+    interaction = SimpleNamespace(user=SimpleNamespace(display_name="Admin"), followup=SimpleNamespace(sent=[]))
+
+    async def send(content, ephemeral):
+        interaction.followup.sent.append(content)
+
+    interaction.followup.send = send
+    return {Param.Interaction: interaction, **data}, interaction.followup.sent
+
+
+@pytest.mark.asyncio
+async def test_pool_wide_sync_maps_runs_while_default_server_is_down(monkeypatch):
+    pool = BroadcastPool(names=["main", "second"], answering=["second"])
+    monkeypatch.setattr(cs_server, "cs_pool", pool)
+    monkeypatch.setattr(cs_server.cs_server, "connected", False)
+
+    data, sent = sync_maps_request()
+    await cs_server.cmd_sync_maps(data)
+
+    assert pool.commands == [cs_server.syncMapsCommand]
+    assert sent == ["Не удалось: main"]
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from cs_server.circuit_breaker import CircuitBreaker, CircuitState
+from cs_server.csrcon import CSRCON, CircuitOpen
+
+from fakes.hlds import PASSWORD, start_server
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_threshold_and_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, base_delay=10, jitter=0, clock=clock)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+    assert breaker.retry_in == 10
+
+    clock.now = 10
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED and breaker.failures == 0
+
+
+def test_backoff_grows_and_is_capped():
+    clock = FakeClock()
+    breaker = CircuitBreaker(base_delay=10, max_delay=50, jitter=0, clock=clock)
+
+    delays = []
+    for _ in range(5):
+        breaker.trip()
+        delays.append(breaker.retry_in)
+        clock.now = breaker.opened_until
+        assert breaker.allow()
+
+    assert delays == [10, 20, 40, 50, 50]
+
+    # A failed probe reopens the circuit immediately
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_jitter_only_shortens_the_pause():
+    breaker = CircuitBreaker(base_delay=10, jitter=0.5, clock=FakeClock())
+    for _ in range(20):
+        breaker.reset()
+        breaker.trip()
+        assert 5 <= breaker.retry_in <= 10
+
+
+@pytest.mark.asyncio
+async def test_csrcon_fails_fast_while_open():
+    server, port = await start_server(silent=True)
+    csrcon = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=0.2, reconnect_interval=60)
+    try:
+        with pytest.raises(Exception):
+            await csrcon.connect_to_server()
+        assert csrcon.breaker.is_open
+
+        started = time.monotonic()
+        with pytest.raises(CircuitOpen):
+            await csrcon.connect_to_server()
+        with pytest.raises(CircuitOpen):
+            await csrcon.exec("status")
+        assert time.monotonic() - started < 0.05
+        assert csrcon.metrics.connects == 1
+
+        # Manual reconnect skips the pause
+        server.get_protocol().silent = False
+        csrcon.breaker.reset()
+        await csrcon.connect_to_server()
+        assert csrcon.connected and csrcon.breaker.state is CircuitState.CLOSED
+    finally:
+        await csrcon.disconnect()
+        csrcon.queue.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_command_timeouts_open_the_circuit():
+    server, port = await start_server()
+    csrcon = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=0.05, failure_threshold=2)
+    try:
+        await csrcon.connect_to_server()
+        server.get_protocol().silent = True
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                await csrcon.exec("status")
+        assert csrcon.breaker.is_open
+        assert csrcon.stats()["circuit"] == "open"
+    finally:
+        await csrcon.disconnect()
+        csrcon.queue.close()
+        server.close()
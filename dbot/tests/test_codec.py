@@ -0,0 +1,51 @@
+import pytest
+
+from rehlds.assembler import MalformedPacket
+from rehlds.codec import RCONCodec, parse_challenge
+
+
+def test_parse_challenge():
+    assert parse_challenge(b"\xFF\xFF\xFF\xFFA00000000 1234567 2 0 1\n\x00") == "1234567"
+    assert parse_challenge(b"\xFF\xFF\xFF\xFFchallenge rcon 42\n") == "rcon"
+
+    # Straight from a recv_into buffer, ignoring whatever follows the packet
+    buffer = bytearray(64)
+    packet = b"\xFF\xFF\xFF\xFFA00000000 777\n"
+    buffer[:len(packet)] = packet
+    buffer[len(packet):len(packet) + 5] = b" 9999"
+    assert parse_challenge(buffer, len(packet)) == "777"
+
+    with pytest.raises(MalformedPacket):
+        parse_challenge(b"\xFF\xFF\xFF\xFFA00000000")
+    with pytest.raises(MalformedPacket):
+        parse_challenge(b"\xFF\xFF\xFF\xFFA00000000 \n")
+
+
+def test_encode_command_matches_wire_format():
+    codec = RCONCodec("secret")
+
+    assert bytes(codec.encode_command("123", "status")) == b"\xFF\xFF\xFF\xFFrcon 123 secret status\n"
+    assert bytes(codec.encode_command("123", "say hello")) == b"\xFF\xFF\xFF\xFFrcon 123 secret say hello\n"
+    assert bytes(codec.encode_command("123", "say привет")) == \
+        b"\xFF\xFF\xFF\xFFrcon 123 secret say " + "привет".encode() + b"\n"
+
+
+def test_bare_commands_are_cached_per_challenge():
+    codec = RCONCodec("secret")
+
+    first = codec.encode_command("123", "status")
+    assert codec.encode_command("123", "status") is first
+
+    # A new challenge invalidates the prebuilt packets
+    assert bytes(codec.encode_command("456", "status")) == b"\xFF\xFF\xFF\xFFrcon 456 secret status\n"
+
+
+def test_long_command_does_not_overflow_buffer():
+    codec = RCONCodec("secret", buffer_size=64)
+    command = "say " + "x" * 200
+
+    packet = codec.encode_command("1", command)
+    assert bytes(packet) == b"\xFF\xFF\xFF\xFFrcon 1 secret " + command.encode() + b"\n"
+
+    # The shared buffer is still usable afterwards
+    assert bytes(codec.encode_command("1", "say hi")) == b"\xFF\xFF\xFF\xFFrcon 1 secret say hi\n"
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from cs_server.command_queue import CommandQueue, CommandPriority, QueueFull
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_one_at_a_time():
+    queue = CommandQueue()
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*(queue.submit(job) for _ in range(5)))
+    assert results == ["ok"] * 5
+    assert peak == 1
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_admin_lane_runs_before_chat():
+    queue = CommandQueue()
+    order = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    def job(name):
+        async def run():
+            order.append(name)
+        return run
+
+    first = asyncio.create_task(queue.submit(blocker))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(queue.submit(job("chat"), CommandPriority.CHAT)),
+        asyncio.create_task(queue.submit(job("status"), CommandPriority.NORMAL)),
+        asyncio.create_task(queue.submit(job("kick"), CommandPriority.ADMIN)),
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(first, *waiting)
+
+    assert order == ["kick", "status", "chat"]
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_lane_is_rejected_and_counted():
+    queue = CommandQueue(max_size=2)
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    running = asyncio.create_task(queue.submit(blocker, CommandPriority.CHAT))
+    await asyncio.sleep(0)
+    pending = [asyncio.create_task(queue.submit(blocker, CommandPriority.CHAT)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFull):
+        await queue.submit(blocker, CommandPriority.CHAT)
+
+    # Other lanes are not affected by a full chat lane
+    admin = asyncio.create_task(queue.submit(blocker, CommandPriority.ADMIN))
+    await asyncio.sleep(0)
+
+    stats = queue.stats()
+    assert stats["chat"] == {"depth": 2, "submitted": 3, "rejected": 1}
+    assert stats["admin"]["depth"] == 1
+
+    gate.set()
+    await asyncio.gather(running, admin, *pending)
+    assert queue.depth() == 0
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_job_errors_are_returned_to_the_caller():
+    queue = CommandQueue()
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await queue.submit(failing)
+
+    async def ok():
+        return 1
+
+    assert await queue.submit(ok) == 1
+    queue.close()
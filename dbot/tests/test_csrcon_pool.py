@@ -0,0 +1,86 @@
+import pytest
+
+from cs_server.csrcon import CSServerError
+from cs_server.csrcon_pool import CSRCONPool, UnknownServer
+
+from fakes.hlds import PASSWORD, start_server
+
+
+def test_pool_requires_unique_servers():
+    with pytest.raises(CSServerError):
+        CSRCONPool(servers=[])
+
+    server = {"name": "a", "host": "127.0.0.1", "password": PASSWORD}
+    with pytest.raises(CSServerError):
+        CSRCONPool(servers=[server, server])
+
+
+@pytest.mark.asyncio
+async def test_connect_broadcast_and_health():
+    first, first_port = await start_server()
+    second, second_port = await start_server()
+    dead, dead_port = await start_server(silent=True)
+
+    pool = CSRCONPool(servers=[
+        {"name": "public", "host": "127.0.0.1", "port": first_port, "password": PASSWORD},
+        {"name": "mix", "host": "127.0.0.1", "port": second_port, "password": PASSWORD},
+        {"name": "dead", "host": "127.0.0.1", "port": dead_port, "password": PASSWORD},
+    ], timeout=0.2, reconnect_interval=60)
+    try:
+        results = await pool.connect_due()
+        assert results["public"] is None and results["mix"] is None
+        assert isinstance(results["dead"], CSServerError)
+
+        assert pool.get() is pool.get("public")
+        with pytest.raises(UnknownServer):
+            pool.get("missing")
+
+        assert await pool.broadcast("say hi") == {"public": "echo: say hi", "mix": "echo: say hi"}
+
+        status = pool.status()
+        assert status["public"]["connected"] and status["public"]["latency"] is not None
+        assert status["dead"]["failures"] == 1
+        assert status["dead"]["circuit"] == "open"
+        # Jitter shortens the pause by at most half
+        assert status["dead"]["reconnect_in"] > 25
+
+        # The dead server is not retried before its reconnect time
+        assert await pool.connect_due() == {}
+    finally:
+        for name in pool.names:
+            await pool.disconnect(name)
+            pool.get(name).queue.close()
+        for server in (first, second, dead):
+            server.close()
+
+
+@pytest.mark.asyncio
+async def test_tripped_server_is_marked_down_and_skipped():
+    first, first_port = await start_server()
+    second, second_port = await start_server()
+
+    pool = CSRCONPool(servers=[
+        {"name": "public", "host": "127.0.0.1", "port": first_port, "password": PASSWORD},
+        {"name": "mix", "host": "127.0.0.1", "port": second_port, "password": PASSWORD},
+    ], timeout=0.1, reconnect_interval=60)
+    try:
+        await pool.connect_due()
+        second.get_protocol().silent = True
+
+        # Each broadcast is one failure; the breaker opens on the third
+        for _ in range(3):
+            results = await pool.broadcast("say hi")
+            assert isinstance(results["mix"], CSServerError)
+
+        assert pool.get("mix").breaker.is_open
+        assert not pool.get("mix").connected
+
+        requests = pool.get("mix").metrics.requests
+        assert await pool.broadcast("say hi") == {"public": "echo: say hi"}
+        assert pool.get("mix").metrics.requests == requests
+    finally:
+        for name in pool.names:
+            await pool.disconnect(name)
+            pool.get(name).queue.close()
+        for server in (first, second):
+            server.close()
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from observer.event_queue import EventQueue, OverflowPolicy
+from observer.observer import Event, Observer
+
+
+class Gate:
+    """A handler that records events and waits until released."""
+
+    def __init__(self):
+        self.seen = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, value):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+            self.seen.append(value)
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_latest_wins_keeps_only_newest_pending_event():
+    gate = Gate()
+    queue = EventQueue(gate, policy=OverflowPolicy.LATEST_WINS)
+
+    for i in range(10):
+        await queue.put((i,), {})
+        await asyncio.sleep(0)
+
+    gate.release.set()
+    await queue.join()
+
+    # The first event was already running; of the rest only the newest survives
+    assert gate.seen == [0, 9]
+    assert queue.stats()["coalesced"] == 8
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest():
+    gate = Gate()
+    queue = EventQueue(gate, max_size=3, policy=OverflowPolicy.DROP_OLDEST)
+
+    await queue.put((0,), {})
+    await asyncio.sleep(0)
+    for i in range(1, 7):
+        await queue.put((i,), {})
+
+    assert queue.depth == 3
+    gate.release.set()
+    await queue.join()
+
+    assert gate.seen == [0, 4, 5, 6]
+    stats = queue.stats()
+    assert (stats["dropped"], stats["max_depth"], stats["processed"]) == (3, 3, 4)
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_block_applies_backpressure():
+    gate = Gate()
+    queue = EventQueue(gate, max_size=2, policy=OverflowPolicy.BLOCK)
+
+    await queue.put((0,), {})
+    await asyncio.sleep(0)
+    await queue.put((1,), {})
+    await queue.put((2,), {})
+
+    blocked = asyncio.create_task(queue.put((3,), {}))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert not queue.put_nowait((4,), {})
+
+    gate.release.set()
+    await blocked
+    await queue.join()
+
+    assert gate.seen == [0, 1, 2, 3]
+    assert queue.stats()["blocked"] == 1
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    gate = Gate()
+    queue = EventQueue(gate, concurrency=3, max_size=100)
+
+    for i in range(20):
+        await queue.put((i,), {})
+    await asyncio.sleep(0.01)
+
+    assert gate.running == 3
+    gate.release.set()
+    await queue.join()
+
+    assert gate.peak == 3
+    assert sorted(gate.seen) == list(range(20))
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_observer_queued_event():
+    observer = Observer()
+    gate = Gate()
+    observer.subscribe(Event.WBH_INFO)(gate)
+    observer.configure(Event.WBH_INFO, policy=OverflowPolicy.LATEST_WINS)
+
+    # notify() only enqueues: it returns while the subscriber is still blocked
+    for i in range(5):
+        await observer.notify(Event.WBH_INFO, i)
+    observer.notify_nowait(Event.WBH_INFO, 5)
+
+    gate.release.set()
+    await observer.drain()
+
+    # The worker never got to run in between: only the newest snapshot is handled
+    assert gate.seen == [5]
+    assert observer.stats()["wbh_info"]["coalesced"] == 5
+    observer.close()
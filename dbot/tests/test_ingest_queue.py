@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from webserver.ingest_queue import IngestFull, IngestQueue, IngestUnavailable
+
+
+class Gate:
+    """A job that records its argument and waits until released."""
+
+    def __init__(self):
+        self.seen = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, value):
+        await self.release.wait()
+        self.seen.append(value)
+
+
+@pytest.mark.asyncio
+async def test_jobs_with_one_key_run_in_order():
+    seen = []
+
+    async def job(value, delay):
+        await asyncio.sleep(delay)
+        seen.append(value)
+
+    queue = IngestQueue(workers=4)
+    # The first job of the key is the slowest; the second must still wait for it
+    queue.submit("player", job, 1, 0.02)
+    queue.submit("player", job, 2, 0)
+    await queue.join()
+
+    assert seen == [1, 2]
+    stats = queue.stats()
+    assert stats["accepted"] == stats["processed"] == 2
+    assert stats["queue_time"]["count"] == 2
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_submit_does_not_wait_for_the_job():
+    gate = Gate()
+    queue = IngestQueue(workers=2)
+
+    queue.submit("a", gate, 1)
+    await asyncio.sleep(0)
+
+    assert gate.seen == []
+    assert queue.stats()["running"] == 1
+
+    gate.release.set()
+    await queue.join()
+    assert gate.seen == [1]
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_the_whole_batch():
+    gate = Gate()
+    queue = IngestQueue(workers=1, max_size=3)
+    queue.submit_many([("a", gate, (1,)), ("a", gate, (2,))])
+
+    with pytest.raises(IngestFull):
+        queue.submit_many([("a", gate, (3,)), ("a", gate, (4,))])
+
+    queue.submit("a", gate, 3)
+    gate.release.set()
+    await queue.join()
+
+    assert gate.seen == [1, 2, 3]
+    assert queue.stats()["rejected_full"] == 1
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_stalled_queue_is_unavailable():
+    gate = Gate()
+    queue = IngestQueue(workers=1, max_wait=0.01)
+    queue.submit("a", gate, 1)
+    queue.submit("a", gate, 2)
+    await asyncio.sleep(0.02)
+
+    # The second job has waited longer than max_wait behind the stuck first one
+    with pytest.raises(IngestUnavailable):
+        queue.submit("b", gate, 3)
+    assert queue.stats()["rejected_unavailable"] == 1
+
+    gate.release.set()
+    await queue.join()
+    queue.submit("b", gate, 3)
+    await queue.join()
+    assert gate.seen == [1, 2, 3]
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_job_is_counted_and_reported():
+    errors = []
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    queue = IngestQueue()
+    queue.on_error = errors.append
+    queue.submit("a", broken)
+    await queue.join()
+
+    assert queue.stats()["failed"] == 1
+    assert isinstance(errors[0], RuntimeError)
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_closed_queue_is_unavailable():
+    gate = Gate()
+    queue = IngestQueue()
+    queue.submit("a", gate, 1)
+    queue.close()
+
+    with pytest.raises(IngestUnavailable):
+        queue.submit("a", gate, 2)
+    await queue.join()
+    assert queue.stats()["depth"] == 0
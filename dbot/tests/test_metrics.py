@@ -0,0 +1,86 @@
+import pytest
+
+from cs_server.csrcon import CSRCON, CommandExecutionError
+from rehlds.metrics import Histogram, RCONMetrics, command_type, maxCommandTypes, otherCommands
+from rehlds.rcon import AsyncRCON, RequestTimeout
+
+from fakes.hlds import PASSWORD, start_server
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+    for value in [0.005] * 90 + [0.05] * 9 + [3.0]:
+        histogram.observe(value)
+
+    assert histogram.count == 100
+    assert histogram.counts == [90, 9, 0, 1]
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.99) == 0.1
+    assert histogram.quantile(1.0) == 3.0
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_command_types_are_bounded():
+    assert command_type("amx_kick #12 afk") == "amx_kick"
+    assert command_type("say a;echo --m-0-") == "batch"
+
+    metrics = RCONMetrics()
+    for index in range(maxCommandTypes + 5):
+        metrics.observe(f"cmd{index}", 0.01)
+
+    assert len(metrics.latency) == maxCommandTypes + 1
+    assert metrics.latency[otherCommands].count == 5
+
+
+@pytest.mark.asyncio
+async def test_async_rcon_counts_traffic_and_timeouts():
+    server, port = await start_server()
+    rcon = AsyncRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        await rcon.execute("status")
+
+        metrics = rcon.metrics
+        assert metrics.connects == 1 and metrics.connect_failures == 0
+        # getchallenge + stats + status
+        assert metrics.packets_out == 3 and metrics.packets_in == 3
+        assert metrics.bytes_out > 0 and metrics.bytes_in > 0
+        assert metrics.latency["status"].count == 1
+
+        server.get_protocol().silent = True
+        with pytest.raises(RequestTimeout):
+            await rcon.execute("status", timeout=0.05)
+        assert (metrics.requests, metrics.errors, metrics.timeouts) == (3, 1, 1)
+
+        # The challenge is dropped after a timeout, so the next request times out on getchallenge
+        with pytest.raises(RequestTimeout):
+            await rcon.execute("status", timeout=0.05)
+        assert metrics.challenge_timeouts == 1
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_csrcon_stats():
+    server, port = await start_server()
+    csrcon = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=0.1)
+    try:
+        await csrcon.connect_to_server()
+        await csrcon.exec("say hi")
+
+        server.get_protocol().silent = True
+        with pytest.raises(CommandExecutionError):
+            await csrcon.exec("say hi")
+
+        stats = csrcon.stats()
+        assert stats["connected"]
+        assert stats["commands"]["connects"] == 1
+        assert stats["commands"]["latency"]["say"]["count"] == 1
+        assert (stats["commands"]["errors"], stats["commands"]["timeouts"]) == (1, 1)
+        assert stats["rcon"]["requests"] == 3
+        assert stats["queue"]["normal"]["submitted"] == 2
+    finally:
+        await csrcon.disconnect()
+        csrcon.queue.close()
+        server.close()
@@ -0,0 +1,263 @@
+import asyncio
+
+import pytest
+
+from observer.observer import Event, NoServerRoute, Observer, RouteTimeout
+
+
+@pytest.mark.asyncio
+async def test_single_async_subscriber_is_awaited_directly():
+    observer = Observer()
+    received = []
+
+    @observer.subscribe(Event.WBH_MESSAGE)
+    async def on_message(data):
+        received.append((data, asyncio.current_task()))
+
+    caller = asyncio.current_task()
+    await observer.notify(Event.WBH_MESSAGE, {"message": "hi"})
+
+    # No extra task per event: the subscriber ran inside the caller's task
+    assert received == [({"message": "hi"}, caller)]
+
+
+@pytest.mark.asyncio
+async def test_sync_and_async_subscribers():
+    observer = Observer()
+    calls = []
+
+    @observer.subscribe(Event.WBH_INFO)
+    def plain(data):
+        calls.append(("plain", data))
+
+    @observer.subscribe(Event.WBH_INFO)
+    async def first(data):
+        await asyncio.sleep(0.01)
+        calls.append(("first", data))
+
+    @observer.subscribe(Event.WBH_INFO)
+    async def second(data):
+        calls.append(("second", data))
+
+    await observer.notify(Event.WBH_INFO, 1)
+
+    assert calls[0] == ("plain", 1)
+    assert sorted(calls[1:]) == [("first", 1), ("second", 1)]
+    assert observer.subscribers(Event.WBH_INFO) == [plain, first, second]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_errors_do_not_reach_notify():
+    observer = Observer()
+    calls = []
+
+    @observer.subscribe(Event.BE_MESSAGE)
+    def broken_sync(data):
+        raise ValueError("sync")
+
+    @observer.subscribe(Event.BE_MESSAGE)
+    async def broken_async(data):
+        raise ValueError("async")
+
+    @observer.subscribe(Event.BE_MESSAGE)
+    async def healthy(data):
+        calls.append(data)
+
+    await observer.notify(Event.BE_MESSAGE, "x")
+    assert calls == ["x"]
+
+    # Events without subscribers are a no-op
+    await observer.notify(Event.BC_PING)
+
+
+@pytest.mark.asyncio
+async def test_notify_nowait_runs_in_background():
+    observer = Observer()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    @observer.subscribe(Event.WBH_MESSAGE)
+    async def slow(data):
+        started.set()
+        await release.wait()
+
+    task = observer.notify_nowait(Event.WBH_MESSAGE, {})
+    assert not task.done()
+
+    await started.wait()
+    release.set()
+    await task
+
+    assert observer.notify_nowait(Event.BC_PING) is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_notify_cancels_subscribers():
+    observer = Observer()
+    cancelled = []
+
+    async def waiter(data):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(data)
+            raise
+
+    observer.subscribe(Event.WBH_INFO)(waiter)
+    observer.subscribe(Event.WBH_INFO)(waiter)
+
+    task = asyncio.create_task(observer.notify(Event.WBH_INFO, "x"))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert cancelled == ["x", "x"]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_timing_and_failures():
+    observer = Observer(slow_threshold=0.02)
+    slow_calls = []
+    errors = []
+    observer.on_slow = lambda event, name, elapsed: slow_calls.append((event, name.rsplit(".", 1)[-1]))
+    observer.on_error = lambda event, name, err: errors.append((event, name.rsplit(".", 1)[-1], str(err)))
+
+    @observer.subscribe(Event.WBH_INFO)
+    def broken(data):
+        raise ValueError("boom")
+
+    @observer.subscribe(Event.WBH_INFO)
+    async def slow(data):
+        await asyncio.sleep(0.03)
+
+    @observer.subscribe(Event.WBH_INFO)
+    async def fast(data):
+        pass
+
+    for _ in range(2):
+        await observer.notify(Event.WBH_INFO, {})
+
+    stats = observer.subscriber_stats()["wbh_info"]
+    by_name = {name.rsplit(".", 1)[-1]: entry for name, entry in stats.items()}
+
+    assert {name: entry["calls"] for name, entry in by_name.items()} == {"broken": 2, "slow": 2, "fast": 2}
+    assert by_name["broken"]["failures"] == 2
+    assert by_name["broken"]["last_error"] == "ValueError('boom')"
+    assert by_name["slow"]["slow"] == 2 and by_name["fast"]["slow"] == 0
+    assert by_name["slow"]["latency"]["max"] >= 0.03
+
+    # The slowest subscriber comes first
+    assert list(by_name)[0] == "slow"
+    assert slow_calls == [(Event.WBH_INFO, "slow")] * 2
+    assert errors == [(Event.WBH_INFO, "broken", "boom")] * 2
+
+
+@pytest.mark.asyncio
+async def test_broken_monitoring_hook_does_not_break_dispatch():
+    observer = Observer(slow_threshold=0.001)
+    observer.on_slow = observer.on_error = lambda *args: 1 / 0
+    calls = []
+
+    @observer.subscribe(Event.WBH_MESSAGE)
+    async def handler(data):
+        await asyncio.sleep(0.005)
+        calls.append(data)
+        raise RuntimeError("handler")
+
+    await observer.notify(Event.WBH_MESSAGE, 1)
+
+    assert calls == [1]
+    entry = next(iter(observer.subscriber_stats()["wbh_message"].values()))
+    assert entry["failures"] == 1 and entry["slow"] == 1
+
+
+@pytest.mark.asyncio
+async def test_route_timeout_with_and_without_fallback():
+    routes = NoServerRoute()
+
+    @routes.create_route("/slow", timeout=0.01, fallback=[])
+    async def slow():
+        await asyncio.sleep(1)
+
+    @routes.create_route("/strict", timeout=0.01)
+    async def strict():
+        await asyncio.sleep(1)
+
+    assert await routes.call_route("/slow") == []
+    with pytest.raises(asyncio.TimeoutError):
+        await routes.call_route("/strict")
+    with pytest.raises(RouteTimeout):
+        await routes.call_route("/strict")
+
+    assert routes.stats()["/slow"]["timeouts"] == 1
+    assert routes.stats()["/strict"]["timeouts"] == 2
+    # Unknown routes still answer None
+    assert await routes.call_route("/missing") is None
+
+
+@pytest.mark.asyncio
+async def test_route_memoization_and_single_flight():
+    routes = NoServerRoute()
+    calls = []
+
+    @routes.create_route("/maps", ttl=60)
+    async def maps(prefix=""):
+        calls.append(prefix)
+        await asyncio.sleep(0.01)
+        return [prefix + "de_dust2"]
+
+    @routes.create_route("/update", invalidates=("/maps",))
+    async def update():
+        return True
+
+    # Concurrent calls with the same arguments share one call
+    results = await asyncio.gather(*(routes.call_route("/maps") for _ in range(5)))
+    assert results == [["de_dust2"]] * 5
+    assert await routes.call_route("/maps") == ["de_dust2"]
+    assert await routes.call_route("/maps", prefix="x_") == ["x_de_dust2"]
+    assert calls == ["", "x_"]
+
+    stats = routes.stats()["/maps"]
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["cached"]) == (2, 4, 1, 2)
+
+    # A write route drops the memoized answers
+    await routes.call_route("/update")
+    await routes.call_route("/maps")
+    assert calls == ["", "x_", ""]
+
+
+@pytest.mark.asyncio
+async def test_route_invalidation_during_call_and_errors():
+    routes = NoServerRoute()
+    release = asyncio.Event()
+    answers = iter([None, "old", "new"])
+
+    @routes.create_route("/value", ttl=60)
+    async def value():
+        await release.wait()
+        return next(answers)
+
+    @routes.create_route("/broken", ttl=60)
+    async def broken():
+        raise ValueError("broken")
+
+    # None is never memoized
+    release.set()
+    assert await routes.call_route("/value") is None
+
+    # An answer started before invalidate() is returned but not memoized
+    release.clear()
+    pending = asyncio.create_task(routes.call_route("/value"))
+    await asyncio.sleep(0)
+    routes.invalidate("/value")
+    release.set()
+    assert await pending == "old"
+    assert await routes.call_route("/value") == "new"
+    assert await routes.call_route("/value") == "new"
+
+    with pytest.raises(ValueError):
+        await routes.call_route("/broken")
+    assert routes.stats()["/broken"]["errors"] == 1
+    assert routes.stats()["/value"]["latency"]["count"] == 3
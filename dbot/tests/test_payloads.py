@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from webserver import payloads
+from webserver.payloads import (InfoPayload, MessagePayload, NotifyPayload, PayloadError, UnsupportedPayload,
+                                decode_body, decode_payload)
+
+MESSAGE = {"type": "message", "nick": "Player", "message": "hello", "team": 1,
+           "channel": "(ALL)", "steam_id": "STEAM_0:1:42"}
+INFO = {"type": "info", "map": "de_dust2", "max_players": 32,
+        "current_players": [{"name": "Player", "steam_id": "STEAM_0:1:42", "stats": [10, 2, 1]}]}
+
+
+def test_message_decodes_into_slotted_object():
+    payload = decode_payload(MESSAGE)
+
+    assert isinstance(payload, MessagePayload)
+    assert (payload.nick, payload.message, payload.team, payload.channel, payload.steam_id) == \
+        ("Player", "hello", 1, "(ALL)", "STEAM_0:1:42")
+    assert not hasattr(payload, "__dict__")
+
+
+def test_optional_fields_get_defaults():
+    payload = decode_payload({"type": "message", "nick": "Player", "message": "hi", "team": 2})
+    assert payload.channel == "" and payload.steam_id == ""
+
+    notify = decode_payload({"type": "notify", "nick": "Player", "message": "help"})
+    assert isinstance(notify, NotifyPayload) and notify.steam_id == ""
+
+
+def test_info_decodes_players():
+    payload = decode_payload(INFO)
+
+    assert isinstance(payload, InfoPayload)
+    assert payload.map == "de_dust2" and payload.max_players == 32
+    assert payload.current_players[0].stats == (10, 2, 1)
+    assert payload.current_players[0].as_dict() == INFO["current_players"][0]
+
+
+@pytest.mark.parametrize("data, error", [
+    ([], "Ожидается объект"),
+    ({"type": "kick"}, "Неизвестный тип"),
+    ({"type": "message", "nick": "Player", "team": 1}, "нет поля message"),
+    ({"type": "message", "nick": "Player", "message": "hi", "team": "1"}, "team"),
+    ({"type": "message", "nick": "Player", "message": "hi", "team": True}, "team"),
+    ({"type": "info", "map": "de_dust2", "max_players": 32, "current_players": {}}, "список"),
+    ({"type": "info", "map": "de_dust2", "max_players": 32,
+      "current_players": [{"name": "Player", "stats": [1, 2]}]}, "stats"),
+])
+def test_malformed_payloads_are_rejected(data, error):
+    with pytest.raises(PayloadError, match=error):
+        decode_payload(data)
+
+
+def test_decode_body_json():
+    assert decode_body(json.dumps(MESSAGE).encode(), "application/json") == MESSAGE
+    with pytest.raises(PayloadError):
+        decode_body(b"{", "application/json")
+
+
+def test_decode_body_msgpack():
+    if payloads.msgpack is None:
+        with pytest.raises(UnsupportedPayload):
+            decode_body(b"\x80", "application/msgpack")
+        return
+
+    body = payloads.msgpack.packb(MESSAGE)
+    assert decode_body(body, "application/msgpack") == MESSAGE
+    batch = payloads.msgpack.packb([MESSAGE, INFO]) + payloads.msgpack.packb(MESSAGE)
+    assert list(payloads.iter_msgpack(batch)) == [MESSAGE, INFO, MESSAGE]
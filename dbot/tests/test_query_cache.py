@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from cs_server.csrcon import CSRCON
+from cs_server.query_cache import QueryCache, invalidates, is_read_only
+
+from fakes.hlds import PASSWORD, start_server
+
+
+def test_read_only_and_write_classification():
+    assert is_read_only("status")
+    assert is_read_only("  maps   * ")
+    assert is_read_only("mp_timelimit")
+    assert not is_read_only("mp_timelimit 30")
+    assert not is_read_only("status;changelevel de_dust2")
+
+    assert invalidates("changelevel de_dust2")
+    assert invalidates("amx_map de_inferno")
+    assert invalidates("mp_timelimit 30")
+    assert invalidates('say hi;amx_kick "#12"')
+    assert not invalidates('ultrahc_ds_send_msg "user" "hello"')
+    assert not invalidates("say hi;echo --m-0-")
+    assert not invalidates("status")
+
+
+@pytest.mark.parametrize("command", ["amxx", "amxx list", "amxx plugins", "AMXX modules", "meta list", "meta info"])
+def test_amxx_and_meta_reads(command):
+    assert is_read_only(command)
+    assert not invalidates(command)
+
+
+@pytest.mark.parametrize("command", ["amxx pause admin.amxx", "amxx unpause admin.amxx",
+                                     "meta unload amxx", "meta load addons/foo.so", "meta refresh"])
+def test_amxx_and_meta_writes(command):
+    assert not is_read_only(command)
+    assert invalidates(command)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_are_coalesced():
+    cache = QueryCache(ttl=10)
+    calls = 0
+    gate = asyncio.Event()
+
+    async def run():
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return "result"
+
+    waiters = [asyncio.create_task(cache.get_or_run("status", run)) for _ in range(5)]
+    await asyncio.sleep(0)
+    # Cancelling one caller does not cancel the shared request
+    waiters[0].cancel()
+    gate.set()
+
+    results = await asyncio.gather(*waiters[1:])
+    assert results == ["result"] * 4
+    assert calls == 1
+    assert await cache.get_or_run("status", run) == "result"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "coalesced": 4, "invalidations": 0}
+
+
+@pytest.mark.asyncio
+async def test_result_started_before_invalidation_is_not_cached():
+    cache = QueryCache(ttl=10)
+    gate = asyncio.Event()
+
+    async def run():
+        await gate.wait()
+        return "stale"
+
+    pending = asyncio.create_task(cache.get_or_run("maps", run))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    gate.set()
+
+    assert await pending == "stale"
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_read_after_invalidation_does_not_join_the_old_request():
+    cache = QueryCache(ttl=10)
+    old_gate, new_gate = asyncio.Event(), asyncio.Event()
+
+    async def run_old():
+        await old_gate.wait()
+        return "old"
+
+    async def run_new():
+        await new_gate.wait()
+        return "new"
+
+    first = asyncio.create_task(cache.get_or_run("status", run_old))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    second = asyncio.create_task(cache.get_or_run("status", run_new))
+    await asyncio.sleep(0)
+
+    # The old request finishing first must not drop the new one from in-flight
+    old_gate.set()
+    assert await first == "old"
+    third = asyncio.create_task(cache.get_or_run("status", run_old))
+    new_gate.set()
+
+    assert await second == "new"
+    assert await third == "new"
+    assert cache.stats()["coalesced"] == 1
+    assert cache.stats()["misses"] == 2
+    assert await cache.get_or_run("status", run_old) == "new"
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    cache = QueryCache()
+
+    async def run():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*(cache.get_or_run("status", run) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_csrcon_query_hits_server_once_until_a_write():
+    server, port = await start_server(delay=0.01)
+    hlds = server.get_protocol()
+    csrcon = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1, query_ttl=5)
+    try:
+        await csrcon.connect_to_server()
+        commands = hlds.commands
+
+        replies = await asyncio.gather(*(csrcon.query("status") for _ in range(10)))
+        assert len(set(replies)) == 1 and "hostname:" in replies[0]
+        await csrcon.query("status")
+        assert hlds.commands == commands + 1
+
+        await csrcon.exec('ultrahc_ds_send_msg "a" "b"')
+        await csrcon.query("status")
+        assert hlds.commands == commands + 2
+
+        await csrcon.exec("changelevel de_dust2")
+        await csrcon.query("status")
+        assert hlds.commands == commands + 4
+
+        # Writes are never cached
+        await csrcon.query("mp_timelimit 30")
+        await csrcon.query("mp_timelimit 30")
+        assert hlds.commands == commands + 6
+        assert csrcon.stats()["cache"]["coalesced"] == 9
+    finally:
+        await csrcon.disconnect()
+        csrcon.queue.close()
+        server.close()
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from observer.observer import Event, Observer, Param
+from observer.recorder import EventRecorder, read_recording, restore, sanitize
+
+
+class Interaction:
+    """Stands in for a Discord object that cannot be recorded."""
+
+
+def test_sanitize_drops_discord_objects_and_restore_stubs_them():
+    payload = {Param.Interaction: Interaction(), "target": "bob", "players": [{"name": "a"}], 5: (1, 2.5)}
+
+    recorded = sanitize(payload)
+    assert recorded == {"Param.Interaction": {"omitted": "Interaction"}, "target": "bob",
+                        "players": [{"name": "a"}], "5": [1, 2.5]}
+
+    restored = restore(recorded, lambda type_name: f"stub {type_name}")
+    assert restored == {Param.Interaction: "stub Interaction", "target": "bob",
+                        "players": [{"name": "a"}], "5": [1, 2.5]}
+
+
+def test_recording_is_append_only(tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+
+    first = EventRecorder(path, flush_events=2)
+    for index in range(3):
+        first.record(Event.WBH_MESSAGE, ({"message": index},), {})
+    # Two events are on disk already, the third waits for close()
+    assert [args for _, _, args, _ in read_recording(path)] == [[{"message": 0}], [{"message": 1}]]
+    first.close()
+
+    # A restarted bot appends to the same file
+    second = EventRecorder(path)
+    second.record(Event.WBH_INFO, ({"info_message": "x"},), {"source": "a2s"})
+    second.close()
+
+    records = list(read_recording(path))
+    assert [event for _, event, _, _ in records] == ["wbh_message"] * 3 + ["wbh_info"]
+    assert records[-1][3] == {"source": "a2s"}
+    assert all(earlier[0] <= later[0] for earlier, later in zip(records, records[1:]))
+
+
+def test_write_errors_are_counted(tmp_path):
+    recorder = EventRecorder(str(tmp_path / "missing" / "events.jsonl.gz"), flush_events=1)
+    recorder.record(Event.BC_PING, (), {})
+    assert recorder.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_observer_records_every_notify(tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+    observer = Observer()
+    observer.recorder = EventRecorder(path)
+    calls = []
+
+    @observer.subscribe(Event.BC_CS_KICK)
+    async def kick(data):
+        calls.append(data["target"])
+
+    await observer.notify(Event.BC_CS_KICK, {Param.Interaction: Interaction(), "target": "bob"})
+    # Events without subscribers are recorded too
+    await observer.notify(Event.BC_PING)
+    await observer.notify_nowait(Event.BC_CS_KICK, {"target": "alice"})
+    observer.recorder.close()
+
+    assert calls == ["bob", "alice"]
+    records = [(event, args) for _, event, args, _ in read_recording(path)]
+    assert records == [
+        ("bc_cs_kick", [{"Param.Interaction": {"omitted": "Interaction"}, "target": "bob"}]),
+        ("bc_ping", []),
+        ("bc_cs_kick", [{"target": "alice"}]),
+    ]
+
+
+class ThreadRecordingRecorder(EventRecorder):
+    """Remembers which thread wrote each batch."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer_threads = []
+
+    def _write(self, lines):
+        self.writer_threads.append(threading.get_ident())
+        super()._write(lines)
+
+
+@pytest.mark.asyncio
+async def test_batches_are_written_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+    recorder = ThreadRecordingRecorder(path, flush_events=2)
+
+    for index in range(5):
+        recorder.record(Event.WBH_MESSAGE, ({"message": index},), {})
+    # atexit: the last event is written by close() itself, after the queued batches
+    recorder.close()
+
+    loop_thread = threading.get_ident()
+    assert all(thread != loop_thread for thread in recorder.writer_threads[:2])
+    assert recorder.writer_threads[2] == loop_thread
+    assert [args for _, _, args, _ in read_recording(path)] == [[{"message": index}] for index in range(5)]
+    assert recorder.stats()["writing"] == 0
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from redis import asyncio as aioredis
+
+from observer.observer import Event, Observer, Param
+from observer.redis_streams import RedisStreamBackend, StreamEncodeError, decode_event, encode_event
+
+from fakes.redis_server import start_redis_server
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def make_consumer(port, group="dbot", consumer=None, **kwargs):
+    observer = Observer()
+    received = []
+
+    @observer.subscribe(Event.WBH_MESSAGE)
+    async def on_message(data):
+        received.append(data["message"])
+
+    backend = RedisStreamBackend(port=port, group=group, consumer=consumer, block=0.05, **kwargs)
+    return observer, backend, received
+
+
+def test_event_encoding():
+    fields = encode_event(({"message": "привет"},), {"source": "cs"})
+    assert decode_event({key.encode(): value.encode() for key, value in fields.items()}) == \
+        ([{"message": "привет"}], {"source": "cs"})
+
+    with pytest.raises(StreamEncodeError):
+        encode_event(({Param.Interaction: object()},), {})
+
+
+@pytest.mark.asyncio
+async def test_events_cross_processes_through_the_stream():
+    server, port = await start_redis_server()
+    publisher = Observer()
+    publisher_backend = RedisStreamBackend(port=port)
+    publisher.use_backend(publisher_backend, [Event.WBH_MESSAGE])
+
+    local = []
+    publisher.subscribe(Event.WBH_MESSAGE)(lambda data: local.append(data))
+
+    observer, backend, received = make_consumer(port)
+    await backend.start(observer, [Event.WBH_MESSAGE])
+    try:
+        await wait_for(lambda: server.commands.get("XGROUP", 0))
+        for index in range(5):
+            await publisher.notify(Event.WBH_MESSAGE, {"message": f"m{index}"})
+
+        await wait_for(lambda: len(received) == 5)
+        assert received == [f"m{index}" for index in range(5)]
+        # The publisher's own subscribers are not called: it does not read the stream
+        assert local == []
+        assert publisher_backend.stats()["published"] == 5
+        assert backend.stats()["consumed"] == 5
+
+        pending = await backend.redis.xpending(backend.stream(Event.WBH_MESSAGE), "dbot")
+        assert pending["pending"] == 0
+    finally:
+        await backend.close()
+        await publisher_backend.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_consumer_groups_share_and_fan_out():
+    server, port = await start_redis_server()
+    publisher = Observer()
+    publisher_backend = RedisStreamBackend(port=port)
+    publisher.use_backend(publisher_backend, [Event.WBH_MESSAGE])
+
+    first = make_consumer(port, group="discord", consumer="a", batch=1)
+    second = make_consumer(port, group="discord", consumer="b", batch=1)
+    audit = make_consumer(port, group="audit")
+    consumers = [first, second, audit]
+    for observer, backend, _ in consumers:
+        await backend.start(observer, [Event.WBH_MESSAGE])
+    try:
+        await wait_for(lambda: server.commands.get("XGROUP", 0) == 3)
+        for index in range(20):
+            await publisher.notify(Event.WBH_MESSAGE, {"message": index})
+
+        await wait_for(lambda: len(first[2]) + len(second[2]) == 20 and len(audit[2]) == 20)
+        # Every event reaches one member of the "discord" group and every member of "audit"
+        assert sorted(first[2] + second[2]) == list(range(20))
+        assert audit[2] == list(range(20))
+    finally:
+        for _, backend, _ in consumers:
+            await backend.close()
+        await publisher_backend.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_unpublishable_events_are_handled_locally():
+    server, port = await start_redis_server()
+    observer = Observer()
+    backend = RedisStreamBackend(port=port)
+    observer.use_backend(backend, [Event.BC_CS_KICK, Event.WBH_MESSAGE])
+
+    calls = []
+    observer.subscribe(Event.BC_CS_KICK)(lambda data: calls.append("kick"))
+    observer.subscribe(Event.WBH_MESSAGE)(lambda data: calls.append("message"))
+    try:
+        # Command events carry discord objects: they cannot leave the process
+        await observer.notify(Event.BC_CS_KICK, {Param.Interaction: object(), "target": "bob"})
+        assert calls == ["kick"]
+        assert backend.stats()["unencodable"] == 1
+
+        # Redis is down: the event is not lost, it is handled here
+        server.close()
+        await asyncio.sleep(0.01)
+        await observer.notify(Event.WBH_MESSAGE, {"message": "hi"})
+        assert calls == ["kick", "message"]
+        assert backend.stats()["publish_errors"] == 1
+
+        await observer.notify_nowait(Event.WBH_MESSAGE, {"message": "later"})
+        assert calls == ["kick", "message", "message"]
+    finally:
+        await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_entries_are_redelivered():
+    server, port = await start_redis_server()
+    client = aioredis.Redis.from_url(f"redis://127.0.0.1:{port}/0")
+    publisher_backend = RedisStreamBackend(port=port)
+    stream = publisher_backend.stream(Event.WBH_MESSAGE)
+    try:
+        await client.xgroup_create(stream, "dbot", id="$", mkstream=True)
+        for index in range(3):
+            await publisher_backend.publish(Event.WBH_MESSAGE, ({"message": index},), {})
+
+        # "worker-1" and "dead" read the entries and crash before XACK
+        await client.xreadgroup("dbot", "worker-1", {stream: ">"}, count=2)
+        await client.xreadgroup("dbot", "dead", {stream: ">"}, count=1)
+
+        # worker-1 restarts: its own pending entries come first,
+        # the dead consumer's entry is claimed once it is idle long enough
+        observer, backend, received = make_consumer(port, consumer="worker-1", claim_idle=0.05)
+        await backend.start(observer, [Event.WBH_MESSAGE])
+        try:
+            await wait_for(lambda: len(received) == 3)
+
+            assert received == [0, 1, 2]
+            assert backend.stats()["claimed"] == 1
+            assert (await client.xpending(stream, "dbot"))["pending"] == 0
+        finally:
+            await backend.close()
+    finally:
+        await client.aclose()
+        await publisher_backend.close()
+        server.close()
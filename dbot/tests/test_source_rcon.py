@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+
+from rehlds.rcon import BadConnection, BadRCONPassword, RequestTimeout, ServerOffline
+from rehlds.source_rcon import SourceRCON
+from cs_server.csrcon import CSRCON
+
+from fakes.hlds import PASSWORD, big_text
+from fakes.source import start_source_server
+
+
+@pytest.mark.asyncio
+async def test_connect_and_execute():
+    server, port = await start_source_server()
+    rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        assert rcon.connected
+        assert await rcon.execute("version") == "echo: version"
+        assert rcon.in_flight == 0
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_bad_password():
+    server, port = await start_source_server()
+    rcon = SourceRCON(host="127.0.0.1", port=port, password="wrong", timeout=1)
+    try:
+        with pytest.raises(BadRCONPassword):
+            await rcon.connect()
+        assert not rcon.connected
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_refused():
+    server, port = await start_source_server()
+    server.close()
+    await asyncio.sleep(0)
+
+    rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=0.5)
+    with pytest.raises(BadConnection):
+        await rcon.connect()
+
+
+@pytest.mark.asyncio
+async def test_multi_packet_response():
+    server, port = await start_source_server(packet_size=512)
+    rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        assert await rcon.execute("big 5000") == big_text(5000)
+        assert rcon.metrics.packets_in > 10
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_are_pipelined():
+    server, port = await start_source_server(delay=0.05)
+    rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        started = time.monotonic()
+        replies = await asyncio.gather(*(rcon.execute(f"echo {i}") for i in range(20)))
+        elapsed = time.monotonic() - started
+    finally:
+        rcon.disconnect()
+        server.close()
+
+    assert replies == [str(i) for i in range(20)]
+    # One round trip for all requests, not 20 * delay
+    assert elapsed < 0.5
+    assert server.commands == 20
+
+
+@pytest.mark.asyncio
+async def test_late_reply_after_timeout_is_dropped():
+    server, port = await start_source_server(delay=0.2)
+    rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1)
+    try:
+        await rcon.connect()
+        with pytest.raises(RequestTimeout):
+            await rcon.execute("echo slow", timeout=0.05)
+        assert rcon.metrics.timeouts == 1
+
+        # The late reply arrives afterwards and is not mixed up with the next request
+        assert await rcon.execute("echo next") == "next"
+        assert rcon.in_flight == 0
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_lost_connection_fails_pending_requests():
+    server, port = await start_source_server(silent=True)
+    rcon = SourceRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=2)
+    try:
+        await rcon.connect()
+        pending = asyncio.gather(*(rcon.execute(f"echo {i}") for i in range(3)), return_exceptions=True)
+        await asyncio.sleep(0.05)
+        server.drop_connections()
+
+        results = await asyncio.wait_for(pending, 1)
+        assert all(isinstance(result, ServerOffline) for result in results)
+        assert not rcon.connected
+
+        # The server is back: reconnecting works
+        server.silent = False
+        await rcon.connect()
+        assert await rcon.execute("echo back") == "back"
+    finally:
+        rcon.disconnect()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_csrcon_source_protocol():
+    server, port = await start_source_server(delay=0.05)
+    cs = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1, protocol="source", pipeline=8)
+    try:
+        await cs.connect_to_server()
+        started = time.monotonic()
+        replies = await asyncio.gather(*(cs.exec(f"echo {i}") for i in range(8)))
+        elapsed = time.monotonic() - started
+
+        assert replies == [str(i) for i in range(8)]
+        assert elapsed < 0.3
+        assert [player.name for player in await cs.get_players()]
+        assert cs.stats()["protocol"] == "source"
+    finally:
+        await cs.disconnect()
+        cs.queue.close()
+        server.close()
+
+
+def test_csrcon_unknown_protocol():
+    with pytest.raises(ValueError):
+        CSRCON(host="127.0.0.1", password=PASSWORD, protocol="quake")
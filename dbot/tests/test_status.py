@@ -0,0 +1,69 @@
+import pytest
+
+from cs_server.csrcon import CSRCON
+from rehlds.status import parse_status, parse_time
+
+from fakes.hlds import PASSWORD, start_server
+
+STATUS = """hostname:  UltraHC Public
+version :  48/1.1.2.7/Stdio 2001 secure  (10)
+tcp/ip  :  10.0.0.1:27015
+map     :  de_dust2 at: 0 x, 0 y, 0 z
+players :  3 active (32 max)
+
+#      name userid uniqueid frag time ping loss adr
+# 1 "Player" 12 STEAM_0:1:1234 5 12:34   50    0 192.168.1.10:27005
+# 4 "[BOT] Joe" 15 BOT 0 1:02:03    0    0
+#10 "say "hi" guy" 21 STEAM_0:0:42 -1  7    99   10 10.1.2.3:27005
+3 users"""
+
+
+def test_parse_status():
+    table = parse_status(STATUS)
+
+    assert len(table) == 3
+    assert len(table.slots) == 10
+    assert table.names() == ["Player", "[BOT] Joe", 'say "hi" guy']
+
+    player = table.slots[0]
+    assert (player.slot, player.userid, player.steamid) == (1, 12, "STEAM_0:1:1234")
+    assert (player.ping, player.loss, player.time, player.ip) == (50, 0, 754, "192.168.1.10")
+    assert player.target == "#12"
+
+    bot = table.slots[3]
+    assert bot.steamid == "BOT" and bot.ip is None and bot.time == 3723
+
+    assert table.find('say "hi" guy').userid == 21
+    assert table.find("player").userid == 12
+    assert table.find("nobody") is None
+    assert table.slots[1] is None
+
+
+def test_parse_time_and_empty_status():
+    assert parse_time("07") == 7
+    assert parse_time("01:05") == 65
+    assert len(parse_status("players :  0 active (32 max)\n0 users")) == 0
+
+
+@pytest.mark.asyncio
+async def test_players_are_cached_and_resolved():
+    server, port = await start_server(responses={"status": STATUS})
+    hlds = server.get_protocol()
+    csrcon = CSRCON(host="127.0.0.1", port=port, password=PASSWORD, timeout=1, players_ttl=60)
+    try:
+        await csrcon.connect_to_server()
+        commands = hlds.commands
+
+        assert await csrcon.resolve_target("Player") == "#12"
+        assert await csrcon.resolve_target("Unknown") == "Unknown"
+        assert (await csrcon.get_players()).names()[0] == "Player"
+        assert hlds.commands == commands + 1
+
+        csrcon.cache.invalidate()
+        await csrcon.get_players()
+        await csrcon.get_players(max_age=0)
+        assert hlds.commands == commands + 3
+    finally:
+        await csrcon.disconnect()
+        csrcon.queue.close()
+        server.close()
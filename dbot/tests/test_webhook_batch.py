@@ -0,0 +1,150 @@
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from webserver import ws_client
+from webserver.ingest_queue import IngestQueue
+
+API_KEY = "secret"
+HEADERS = {"Authorization": API_KEY}
+
+MESSAGE = {"type": "message", "nick": "Player", "message": "hello", "team": 1, "steam_id": "STEAM_0:1:42"}
+INFO = {"type": "info", "map": "de_dust2", "max_players": 32, "current_players": []}
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Payloads that reached the handlers, in processing order; Discord is not involved."""
+    payloads = []
+
+    async def dispatch(payload):
+        payloads.append(payload)
+
+    monkeypatch.setattr(ws_client.config, "API_KEY", API_KEY)
+    monkeypatch.setattr(ws_client.config, "WEBHOOK_BATCH_MAX", 5)
+    monkeypatch.setattr(ws_client, "dispatch_webhook", dispatch)
+    # ws_client.ws is bound to the bot's loop: each test gets its own queue and application
+    monkeypatch.setattr(ws_client.ws, "ingest", IngestQueue(workers=2))
+    return payloads
+
+
+async def start():
+    app = web.Application()
+    app.router.add_post("/webhook/batch", ws_client.handle_webhook_batch)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+async def post_batch(client, body, content_type="application/json"):
+    return await client.post("/webhook/batch", data=body, headers={**HEADERS, "Content-Type": content_type})
+
+
+async def processed(dispatched):
+    """Chat messages in processing order and the number of statuses (different keys run concurrently)."""
+    await ws_client.ws.ingest.join()
+    messages = [payload.message for payload in dispatched if payload.type == "message"]
+    return messages, sum(payload.type == "info" for payload in dispatched)
+
+
+@pytest.mark.asyncio
+async def test_json_array(dispatched):
+    client = await start()
+    try:
+        response = await post_batch(client, json.dumps([MESSAGE, INFO, {**MESSAGE, "message": "bye"}]))
+
+        assert response.status == 202
+        assert await response.json() == {"queued": 3, "failed": 0}
+        assert await processed(dispatched) == (["hello", "bye"], 1)
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
+
+
+@pytest.mark.asyncio
+async def test_ndjson_is_parsed_while_streaming(dispatched):
+    client = await start()
+    try:
+        async def body():
+            for event in (MESSAGE, INFO):
+                yield (json.dumps(event) + "\n").encode()
+
+        response = await post_batch(client, body(), "application/x-ndjson")
+
+        assert response.status == 202
+        assert await response.json() == {"queued": 2, "failed": 0}
+        assert await processed(dispatched) == (["hello"], 1)
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
+
+
+@pytest.mark.asyncio
+async def test_lines_without_ndjson_content_type_fall_back_to_line_parsing(dispatched):
+    client = await start()
+    try:
+        body = "\n".join([json.dumps(MESSAGE), "", json.dumps(INFO)])
+        response = await post_batch(client, body, "text/plain")
+
+        assert response.status == 202
+        assert await response.json() == {"queued": 2, "failed": 0}
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
+
+
+@pytest.mark.asyncio
+async def test_bad_lines_and_events_are_counted_as_failed(dispatched):
+    client = await start()
+    try:
+        body = "\n".join([json.dumps(MESSAGE), "{not json", json.dumps({"type": "kick"}), json.dumps(INFO)])
+        response = await post_batch(client, body, "application/x-ndjson")
+
+        assert response.status == 202
+        assert await response.json() == {"queued": 2, "failed": 2}
+        assert await processed(dispatched) == (["hello"], 1)
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
+
+
+@pytest.mark.asyncio
+async def test_broken_array_is_rejected(dispatched):
+    client = await start()
+    try:
+        response = await post_batch(client, json.dumps([MESSAGE, INFO])[:-5])
+
+        assert response.status == 400
+        assert await processed(dispatched) == ([], 0)
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_above_limit_is_rejected(dispatched):
+    client = await start()
+    try:
+        response = await post_batch(client, json.dumps([MESSAGE] * 6))
+
+        assert response.status == 413
+        assert await processed(dispatched) == ([], 0)
+
+        response = await post_batch(client, json.dumps([MESSAGE] * 5))
+        assert response.status == 202
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_api_key(dispatched):
+    client = await start()
+    try:
+        response = await client.post("/webhook/batch", data=json.dumps([MESSAGE]))
+        assert response.status == 401
+    finally:
+        await client.close()
+        ws_client.ws.ingest.close()
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from webserver.ws_channel import ChannelRetry, GameChannel
+
+API_KEY = "secret"
+
+
+class Sink:
+    """Collects incoming channel events; can be told to refuse or reject them."""
+
+    def __init__(self):
+        self.events = []
+        self.busy = False
+
+    def __call__(self, session, data):
+        if self.busy:
+            raise ChannelRetry("busy", retry_after=0.5)
+        if not isinstance(data, dict) or "type" not in data:
+            raise ValueError("bad event")
+        self.events.append((session.name, data))
+
+
+async def start(channel):
+    app = web.Application()
+    app.router.add_get("/ws", channel.handle)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+def make_channel(sink, **kwargs):
+    return GameChannel(authorize=lambda request: request.headers.get("Authorization") == API_KEY,
+                       on_event=sink, **kwargs)
+
+
+async def connect(client, **hello):
+    conn = await client.ws_connect("/ws", headers={"Authorization": API_KEY})
+    await conn.send_json({"op": "hello", **hello})
+    welcome = await conn.receive_json()
+    assert welcome["op"] == "welcome"
+    return conn, welcome
+
+
+@pytest.mark.asyncio
+async def test_unauthorized_connection_is_refused():
+    client = await start(make_channel(Sink()))
+    response = await client.get("/ws")
+    assert response.status == 401
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_incoming_events_are_acked_in_order_and_duplicates_skipped():
+    sink = Sink()
+    channel = make_channel(sink)
+    client = await start(channel)
+    conn, welcome = await connect(client, name="public")
+    assert welcome["ack"] == 0 and not welcome["resumed"]
+
+    await conn.send_json({"op": "event", "seq": 1, "data": {"type": "message", "n": 1}})
+    assert await conn.receive_json() == {"op": "ack", "seq": 1}
+
+    # A gap is refused with the number the channel expects
+    await conn.send_json({"op": "event", "seq": 3, "data": {"type": "message", "n": 3}})
+    nack = await conn.receive_json()
+    assert nack["op"] == "nack" and nack["expected"] == 2
+
+    # A resent event is acked again but not delivered twice
+    await conn.send_json({"op": "event", "seq": 1, "data": {"type": "message", "n": 1}})
+    assert await conn.receive_json() == {"op": "ack", "seq": 1}
+
+    # An invalid event is acked with an error and skipped
+    await conn.send_json({"op": "event", "seq": 2, "data": {"n": 2}})
+    reply = await conn.receive_json()
+    assert reply["seq"] == 2 and reply["error"] == "bad event"
+
+    assert sink.events == [("public", {"type": "message", "n": 1})]
+    stats = channel.stats()
+    assert stats["duplicates"] == 1 and stats["rejected"] == 1 and stats["invalid"] == 1
+
+    await conn.close()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_busy_handler_asks_to_retry_the_same_event():
+    sink = Sink()
+    sink.busy = True
+    client = await start(make_channel(sink))
+    conn, _ = await connect(client)
+
+    await conn.send_json({"op": "event", "seq": 1, "data": {"type": "info"}})
+    nack = await conn.receive_json()
+    assert nack["op"] == "nack" and nack["expected"] == 1 and nack["retry_after"] == 0.5
+
+    sink.busy = False
+    await conn.send_json({"op": "event", "seq": 1, "data": {"type": "info"}})
+    assert await conn.receive_json() == {"op": "ack", "seq": 1}
+
+    await conn.close()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_unacked_outgoing_events():
+    sink = Sink()
+    channel = make_channel(sink)
+    client = await start(channel)
+    conn, welcome = await connect(client, name="public")
+    session = welcome["session"]
+    assert channel.connected("public") and not channel.connected("other")
+
+    await conn.send_json({"op": "event", "seq": 1, "data": {"type": "info"}})
+    await conn.receive_json()
+
+    assert await channel.send({"type": "command", "commands": ["say 1"]}) == 1
+    first = await conn.receive_json()
+    assert first["seq"] == 1
+    await conn.send_json({"op": "ack", "seq": 1})
+    await conn.close()
+    # Let the channel notice the disconnect
+    await asyncio.sleep(0.05)
+    assert not channel.connected("public")
+
+    # Sent while the client is away: kept for the session
+    assert await channel.send({"type": "command", "commands": ["say 2"]}, name="public") == 1
+    assert await channel.send({"type": "command", "commands": ["say 3"]}, name="other") == 0
+
+    conn, welcome = await connect(client, session=session, ack=1)
+    assert welcome["resumed"] and welcome["session"] == session and welcome["ack"] == 1
+    replayed = await conn.receive_json()
+    assert replayed == {"op": "event", "seq": 2, "data": {"type": "command", "commands": ["say 2"]}}
+
+    # The client continues its own numbering after the last acked event
+    await conn.send_json({"op": "event", "seq": 2, "data": {"type": "info"}})
+    assert await conn.receive_json() == {"op": "ack", "seq": 2}
+    assert len(sink.events) == 2
+    assert channel.stats()["resumed"] == 1
+
+    await conn.close()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_session_starts_over():
+    channel = make_channel(Sink(), resume_timeout=0)
+    client = await start(channel)
+    conn, welcome = await connect(client)
+    await conn.close()
+    await asyncio.sleep(0.05)
+
+    conn, resumed = await connect(client, session=welcome["session"], ack=0)
+    assert not resumed["resumed"] and resumed["session"] != welcome["session"]
+
+    await conn.close()
+    await client.close()